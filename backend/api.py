@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, make_response, stream_with_context
+from datetime import datetime
+from functools import wraps
+import itertools
 import logging
+import queue
 from .services import get_db_service
 from .scrapers import detect_forum_type
-from .scheduler import SchedulerService
+from .scheduler import get_scheduler_service
+from .events import get_event_broker
+from .serialization import dumps
+from .response_cache import ResponseCache
+from .config import get_config
+from .compression import COMPRESSIBLE_MIMETYPES, encoded_etags, negotiate_encoding
 
 # Configure logging
 logging.basicConfig(
@@ -16,21 +25,197 @@ api = Blueprint('api', __name__)
 
 # Services
 db_service = get_db_service()
-scheduler = SchedulerService()
+scheduler = get_scheduler_service()
+response_cache = ResponseCache(get_config().RESPONSE_CACHE_SIZE, get_config().RESPONSE_CACHE_MAX_BYTES)
+
+@api.teardown_app_request
+def remove_db_session(exception=None):
+    """Release the database session of the request thread"""
+    db_service.remove_session()
+
+# Listing helpers
+
+def parse_listing_args():
+    """
+    Read the pagination and projection parameters of a listing request
+    
+    Returns:
+        Tuple (limit or None for all rows, cursor, fields or None for all fields)
+        
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = min(max(int(limit), 1), 500)
+        except ValueError:
+            raise ValueError(f"Invalid limit: {limit}")
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    return limit, request.args.get('cursor'), fields
+
+def parse_bool_arg(name):
+    """Read an optional boolean query parameter (true/false, 1/0)"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"Invalid value for {name}: {value}")
+
+def project(items, fields):
+    """
+    Keep only the requested fields of serialized items, lazily
+    
+    Raises:
+        ValueError: If a field does not exist (checked on the first item)
+    """
+    items = iter(items)
+    first = next(items, None)
+    if first is None:
+        return iter(())
+    rows = itertools.chain([first], items)
+    if not fields:
+        return rows
+    unknown = [field for field in fields if field not in first]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ({field: item[field] for field in fields} for item in rows)
+
+# NDJSON streaming
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_ndjson():
+    """Whether the client asked for a newline-delimited JSON stream (Accept: application/x-ndjson)"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def ndjson_response(items, headers=None):
+    """Stream items as newline-delimited JSON, one object per line, serialized as they are produced"""
+    def generate():
+        for item in items:
+            yield dumps(item) + b'\n'
+    # The request context (and its database session) is kept until the end of the stream
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE, headers=headers)
+
+def listing_response(key, items, fields, next_cursor):
+    """
+    Response of a listing: a JSON object, or an NDJSON stream of the rows if requested
+    (the cursor of the next page is then in the X-Next-Cursor header)
+    
+    Raises:
+        ValueError: If a field does not exist
+    """
+    rows = project(items, fields)
+    if wants_ndjson():
+        return ndjson_response(rows, headers={'X-Next-Cursor': next_cursor} if next_cursor else None)
+    return jsonify({
+        'success': True,
+        key: list(rows),
+        'next_cursor': next_cursor
+    })
 
 # API Routes
 
+# Response cache
+
+def cached_response(view):
+    """
+    Cache the JSON responses of a read route until the next database write
+    
+    The ETag is derived from the URL and the data version: a matching If-None-Match
+    gets a 304 without running the view, and the other requests are served from the
+    in-memory cache when the body is there. NDJSON streams and errors are not cached.
+    The compressed body is cached with the body, so a cache hit is not compressed
+    again (compress_response then leaves the response as is).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if wants_ndjson():
+            return view(*args, **kwargs)
+        
+        path = request.full_path
+        version = db_service.data_version
+        etag = ResponseCache.etag(path, version)
+        # The client may hold the compressed representation, whose ETag has a suffix
+        matching = [tag for tag in encoded_etags(etag) if tag in request.if_none_match]
+        if matching:
+            response = Response(status=304)
+            etag = matching[0]
+        else:
+            entry = response_cache.get(path, version)
+            if entry is not None:
+                response = Response(entry.body, mimetype='application/json')
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = response_cache.put(path, version, response.get_data())
+            
+            config = current_app.config
+            min_size = config.get('COMPRESSION_MIN_SIZE', get_config().COMPRESSION_MIN_SIZE)
+            if response.mimetype in COMPRESSIBLE_MIMETYPES and len(entry.body) >= min_size:
+                response.vary.add('Accept-Encoding')
+                encoding = negotiate_encoding()
+                if encoding:
+                    level = config.get('COMPRESSION_LEVEL', get_config().COMPRESSION_LEVEL)
+                    response.set_data(response_cache.encoded(entry, encoding, level))
+                    response.headers['Content-Encoding'] = encoding
+                    etag = f"{etag}-{encoding}"
+        
+        response.set_etag(etag)
+        # Always revalidated: the browser sends If-None-Match and gets a 304 while nothing changed
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept')
+        return response
+    return wrapper
+
 # Performers API
 @api.route('/api/performers', methods=['GET'])
+@cached_response
 def get_performers():
-    """Get all performers"""
-    performers = db_service.get_all_performers()
-    return jsonify({
-        'success': True,
-        'performers': [performer.to_dict() for performer in performers]
-    })
+    """
+    Get the performers, with their threads
+    
+    Query parameters: limit and cursor (keyset pagination, all rows without limit),
+    is_active, forum_type, name (prefix), summary (thread_count instead of the
+    threads) and fields (comma-separated projection)
+    """
+    try:
+        limit, cursor, fields = parse_listing_args()
+        is_active = parse_bool_arg('is_active')
+        summary = parse_bool_arg('summary') or False
+        with_threads = not summary and (not fields or 'threads' in fields)
+        performers, next_cursor = db_service.list_performers(
+            limit=limit,
+            cursor=cursor,
+            is_active=is_active,
+            forum_type=request.args.get('forum_type') or None,
+            name_prefix=request.args.get('name') or None,
+            # The threads are not loaded when the projection leaves them out
+            with_threads=with_threads,
+            stream=wants_ndjson()
+        )
+        if summary:
+            # Without pagination, all the counts are read rather than a huge IN list
+            counts = db_service.get_thread_counts(
+                [performer.id for performer in performers] if limit is not None else None)
+            items = (dict(performer.to_dict(with_threads=False), thread_count=counts.get(performer.id, 0))
+                     for performer in performers)
+        else:
+            items = (performer.to_dict(with_threads=with_threads) for performer in performers)
+        return listing_response('performers', items, fields, next_cursor)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
 
 @api.route('/api/performers/<int:performer_id>', methods=['GET'])
+@cached_response
 def get_performer(performer_id):
     """Get a performer by ID"""
     performer = db_service.get_performer(performer_id)
@@ -71,6 +256,98 @@ def create_performer():
             'error': error
         }), 400
 
+# Batch creation
+
+def parse_batch(key):
+    """
+    Read the items of a batch request: {"<key>": [...], "atomic": false} or a bare array
+    
+    Returns:
+        Tuple (items, atomic)
+        
+    Raises:
+        ValueError: If the body is not a non-empty array of at most BATCH_MAX_ITEMS items
+    """
+    data = request.get_json(silent=True)
+    atomic = False
+    if isinstance(data, dict):
+        atomic = bool(data.get('atomic', False))
+        data = data.get(key)
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"A non-empty array of {key} is required")
+    max_items = get_config().BATCH_MAX_ITEMS
+    if len(data) > max_items:
+        raise ValueError(f"At most {max_items} {key} per batch")
+    return data, atomic
+
+def batch_response(key, items, errors, create, atomic):
+    """
+    Create the valid items of a batch and return the result of each item
+    
+    Args:
+        key: Name of the created objects in the results (performer, thread)
+        items: Items of the batch, None for the invalid ones
+        errors: Validation error of each item
+        create: DatabaseService method creating the valid items in one transaction
+        atomic: Create nothing if one item fails
+    """
+    valid = [item for item in items if item is not None]
+    if atomic and len(valid) < len(items):
+        created = [(None, "Not created: another item of the batch failed")] * len(valid)
+    elif valid:
+        _, created, _ = create(valid, atomic=atomic)
+    else:
+        created = []
+    created = iter(created)
+    
+    results = []
+    for index, error in enumerate(errors):
+        obj = None
+        if error is None:
+            obj, error = next(created)
+        results.append({'index': index, 'success': obj is not None,
+                        key: obj, 'error': error or None})
+    
+    created_count = sum(1 for result in results if result['success'])
+    # 201 if everything was created, 207 if only some items were, 400 if none
+    status = 201 if created_count == len(results) else 207 if created_count else 400
+    return jsonify({
+        'success': created_count == len(results),
+        'created': created_count,
+        'failed': len(results) - created_count,
+        'results': results
+    }), status
+
+@api.route('/api/performers/batch', methods=['POST'])
+def create_performers():
+    """
+    Create several performers in a single transaction
+    
+    Body: {"performers": [{"name": "...", "is_active": true}, ...], "atomic": false}
+    """
+    try:
+        data, atomic = parse_batch('performers')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    items, errors = [], []
+    for item in data:
+        name = item.get('name') if isinstance(item, dict) else None
+        if not isinstance(name, str) or not name.strip():
+            items.append(None)
+            errors.append("Name is required")
+        elif not isinstance(item.get('is_active', True), bool):
+            items.append(None)
+            errors.append("is_active must be a boolean")
+        else:
+            items.append({'name': name, 'is_active': item.get('is_active', True)})
+            errors.append(None)
+    
+    return batch_response('performer', items, errors, db_service.create_performers, atomic)
+
 @api.route('/api/performers/<int:performer_id>', methods=['PUT'])
 def update_performer(performer_id):
     """Update a performer"""
@@ -115,15 +392,34 @@ def delete_performer(performer_id):
 
 # Threads API
 @api.route('/api/threads', methods=['GET'])
+@cached_response
 def get_threads():
-    """Get all threads"""
-    threads = db_service.get_all_threads()
-    return jsonify({
-        'success': True,
-        'threads': [thread.to_dict() for thread in threads]
-    })
+    """
+    Get the threads
+    
+    Query parameters: limit and cursor (keyset pagination, all rows without limit),
+    performer_id, forum_type, is_active (of the performer) and fields
+    (comma-separated projection)
+    """
+    try:
+        limit, cursor, fields = parse_listing_args()
+        threads, next_cursor = db_service.list_threads(
+            limit=limit,
+            cursor=cursor,
+            performer_id=request.args.get('performer_id', type=int),
+            forum_type=request.args.get('forum_type') or None,
+            is_active=parse_bool_arg('is_active'),
+            stream=wants_ndjson()
+        )
+        return listing_response('threads', (thread.to_dict() for thread in threads), fields, next_cursor)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
 
 @api.route('/api/performers/<int:performer_id>/threads', methods=['GET'])
+@cached_response
 def get_performer_threads(performer_id):
     """Get all threads for a performer"""
     performer = db_service.get_performer(performer_id)
@@ -140,6 +436,7 @@ def get_performer_threads(performer_id):
     })
 
 @api.route('/api/threads/<int:thread_id>', methods=['GET'])
+@cached_response
 def get_thread(thread_id):
     """Get a thread by ID"""
     thread = db_service.get_thread(thread_id)
@@ -190,6 +487,46 @@ def create_thread(performer_id):
             'error': error
         }), 400
 
+@api.route('/api/threads/batch', methods=['POST'])
+def create_threads():
+    """
+    Create several threads in a single transaction, the forum type being detected from the URL if not given
+    
+    Body: {"threads": [{"performer_id": 1, "url": "...", "forum_type": "planetsuzy"}, ...], "atomic": false}
+    """
+    try:
+        data, atomic = parse_batch('threads')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    items, errors = [], []
+    for item in data:
+        if not isinstance(item, dict):
+            items.append(None)
+            errors.append("Each thread must be an object")
+            continue
+        url = item.get('url')
+        performer_id = item.get('performer_id')
+        forum_type = item.get('forum_type')
+        if not isinstance(url, str) or not url.strip():
+            error = "URL is required"
+        elif not isinstance(performer_id, int) or isinstance(performer_id, bool):
+            error = "performer_id is required"
+        else:
+            error = None
+            if not forum_type:
+                try:
+                    forum_type = detect_forum_type(url)
+                except ValueError as e:
+                    error = str(e)
+        items.append({'performer_id': performer_id, 'url': url, 'forum_type': forum_type} if error is None else None)
+        errors.append(error)
+    
+    return batch_response('thread', items, errors, db_service.create_threads, atomic)
+
 @api.route('/api/threads/<int:thread_id>', methods=['PUT'])
 def update_thread(thread_id):
     """Update a thread"""
@@ -234,42 +571,263 @@ def delete_thread(thread_id):
         }), 404 if "not found" in error else 400
 
 # Check API
-@api.route('/api/check/thread/<int:thread_id>', methods=['GET'])
+def check_response(**target):
+    """
+    Start a check and return its job, or stream its results as NDJSON if requested
+    
+    The stream has a "job" line, then for each thread as soon as it is checked its
+    "post" lines and a "thread" line, and a final "done" line. If no thread completes
+    for CHECK_STREAM_TIMEOUT_SECONDS, the stream ends with an "error" line instead.
+    Closing the stream cancels the threads not fetched yet.
+    """
+    if not wants_ndjson():
+        run = scheduler.start_check(**target)
+        return jsonify({
+            'success': True,
+            'job': run.to_dict(with_results=False)
+        }), 202
+    
+    timeout = current_app.config.get('CHECK_STREAM_TIMEOUT_SECONDS', get_config().CHECK_STREAM_TIMEOUT_SECONDS)
+    completed = queue.Queue()
+    run = scheduler.start_check(listener=completed.put, **target)
+    
+    def lines():
+        try:
+            yield dict(run.to_dict(with_results=False, with_threads=False), type='job')
+            while True:
+                try:
+                    job = completed.get(timeout=timeout)
+                except queue.Empty:
+                    yield dict(run.to_dict(with_results=False, with_threads=False), type='error',
+                               error=f"No thread checked for {timeout} seconds")
+                    return
+                if job is None:
+                    break
+                # One thread at a time: only the posts of this thread are serialized
+                for post in job.results():
+                    yield dict(post, type='post', thread_id=job.thread_id)
+                yield dict(run.thread_dict(job), type='thread')
+            yield dict(run.to_dict(with_results=False, with_threads=False), type='done')
+        finally:
+            if run.running:
+                scheduler.check_runs.cancel(run.id)
+    
+    return ndjson_response(lines())
+
+@api.route('/api/check/thread/<int:thread_id>', methods=['GET', 'POST'])
 def check_thread(thread_id):
-    """Check a thread for new posts"""
-    new_posts = scheduler.run_single_check(thread_id=thread_id)
+    """Start a check of a thread for new posts (poll /api/jobs/<id>)"""
+    if not db_service.get_thread(thread_id):
+        return jsonify({
+            'success': False,
+            'error': f"Thread with ID {thread_id} not found"
+        }), 404
+    
+    return check_response(thread_id=thread_id)
+
+@api.route('/api/check/performer/<int:performer_id>', methods=['GET', 'POST'])
+def check_performer(performer_id):
+    """Start a check of all threads of a performer for new posts (poll /api/jobs/<id>)"""
+    if not db_service.get_performer(performer_id):
+        return jsonify({
+            'success': False,
+            'error': f"Performer with ID {performer_id} not found"
+        }), 404
+    
+    return check_response(performer_id=performer_id)
+
+@api.route('/api/check/all', methods=['GET', 'POST'])
+def check_all():
+    """Start a check of all threads of all active performers for new posts (poll /api/jobs/<id>)"""
+    return check_response()
+
+# Jobs API
+@api.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """Get the checks started through the API, newest first, without their results"""
     return jsonify({
         'success': True,
-        'new_posts': new_posts
+        'jobs': [run.to_dict(with_results=False) for run in scheduler.check_runs.list()]
     })
 
-@api.route('/api/check/performer/<int:performer_id>', methods=['GET'])
-def check_performer(performer_id):
-    """Check all threads of a performer for new posts"""
-    new_posts = scheduler.run_single_check(performer_id=performer_id)
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, per-thread progress and new posts of a check"""
+    run = scheduler.check_runs.get(job_id)
+    if not run:
+        return jsonify({
+            'success': False,
+            'error': f"Job {job_id} not found"
+        }), 404
     return jsonify({
         'success': True,
-        'new_posts': new_posts
+        'job': run.to_dict()
     })
 
-@api.route('/api/check/all', methods=['GET'])
-def check_all():
-    """Check all threads of all active performers for new posts"""
+@api.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a running check"""
+    if scheduler.check_runs.cancel(job_id):
+        return jsonify({
+            'success': True,
+            'message': f"Job {job_id} cancelled"
+        })
+    return jsonify({
+        'success': False,
+        'error': f"No running job {job_id}"
+    }), 404
+
+# Posts API
+@api.route('/api/threads/<int:thread_id>/posts', methods=['GET'])
+@cached_response
+def get_thread_posts(thread_id):
+    """Get the stored posts of a thread, newest first (?limit=50&cursor=...)"""
+    thread = db_service.get_thread(thread_id)
+    if not thread:
+        return jsonify({
+            'success': False,
+            'error': f"Thread with ID {thread_id} not found"
+        }), 404
+    
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    try:
+        posts, next_cursor = db_service.get_thread_posts(thread_id, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return listing_response('posts', (post.to_dict() for post in posts), None, next_cursor)
+
+@api.route('/api/search', methods=['GET'])
+@cached_response
+def search_posts():
+    """
+    Full-text search over the stored posts
+    
+    Query parameters: q, performer_id, quality, provider, date_from, date_to
+    (ISO dates), limit and page
+    """
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    page = max(request.args.get('page', 1, type=int), 1)
+    try:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        date_from = datetime.fromisoformat(date_from) if date_from else None
+        date_to = datetime.fromisoformat(date_to) if date_to else None
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f"Invalid date: {e}"
+        }), 400
+    
     try:
-        new_posts = scheduler.run_single_check()
-        logger.info(f"API check_all returned {len(new_posts)} posts")
+        results, has_more = db_service.search_posts(
+            query=request.args.get('q'),
+            performer_id=request.args.get('performer_id', type=int),
+            quality=request.args.get('quality'),
+            provider=request.args.get('provider'),
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            offset=(page - 1) * limit
+        )
+    except RuntimeError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'results': results,
+        'page': page,
+        'has_more': has_more
+    })
+
+# Backfill API
+@api.route('/api/threads/<int:thread_id>/backfill', methods=['POST'])
+def start_backfill(thread_id):
+    """Start crawling the full history of a thread"""
+    thread = db_service.get_thread(thread_id)
+    if not thread:
+        return jsonify({
+            'success': False,
+            'error': f"Thread with ID {thread_id} not found"
+        }), 404
+    
+    progress = scheduler.backfill_service.start(thread_id)
+    return jsonify({
+        'success': True,
+        'backfill': progress.to_dict()
+    }), 202
+
+@api.route('/api/threads/<int:thread_id>/backfill', methods=['GET'])
+def get_backfill(thread_id):
+    """Get the progress of the backfill of a thread"""
+    progress = scheduler.backfill_service.get_progress(thread_id)
+    if progress:
         return jsonify({
             'success': True,
-            'new_posts': new_posts,
-            'count': len(new_posts)
+            'backfill': progress.to_dict()
         })
-    except Exception as e:
-        logger.error(f"Error in check_all API: {e}")
+    
+    thread = db_service.get_thread(thread_id)
+    if not thread:
         return jsonify({
             'success': False,
-            'error': str(e),
-            'new_posts': []
-        }), 500
+            'error': f"Thread with ID {thread_id} not found"
+        }), 404
+    return jsonify({
+        'success': True,
+        'backfill': {
+            'thread_id': thread_id,
+            'status': 'idle',
+            'completed_pages': thread.backfill_page or 0
+        }
+    })
+
+@api.route('/api/threads/<int:thread_id>/backfill', methods=['DELETE'])
+def cancel_backfill(thread_id):
+    """Cancel the running backfill of a thread"""
+    if scheduler.backfill_service.cancel(thread_id):
+        return jsonify({
+            'success': True,
+            'message': f"Backfill of thread {thread_id} cancelled"
+        })
+    return jsonify({
+        'success': False,
+        'error': f"No running backfill for thread {thread_id}"
+    }), 404
+
+# Live events API
+@api.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of the new_post, thread_checked and cycle_progress events
+    
+    A reconnecting client resumes after the Last-Event-ID header (or ?last_event_id=).
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    return Response(get_event_broker().stream(last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable the proxy buffering (nginx)
+    })
+
+@api.route('/api/pipeline/stats', methods=['GET'])
+def pipeline_stats():
+    """Get queue depth and throughput of each check pipeline stage, and the response cache statistics"""
+    return jsonify({
+        'success': True,
+        'stages': scheduler.pipeline.stats(),
+        'response_cache': response_cache.stats()
+    })
 
 # Test API with the example PlanetSuzy HTML
 @api.route('/api/test/planetsuzy', methods=['GET'])
@@ -1,6 +1,7 @@
 import os
 import logging
-from flask import Flask, render_template, send_from_directory
+import hashlib
+from flask import Flask, abort, make_response, render_template, request
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
 import asyncio
@@ -8,7 +9,10 @@ import asyncio
 from .models import init_db
 from .api import api
 from .config import get_config
-from .scheduler import SchedulerService
+from .serialization import FastJSONProvider
+from .compression import compress_response
+from .static_assets import StaticAssets
+from .scheduler import get_scheduler_service
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +32,9 @@ def create_app():
     config = get_config()
     app.config.from_object(config)
     
+    # jsonify and request.get_json go through the shared serializer (orjson when installed)
+    app.json = FastJSONProvider(app)
+    
     # Register API blueprint
     app.register_blueprint(api)
     
@@ -56,19 +63,42 @@ def create_app():
         except Exception as e:
             logger.error(f"Error copying example HTML: {e}")
     
+    # Static files, referenced by content-hashed URLs in the main page
+    assets = StaticAssets(app.static_folder)
+    
+    @app.context_processor
+    def inject_asset_url():
+        """Make asset_url() available to the templates"""
+        return {'asset_url': assets.url}
+    
+    @app.after_request
+    def compress(response):
+        """Compress the responses the client accepts compressed"""
+        return compress_response(response, app.config['COMPRESSION_MIN_SIZE'], app.config['COMPRESSION_LEVEL'])
+    
     # Routes
     @app.route('/')
     def index():
-        """Serve the main page"""
-        return render_template('index.html')
+        """Serve the main page, revalidated on every load since it references the current asset URLs"""
+        response = make_response(render_template('index.html'))
+        response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:16])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     
     @app.route('/<path:path>')
     def static_files(path):
         """Serve static files"""
-        return send_from_directory(app.static_folder, path)
+        if path == 'index.html':
+            return index()
+        asset, hashed = assets.resolve(path)
+        if asset is None:
+            abort(404)
+        return assets.response(asset, hashed, app.config['COMPRESSION_MIN_SIZE'])
     
     # Initialize and start scheduler
-    scheduler = SchedulerService(check_interval_seconds=app.config['CHECK_INTERVAL_SECONDS'])
+    # (shared with the API so that manual checks go through the same pipeline)
+    scheduler = get_scheduler_service()
+    scheduler.check_interval_seconds = app.config['CHECK_INTERVAL_SECONDS']
     scheduler.start()
     
     # Register shutdown function to stop scheduler
@@ -0,0 +1,200 @@
+"""
+Récupération de l'historique complet d'un thread (backfill).
+
+Les pages sont parcourues de la plus ancienne à la plus récente par lots téléchargés
+en parallèle. Après chaque lot, les posts sont enregistrés dans la table `posts` et
+transmis en une fois au `sink` éventuel, puis la dernière page terminée est
+enregistrée sur le thread (`Thread.backfill_page`), ce qui permet de reprendre un
+backfill interrompu. Une seule notification récapitulative est
+envoyée à la fin, au lieu d'un message par post, et seulement si des posts ont
+été récupérés.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+from .scrapers import get_scraper, Post
+
+logger = logging.getLogger(__name__)
+
+class BackfillProgress:
+    """Progress of the backfill of a thread"""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.status = 'pending'  # pending, running, completed, cancelled, failed
+        self.total_pages = None
+        self.completed_pages = 0
+        self.posts_found = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+
+    @property
+    def running(self) -> bool:
+        return self.status in ('pending', 'running')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "total_pages": self.total_pages,
+            "completed_pages": self.completed_pages,
+            "posts_found": self.posts_found,
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class BackfillService:
+    """Service crawling the full history of threads"""
+
+    def __init__(self, db_service, notification_service, batch_size: int = 10, max_workers: int = 4):
+        """
+        Initialize the backfill service
+
+        Args:
+            db_service: Database service used to read threads, store posts and checkpoints
+            notification_service: Notification service used for the final summary
+            batch_size: Number of pages fetched between two checkpoints
+            max_workers: Number of pages fetched in parallel
+        """
+        self.db_service = db_service
+        self.notification_service = notification_service
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.progress = {}  # thread_id -> BackfillProgress
+        self._lock = threading.Lock()
+
+    def get_progress(self, thread_id: int) -> Optional[BackfillProgress]:
+        """Get the progress of the last backfill of a thread"""
+        return self.progress.get(thread_id)
+
+    def start(self, thread_id: int, sink: Optional[Callable[[int, List[Post]], None]] = None) -> BackfillProgress:
+        """
+        Start the backfill of a thread in a background thread
+
+        Returns:
+            The progress of the backfill (the running one if already started)
+        """
+        with self._lock:
+            progress = self.progress.get(thread_id)
+            if progress and progress.running:
+                return progress
+            progress = BackfillProgress(thread_id)
+            self.progress[thread_id] = progress
+
+        worker = threading.Thread(
+            target=self.backfill_thread,
+            kwargs={'thread_id': thread_id, 'sink': sink, 'progress': progress},
+            name=f"backfill-{thread_id}",
+            daemon=True
+        )
+        worker.start()
+        return progress
+
+    def cancel(self, thread_id: int) -> bool:
+        """Request the cancellation of a running backfill"""
+        progress = self.progress.get(thread_id)
+        if progress and progress.running:
+            progress.cancel_requested = True
+            return True
+        return False
+
+    def backfill_thread(self, thread_id: int, sink: Optional[Callable[[int, List[Post]], None]] = None,
+                        progress: Optional[BackfillProgress] = None,
+                        progress_callback: Optional[Callable[[BackfillProgress], None]] = None) -> BackfillProgress:
+        """
+        Crawl all pages of a thread, resuming from the last completed page
+
+        Args:
+            thread_id: ID of the thread to backfill
+            sink: Function also receiving the posts of each batch of pages (e.g. an export)
+            progress: Progress object to update (created if None)
+            progress_callback: Function called after each batch
+
+        Returns:
+            The final progress of the backfill
+        """
+        if progress is None:
+            progress = BackfillProgress(thread_id)
+            self.progress[thread_id] = progress
+        progress.status = 'running'
+        progress.started_at = datetime.utcnow()
+
+        try:
+            thread = self.db_service.get_thread(thread_id)
+            if not thread:
+                raise ValueError(f"Thread with ID {thread_id} not found")
+            thread_url = thread.url
+            performer_name = thread.performer.name
+            start_page = (thread.backfill_page or 0) + 1
+            last_post_count = thread.last_post_count
+            scraper = get_scraper(thread.forum_type, thread.url, thread.last_post_id, thread.last_post_count)
+            scraper.max_parallel_pages = self.max_workers
+
+            first = scraper.fetch_first_page()
+            first_url = first.url
+            last_page = scraper.get_last_page_number(scraper.parse_html(first.html))
+            progress.total_pages = last_page
+            progress.completed_pages = start_page - 1
+            logger.info(f"Backfilling {thread_url}: pages {start_page} to {last_page}")
+
+            newest_post = None
+            for batch_start in range(start_page, last_page + 1, self.batch_size):
+                if progress.cancel_requested:
+                    progress.status = 'cancelled'
+                    break
+
+                page_numbers = list(range(batch_start, min(batch_start + self.batch_size, last_page + 1)))
+                posts = []
+                for page in scraper.fetch_pages_parallel(first_url, page_numbers):
+                    if page.posts is None:
+                        page.posts = scraper.extract_posts(scraper.parse_html(page.html), with_qualities=False)
+                    posts.extend(page.posts)
+                scraper.add_video_qualities(posts)
+
+                if posts:
+                    stored, _, error = self.db_service.upsert_posts(thread_id, posts)
+                    if not stored:
+                        raise RuntimeError(f"Failed to store the posts: {error}")
+                    if sink:
+                        sink(thread_id, posts)
+                    batch_newest = max(posts, key=lambda p: (p.post_count or 0, p.post_id))
+                    if newest_post is None or (batch_newest.post_count or 0) > (newest_post.post_count or 0):
+                        newest_post = batch_newest
+
+                # Checkpoint
+                self.db_service.update_backfill_checkpoint(thread_id, page_numbers[-1])
+                progress.completed_pages = page_numbers[-1]
+                progress.posts_found += len(posts)
+                logger.info(f"Backfill {thread_url}: {progress.completed_pages}/{last_page} pages, "
+                            f"{progress.posts_found} posts")
+                if progress_callback:
+                    progress_callback(progress)
+
+            # Move the watermark to the newest post so regular checks resume from there
+            if newest_post and (last_post_count is None or (newest_post.post_count or 0) > last_post_count):
+                self.db_service.update_thread(thread_id, last_post_id=newest_post.post_id,
+                                              last_post_count=newest_post.post_count)
+
+            if progress.status == 'running':
+                progress.status = 'completed'
+                # Nothing to report when the thread was already backfilled or no post was found
+                if progress.posts_found and start_page <= last_page:
+                    self.notification_service.send_notification(
+                        performer_name,
+                        f"Historique récupéré : {progress.posts_found} posts sur {last_page} pages"
+                    )
+        except Exception as e:
+            logger.error(f"Error backfilling thread {thread_id}: {e}")
+            progress.status = 'failed'
+            progress.error = str(e)
+        finally:
+            progress.finished_at = datetime.utcnow()
+            self.db_service.remove_session()
+
+        return progress
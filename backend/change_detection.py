@@ -0,0 +1,93 @@
+"""
+Détection des threads modifiés à partir des pages de liste du forum.
+
+Une page de liste (forumdisplay, recherche des nouveaux posts) donne le nombre de
+réponses et le dernier post de dizaines de threads en une seule requête. Seuls les
+threads dont ce marqueur a changé depuis la dernière vérification sont vérifiés ;
+les threads absents des listes ne sont revérifiés qu'après `max_skip_seconds`.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+from .scrapers import get_scraper, ListingEntry
+
+logger = logging.getLogger(__name__)
+
+class ChangeDetector:
+    """Select the threads whose listing marker changed since their last check"""
+
+    def __init__(self, listing_urls: Dict[str, List[str]], max_skip_seconds: int = 86400):
+        """
+        Initialize the change detector
+
+        Args:
+            listing_urls: Listing page URLs by forum type
+            max_skip_seconds: Maximum time a thread absent from the listings is skipped
+        """
+        self.listing_urls = {forum_type: urls for forum_type, urls in listing_urls.items() if urls}
+        self.max_skip_seconds = max_skip_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.listing_urls)
+
+    def scan(self) -> Dict[Tuple[str, str], ListingEntry]:
+        """
+        Fetch the listing pages
+
+        Returns:
+            Listing entries by (forum type, thread key)
+        """
+        entries = {}
+        for forum_type, urls in self.listing_urls.items():
+            scraper = get_scraper(forum_type, urls[0])
+
+            def fetch(url):
+                try:
+                    return scraper.get_page_content(url)
+                except Exception as e:
+                    logger.error(f"Error fetching listing page {url}: {e}")
+                    return ''
+
+            with ThreadPoolExecutor(max_workers=min(len(urls), scraper.max_parallel_pages)) as executor:
+                for html in executor.map(fetch, urls):
+                    for entry in scraper.parse_listing(html):
+                        # The first listing wins (e.g. the most recent one)
+                        entries.setdefault((forum_type, entry.thread_key), entry)
+        logger.info(f"Listing scan found {len(entries)} threads on {sum(map(len, self.listing_urls.values()))} pages")
+        return entries
+
+    def select_threads(self, threads: List, entries: Dict[Tuple[str, str], ListingEntry]) -> List[Tuple[object, Optional[str]]]:
+        """
+        Keep the threads that need to be checked
+
+        Args:
+            threads: Thread objects of the cycle
+            entries: Listing entries returned by scan()
+
+        Returns:
+            List of (thread, new listing marker) to check
+        """
+        now = datetime.utcnow()
+        selected = []
+
+        for thread in threads:
+            if thread.forum_type not in self.listing_urls:
+                selected.append((thread, None))
+                continue
+
+            key = get_scraper(thread.forum_type, thread.url).get_thread_key(thread.url)
+            entry = entries.get((thread.forum_type, key)) if key else None
+            if entry:
+                if entry.marker != thread.listing_marker:
+                    selected.append((thread, entry.marker))
+            elif (thread.last_post_id is None or not thread.last_check
+                  or now - thread.last_check >= timedelta(seconds=self.max_skip_seconds)):
+                # Never checked, or absent from the listings: checked from time to time as a safety net
+                selected.append((thread, None))
+
+        logger.info(f"Change detection: {len(selected)}/{len(threads)} threads to check")
+        return selected
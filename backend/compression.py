@@ -0,0 +1,97 @@
+"""
+Compression des réponses HTTP (gzip, et brotli si le module est installé).
+
+Les réponses JSON, HTML, CSS et JavaScript au-delà de `COMPRESSION_MIN_SIZE`
+octets sont compressées selon l'en-tête `Accept-Encoding` du client. Les flux
+(NDJSON, Server-Sent Events) ne sont pas compressés pour ne pas retarder les
+lignes. L'ETag d'une réponse compressée reçoit le suffixe de l'encodage, pour
+qu'il reste propre à chaque représentation.
+"""
+
+import gzip
+from typing import List, Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'image/svg+xml'
+}
+
+def available_encodings() -> List[str]:
+    """Encodings supported by this installation, preferred first"""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+def negotiate_encoding() -> Optional[str]:
+    """Choose the encoding of the response from the Accept-Encoding header of the request"""
+    for encoding in available_encodings():
+        if request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    Compress data
+
+    Args:
+        data: Data to compress
+        encoding: 'gzip' or 'br'
+        level: Compression level, 1 (fast) to 9 (small); brotli uses the same scale up to 11
+
+    Returns:
+        The compressed data
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    # mtime=0: the same data always gives the same bytes
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+def encoded_etags(etag: str) -> List[str]:
+    """ETags of every representation of a response: uncompressed and each encoding"""
+    return [etag] + [f"{etag}-{encoding}" for encoding in available_encodings()]
+
+def compress_response(response, min_size: int = 1024, level: int = 6):
+    """
+    Compress a response if the client accepts it and it is worth it (after_request handler)
+
+    Args:
+        response: Response to compress
+        min_size: Smaller bodies are sent as is
+        level: Compression level
+
+    Returns:
+        The response
+    """
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding is None or (response.content_length or 0) < min_size:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+        # The client already has this compressed representation
+        if request.if_none_match.contains_weak(f"{etag}-{encoding}"):
+            response.status_code = 304
+            response.set_data(b'')
+            return response
+
+    response.set_data(compress(response.get_data(), encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
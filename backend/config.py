@@ -9,10 +9,60 @@ class Config:
     
     # Database
     DB_PATH = os.environ.get('DB_PATH', 'forum_tracker.db')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')  # Safe with WAL, FULL for durability on power loss
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -20000))  # Negative = KiB (20 MB)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))  # 256 MB
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+    
+    # JSON serialization: auto (orjson when installed), orjson, json
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    
+    # Cache of the API read responses (ETags always; bodies kept in memory if RESPONSE_CACHE_SIZE > 0)
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))  # Number of responses
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 33554432))  # 32 MB
+    
+    # Compression of the responses (gzip, brotli if installed)
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Bytes, smaller responses are sent as is
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))  # 1 (fast) to 9 (small)
+    
+    # Maximum number of performers or threads created by one batch request
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 1000))
+    
+    # Full-text search: number of newest matching posts ranked by relevance (0 = all)
+    SEARCH_RANK_WINDOW = int(os.environ.get('SEARCH_RANK_WINDOW', 2000))
     
     # Scheduler
     CHECK_INTERVAL_SECONDS = int(os.environ.get('CHECK_INTERVAL_SECONDS', 7200))  # Default: 2 hours
     
+    # Check pipeline (fetch -> parse -> extract -> notify)
+    PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 50))
+    PIPELINE_FETCH_WORKERS = int(os.environ.get('PIPELINE_FETCH_WORKERS', 4))
+    PIPELINE_PARSE_WORKERS = int(os.environ.get('PIPELINE_PARSE_WORKERS', 2))
+    PIPELINE_EXTRACT_WORKERS = int(os.environ.get('PIPELINE_EXTRACT_WORKERS', 1))
+    PIPELINE_NOTIFY_WORKERS = int(os.environ.get('PIPELINE_NOTIFY_WORKERS', 1))
+    
+    # Checks requested through the API
+    CHECK_JOB_TTL_SECONDS = int(os.environ.get('CHECK_JOB_TTL_SECONDS', 3600))  # Finished checks kept for polling
+    CHECK_RESULT_CACHE_SECONDS = int(os.environ.get('CHECK_RESULT_CACHE_SECONDS', 0))  # 0 = manual checks always scrape
+    CHECK_STREAM_TIMEOUT_SECONDS = int(os.environ.get('CHECK_STREAM_TIMEOUT_SECONDS', 600))  # Wait for the next thread of a stream
+    
+    # History backfill
+    BACKFILL_BATCH_SIZE = int(os.environ.get('BACKFILL_BATCH_SIZE', 10))  # Pages between two checkpoints
+    BACKFILL_MAX_WORKERS = int(os.environ.get('BACKFILL_MAX_WORKERS', 4))
+    
+    # PlanetSuzy
+    PLANETSUZY_POSTS_PER_PAGE = int(os.environ.get('PLANETSUZY_POSTS_PER_PAGE', 0))  # 0 = deduced from the pages
+    PLANETSUZY_MAX_PARALLEL_PAGES = int(os.environ.get('PLANETSUZY_MAX_PARALLEL_PAGES', 4))
+    PLANETSUZY_PAGE_VARIANT = os.environ.get('PLANETSUZY_PAGE_VARIANT', 'default')  # default, showthread
+    PLANETSUZY_MAX_POSTS_PER_PAGE = int(os.environ.get('PLANETSUZY_MAX_POSTS_PER_PAGE', 40))
+    PLANETSUZY_FAST_EXTRACTOR = os.environ.get('PLANETSUZY_FAST_EXTRACTOR', 'false').lower() in ('1', 'true', 'yes')
+    PLANETSUZY_STREAMING = os.environ.get('PLANETSUZY_STREAMING', 'false').lower() in ('1', 'true', 'yes')
+    # Listing pages used to skip unchanged threads (e.g. search.php?do=getdaily), comma separated
+    PLANETSUZY_LISTING_URLS = [url.strip() for url in os.environ.get('PLANETSUZY_LISTING_URLS', '').split(',') if url.strip()]
+    LISTING_MAX_SKIP_SECONDS = int(os.environ.get('LISTING_MAX_SKIP_SECONDS', 86400))  # Threads absent from the listings
+    
     # Download Providers
     DOWNLOAD_PROVIDERS = [
         'filejoker.net', 
@@ -0,0 +1,166 @@
+"""
+Diffusion des événements du planificateur au frontend (Server-Sent Events).
+
+Le pipeline et le planificateur publient des événements (`new_post`,
+`thread_checked`, `cycle_progress`) dans le `EventBroker`. Chaque client abonné à
+`/api/events` reçoit une file bornée : un client trop lent perd ses plus anciens
+événements au lieu de bloquer les publieurs. Les derniers événements sont gardés
+pour qu'un client reconnecté reprenne après `Last-Event-ID`.
+"""
+
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+from .serialization import dumps_str
+
+class Event:
+    """An event published to the subscribers"""
+
+    def __init__(self, event_id: int, name: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.name = name
+        self.data = data
+
+    def to_sse(self) -> str:
+        """Format the event for a text/event-stream response"""
+        return f"id: {self.id}\nevent: {self.name}\ndata: {dumps_str(self.data)}\n\n"
+
+class EventBroker:
+    """Publish/subscribe hub for the live events"""
+
+    def __init__(self, history_size: int = 200, subscriber_queue_size: int = 500):
+        """
+        Initialize the broker
+
+        Args:
+            history_size: Number of recent events kept for the reconnecting clients
+            subscriber_queue_size: Maximum number of events waiting for a subscriber
+        """
+        self.subscriber_queue_size = subscriber_queue_size
+        self.history = deque(maxlen=history_size)
+        self.subscribers: List[queue.Queue] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, name: str, data: Dict[str, Any]) -> Event:
+        """Publish an event to every subscriber; never blocks"""
+        with self._lock:
+            event = Event(self._next_id, name, data)
+            self._next_id += 1
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow client: drop its oldest event
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        """
+        Subscribe to the events
+
+        Args:
+            last_event_id: ID of the last event received before a reconnection; the
+                           more recent events still in the history are queued first
+
+        Returns:
+            The queue receiving the events, to be passed to unsubscribe()
+        """
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self.history:
+                    if event.id > last_event_id and not subscriber.full():
+                        subscriber.put_nowait(event)
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """Stop sending events to a subscriber"""
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def stream(self, last_event_id: Optional[int] = None, heartbeat_seconds: float = 15.0) -> Iterator[str]:
+        """
+        Yield the events formatted for a text/event-stream response, until the client disconnects
+
+        A comment line is sent every heartbeat_seconds so that proxies keep the connection open.
+        """
+        subscriber = self.subscribe(last_event_id)
+        try:
+            # Delay before the browser reconnects after a disconnection
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield event.to_sse()
+        finally:
+            self.unsubscribe(subscriber)
+
+class ProgressTracker:
+    """Publish the cycle_progress events of a check as its thread jobs complete"""
+
+    def __init__(self, events: Optional[EventBroker], scope: str, total: int, job_id: Optional[str] = None):
+        """
+        Initialize the tracker and publish the start of the check
+
+        Args:
+            events: Event broker (nothing is published if None)
+            scope: What is checked (scheduler, thread, performer, all)
+            total: Number of threads to check
+            job_id: ID of the API check, None for the scheduler cycles
+        """
+        self.events = events
+        self.scope = scope
+        self.total = total
+        self.job_id = job_id
+        self.completed = 0
+        self.new_posts = 0
+        self._lock = threading.Lock()
+        self._publish('running')
+
+    def job_done(self, job):
+        """Completion callback of a thread job"""
+        with self._lock:
+            self.completed += 1
+            self.new_posts += len(job.new_posts)
+            self._publish('running')
+
+    def finish(self, status: str = 'completed'):
+        """Publish the end of the check"""
+        with self._lock:
+            self._publish(status)
+
+    def _publish(self, status: str):
+        if self.events:
+            self.events.publish('cycle_progress', {
+                "job_id": self.job_id,
+                "scope": self.scope,
+                "status": status,
+                "completed_threads": self.completed,
+                "total_threads": self.total,
+                "new_posts": self.new_posts
+            })
+
+# Singleton instance
+_event_broker = None
+
+def get_event_broker() -> EventBroker:
+    """Get the event broker shared by the scheduler and the API"""
+    global _event_broker
+    if _event_broker is None:
+        _event_broker = EventBroker()
+    return _event_broker
@@ -0,0 +1,213 @@
+"""
+Vérifications lancées depuis l'API, exécutées en arrière-plan.
+
+Une vérification (`CheckRun`) regroupe les jobs du pipeline des threads demandés.
+Elle est soumise par un thread d'arrière-plan : la requête HTTP renvoie tout de
+suite l'identifiant de la vérification, dont l'avancement par thread et les
+résultats sont ensuite lus sur `/api/jobs/<id>`. Le registre (`CheckRunRegistry`)
+gère l'annulation et supprime les vérifications terminées après `ttl_seconds`.
+"""
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Callable
+
+from .pipeline import CheckJob
+from .events import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+class CheckRun:
+    """A check of one or more threads requested through the API"""
+
+    def __init__(self, scope: str, target_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.scope = scope  # thread, performer, all
+        self.target_id = target_id
+        self.status = 'pending'  # pending, running, completed, cancelled, failed
+        self.jobs: List[CheckJob] = []
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.cancel_requested = False
+        self.listeners = []  # Called with each completed thread job, then with None once the check is over
+
+    @property
+    def running(self) -> bool:
+        return self.status in ('pending', 'running')
+
+    @staticmethod
+    def job_status(job: CheckJob) -> str:
+        if not job.done:
+            return 'pending'
+        if job.cancelled:
+            return 'cancelled'
+        return 'failed' if job.error else 'completed'
+
+    def notify(self, job: Optional[CheckJob]):
+        """Call the listeners with a completed job (None at the end of the check)"""
+        for listener in self.listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Error in a listener of check {self.id}: {e}")
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Return the new posts found so far, with the ID of their thread"""
+        results = []
+        for job in self.jobs:
+            if job.done:
+                results.extend(dict(post, thread_id=job.thread_id) for post in job.results())
+        return results
+
+    def thread_dict(self, job: CheckJob) -> Dict[str, Any]:
+        """Progress of one thread of the check"""
+        return {
+            "thread_id": job.thread_id,
+            "thread_url": job.thread_url,
+            "performer_name": job.performer_name,
+            "status": self.job_status(job),
+            "new_posts": len(job.new_posts),
+            "error": job.error
+        }
+
+    def to_dict(self, with_results: bool = True, with_threads: bool = True) -> Dict[str, Any]:
+        threads = [self.thread_dict(job) for job in self.jobs]
+        data = {
+            "id": self.id,
+            "scope": self.scope,
+            "target_id": self.target_id,
+            "status": self.status,
+            "total_threads": len(threads),
+            "completed_threads": sum(1 for thread in threads if thread["status"] != 'pending'),
+            "new_posts": sum(thread["new_posts"] for thread in threads),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+        if with_threads:
+            data["threads"] = threads
+        if with_results:
+            data["results"] = self.results()
+        return data
+
+class CheckRunRegistry:
+    """Registry running the checks requested through the API in the background"""
+
+    def __init__(self, pipeline, db_service, ttl_seconds: int = 3600, events=None):
+        """
+        Initialize the registry
+
+        Args:
+            pipeline: Check pipeline the jobs are submitted to
+            db_service: Database service whose session is released by the background threads
+            ttl_seconds: Time a finished check is kept in the registry
+            events: Event broker receiving the cycle_progress events of the checks
+        """
+        self.pipeline = pipeline
+        self.db_service = db_service
+        self.events = events
+        self.ttl_seconds = ttl_seconds
+        self.runs = {}  # run id -> CheckRun
+        self._lock = threading.Lock()
+
+    def start(self, scope: str, make_jobs: Callable[[], List[CheckJob]],
+              target_id: Optional[int] = None,
+              listener: Optional[Callable[[Optional[CheckJob]], None]] = None) -> CheckRun:
+        """
+        Start a check in a background thread
+
+        Args:
+            scope: What is checked (thread, performer, all)
+            make_jobs: Function building the pipeline jobs, called in the background thread
+            target_id: ID of the checked thread or performer
+            listener: Function called with each completed thread job, then with None
+                      once the check is over (e.g. to stream the results)
+
+        Returns:
+            The check, still pending
+        """
+        self.cleanup()
+        run = CheckRun(scope, target_id)
+        if listener:
+            run.listeners.append(listener)
+        with self._lock:
+            self.runs[run.id] = run
+
+        worker = threading.Thread(target=self._run, args=(run, make_jobs), name=f"check-{run.id[:8]}", daemon=True)
+        worker.start()
+        return run
+
+    def get(self, run_id: str) -> Optional[CheckRun]:
+        """Get a check by ID"""
+        self.cleanup()
+        return self.runs.get(run_id)
+
+    def list(self) -> List[CheckRun]:
+        """Get the checks kept in the registry, newest first"""
+        self.cleanup()
+        with self._lock:
+            return sorted(self.runs.values(), key=lambda run: run.created_at, reverse=True)
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancel a running check: the threads whose fetch has not started are skipped"""
+        run = self.runs.get(run_id)
+        if not run or not run.running:
+            return False
+        run.cancel_requested = True
+        for job in run.jobs:
+            # A job shared with another check (e.g. the scheduler) keeps running
+            if not job.shared:
+                job.cancel_requested = True
+        return True
+
+    def cleanup(self) -> int:
+        """Remove the checks finished for more than ttl_seconds"""
+        limit = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        with self._lock:
+            expired = [run_id for run_id, run in self.runs.items()
+                       if run.finished_at and run.finished_at < limit]
+            for run_id in expired:
+                del self.runs[run_id]
+        return len(expired)
+
+    def _run(self, run: CheckRun, make_jobs: Callable[[], List[CheckJob]]):
+        run.status = 'running'
+        tracker = None
+        try:
+            try:
+                run.jobs = make_jobs()
+            finally:
+                self.db_service.remove_session()
+
+            tracker = ProgressTracker(self.events, run.scope, len(run.jobs), job_id=run.id)
+            # Submitting blocks while the pipeline is full, so the check is stopped between submissions
+            for index, job in enumerate(run.jobs):
+                if run.cancel_requested:
+                    job.cancelled = True
+                    job.finish()
+                    tracker.job_done(job)
+                    run.notify(job)
+                    continue
+                # A thread already being checked is shared with the running check
+                run.jobs[index] = self.pipeline.submit(job, use_cache=True)
+                run.jobs[index].add_done_callback(tracker.job_done)
+                run.jobs[index].add_done_callback(run.notify)
+            for job in run.jobs:
+                job.wait()
+
+            run.status = 'cancelled' if run.cancel_requested else 'completed'
+            logger.info(f"Check {run.id} ({run.scope}) {run.status}: {sum(len(job.new_posts) for job in run.jobs)} "
+                        f"new posts in {len(run.jobs)} threads")
+        except Exception as e:
+            logger.error(f"Error in check {run.id}: {e}")
+            run.status = 'failed'
+            run.error = str(e)
+        finally:
+            run.finished_at = datetime.utcnow()
+            if tracker is None:
+                tracker = ProgressTracker(self.events, run.scope, 0, job_id=run.id)
+            tracker.finish(run.status)
+            run.notify(None)
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, create_engine
+from sqlalchemy import (Column, Integer, String, Boolean, ForeignKey, DateTime, LargeBinary, Index,
+                        create_engine, event, inspect, text)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, scoped_session
 from datetime import datetime
+from urllib.parse import urlparse
+import logging
 import os
+import threading
+import zlib
+
+from .config import get_config
 
 Base = declarative_base()
 
@@ -11,32 +18,42 @@ class Performer(Base):
     
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, unique=True)
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     
     threads = relationship("Thread", back_populates="performer", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Performer(id={self.id}, name='{self.name}', is_active={self.is_active})>"
     
-    def to_dict(self):
-        return {
+    def to_dict(self, with_threads=True):
+        data = {
             "id": self.id,
             "name": self.name,
-            "is_active": self.is_active,
-            "threads": [thread.to_dict() for thread in self.threads]
+            "is_active": self.is_active
         }
+        if with_threads:
+            data["threads"] = [thread.to_dict() for thread in self.threads]
+        return data
 
 class Thread(Base):
     __tablename__ = 'threads'
+    __table_args__ = (
+        # A thread URL is tracked once per forum; also serves the lookups by URL
+        Index('ux_threads_url_forum', 'url', 'forum_type', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
-    performer_id = Column(Integer, ForeignKey('performers.id'), nullable=False)
+    performer_id = Column(Integer, ForeignKey('performers.id'), nullable=False, index=True)
     url = Column(String, nullable=False)
     forum_type = Column(String, nullable=False)
     last_post_id = Column(String, nullable=True)
+    last_post_count = Column(Integer, nullable=True)  # Position of the last seen post in the thread
+    backfill_page = Column(Integer, nullable=True)  # Last page completed by the history backfill
+    listing_marker = Column(String, nullable=True)  # Reply count / last post seen on the forum listings
     last_check = Column(DateTime, default=datetime.utcnow)
     
     performer = relationship("Performer", back_populates="threads")
+    posts = relationship("StoredPost", back_populates="thread", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Thread(id={self.id}, url='{self.url}', forum_type='{self.forum_type}')>"
@@ -48,9 +65,106 @@ class Thread(Base):
             "url": self.url,
             "forum_type": self.forum_type,
             "last_post_id": self.last_post_id,
+            "last_post_count": self.last_post_count,
+            "backfill_page": self.backfill_page,
             "last_check": self.last_check.isoformat() if self.last_check else None
         }
 
+def compress_text(value):
+    """Compress a post body for storage"""
+    return zlib.compress(value.encode('utf-8'), 6) if value else None
+
+def decompress_text(value):
+    """Decompress a stored post body"""
+    return zlib.decompress(value).decode('utf-8') if value else ''
+
+class StoredPost(Base):
+    __tablename__ = 'posts'
+    __table_args__ = (
+        # One row per post of a thread: upserts are idempotent
+        Index('ix_posts_thread_post', 'thread_id', 'post_id', unique=True),
+        # History of a thread, newest first (keyset pagination)
+        Index('ix_posts_thread_count', 'thread_id', 'post_count', 'id'),
+        # Search results without query, newest first
+        Index('ix_posts_date', 'date', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    thread_id = Column(Integer, ForeignKey('threads.id'), nullable=False)
+    post_id = Column(String, nullable=False)
+    post_count = Column(Integer, nullable=True)
+    date = Column(DateTime, nullable=True)
+    author = Column(String, nullable=True)
+    content_zlib = Column(LargeBinary, nullable=True)  # zlib compressed body
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    thread = relationship("Thread", back_populates="posts")
+    qualities = relationship("PostQuality", back_populates="post", cascade="all, delete-orphan",
+                             order_by="PostQuality.id")
+    links = relationship("PostLink", back_populates="post", cascade="all, delete-orphan",
+                         order_by="PostLink.id")
+    
+    @property
+    def content(self):
+        return decompress_text(self.content_zlib)
+    
+    def __repr__(self):
+        return f"<StoredPost(thread_id={self.thread_id}, post_id='{self.post_id}', post_count={self.post_count})>"
+    
+    def to_dict(self):
+        """Same format as Post.to_dict"""
+        qualities = []
+        for quality in self.qualities:
+            provider_links = {}
+            for link in self.links:
+                if link.kind == 'quality' and link.quality == quality.name:
+                    provider_links.setdefault(link.provider, []).append(link.url)
+            qualities.append({
+                "quality_name": quality.name,
+                "description": quality.description,
+                "provider_links": provider_links
+            })
+        
+        return {
+            "post_id": self.post_id,
+            "post_count": self.post_count,
+            "date": self.date.isoformat() if self.date else None,
+            "author": self.author,
+            "content": self.content,
+            "download_links": [link.url for link in self.links if link.kind == 'download'],
+            "images": [link.url for link in self.links if link.kind == 'image'],
+            "video_qualities": qualities
+        }
+
+class PostQuality(Base):
+    __tablename__ = 'post_qualities'
+    
+    id = Column(Integer, primary_key=True)
+    post_pk = Column(Integer, ForeignKey('posts.id'), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    
+    post = relationship("StoredPost", back_populates="qualities")
+    
+    def __repr__(self):
+        return f"<PostQuality(post_pk={self.post_pk}, name='{self.name}')>"
+
+class PostLink(Base):
+    __tablename__ = 'post_links'
+    
+    id = Column(Integer, primary_key=True)
+    post_pk = Column(Integer, ForeignKey('posts.id'), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # download, image, quality (link of a video quality)
+    provider = Column(String, nullable=True)
+    url = Column(String, nullable=False)
+    quality = Column(String, nullable=True)  # Name of the video quality, for quality links
+    
+    post = relationship("StoredPost", back_populates="links")
+    
+    def __repr__(self):
+        return f"<PostLink(post_pk={self.post_pk}, kind='{self.kind}', url='{self.url}')>"
+
 class CallbackData(Base):
     __tablename__ = 'callback_data'
     
@@ -58,20 +172,279 @@ class CallbackData(Base):
     callback_id = Column(String, nullable=False, unique=True, index=True)
     data = Column(String, nullable=False)  # JSON serialized data
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     
     def __repr__(self):
         return f"<CallbackData(id={self.id}, callback_id='{self.callback_id}')>"
 
+class MigrationError(Exception):
+    """Raised by a migration needing a manual decision, before it changes anything"""
+
+def _newest_watermark(first, second):
+    """
+    (last_post_id, last_post_count) of the duplicate thread furthest ahead
+    
+    The post counts decide when both are known and differ; otherwise (counts NULL on
+    databases created before they were stored) the post IDs are compared as numbers.
+    A known post ID is never replaced by NULL.
+    """
+    def post_number(post_id):
+        return int(post_id) if post_id and post_id.isdigit() else -1
+    
+    if first[1] is not None and second[1] is not None and first[1] != second[1]:
+        newest, other = (first, second) if first[1] > second[1] else (second, first)
+    else:
+        newest, other = (first, second) if post_number(first[0]) >= post_number(second[0]) else (second, first)
+    return (newest[0], newest[1]) if newest[0] is not None else (other[0], other[1])
+
+def _merge_thread(connection, survivor, duplicate):
+    """Move the posts and check state of a duplicate thread of the same performer into the survivor"""
+    params = {"survivor": survivor, "duplicate": duplicate}
+    # Posts stored under both threads: the survivor's copy is kept
+    shared = ("SELECT id FROM posts WHERE thread_id = :duplicate "
+              "AND post_id IN (SELECT post_id FROM posts WHERE thread_id = :survivor)")
+    connection.execute(text(f"DELETE FROM post_qualities WHERE post_pk IN ({shared})"), params)
+    connection.execute(text(f"DELETE FROM post_links WHERE post_pk IN ({shared})"), params)
+    connection.execute(text(f"DELETE FROM posts WHERE id IN ({shared})"), params)
+    connection.execute(text("UPDATE posts SET thread_id = :survivor WHERE thread_id = :duplicate"), params)
+    
+    # The most advanced watermark and backfill checkpoint of the two threads
+    state = {thread_id: row for thread_id, *row in connection.execute(text(
+        "SELECT id, last_post_id, last_post_count, backfill_page, last_check FROM threads "
+        "WHERE id IN (:survivor, :duplicate)"), params)}
+    kept, merged = state[survivor], state[duplicate]
+    last_post_id, last_post_count = _newest_watermark(kept, merged)
+    connection.execute(text(
+        "UPDATE threads SET last_post_id = :last_post_id, last_post_count = :last_post_count, "
+        "backfill_page = :backfill_page, last_check = :last_check, listing_marker = NULL WHERE id = :survivor"
+    ), {"survivor": survivor, "last_post_id": last_post_id, "last_post_count": last_post_count,
+        "backfill_page": max(kept[2] or 0, merged[2] or 0) or None,
+        "last_check": max(kept[3] or '', merged[3] or '') or None})
+    connection.execute(text("DELETE FROM threads WHERE id = :duplicate"), params)
+
+def _remove_duplicate_threads(connection):
+    """
+    Merge the duplicate threads of each (URL, forum) pair, before its unique index is created
+    
+    Duplicates of the same performer are merged into the oldest thread with their posts.
+    A URL tracked by several performers needs a decision: nothing is changed and
+    MigrationError lists them.
+    """
+    rows = connection.execute(text(
+        "SELECT t.id, t.url, t.forum_type, t.performer_id, p.name FROM threads t "
+        "LEFT JOIN performers p ON p.id = t.performer_id "
+        "WHERE (t.url, t.forum_type) IN (SELECT url, forum_type FROM threads GROUP BY url, forum_type HAVING COUNT(*) > 1) "
+        "ORDER BY t.url, t.forum_type, t.id"
+    )).all()
+    groups = {}
+    for thread_id, url, forum_type, performer_id, name in rows:
+        groups.setdefault((url, forum_type), []).append((thread_id, performer_id, name))
+    
+    conflicts = [(key, threads) for key, threads in groups.items()
+                 if len({performer_id for _, performer_id, _ in threads}) > 1]
+    if conflicts:
+        lines = [f"  {url} ({forum_type}): " + ', '.join(f"thread {thread_id} of performer '{name}' (ID {performer_id})"
+                                                          for thread_id, performer_id, name in threads)
+                 for (url, forum_type), threads in conflicts]
+        raise MigrationError(
+            "These thread URLs are tracked by several performers; delete or reassign the extra threads "
+            "(DELETE /api/threads/<id>, or in SQLite) so that each URL has a single performer, then restart:\n"
+            + '\n'.join(lines))
+    
+    for (url, forum_type), threads in groups.items():
+        survivor = threads[0][0]
+        for duplicate, _, _ in threads[1:]:
+            logging.info(f"Merging duplicate thread {duplicate} into thread {survivor} ({url})")
+            _merge_thread(connection, survivor, duplicate)
+        # The search scope of the moved posts names the surviving thread
+        if connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'")).first():
+            connection.execute(text(
+                "UPDATE posts_fts SET scope = :scope WHERE rowid IN (SELECT id FROM posts WHERE thread_id = :survivor)"
+            ), {"scope": search_scope(survivor, threads[0][1]), "survivor": survivor})
+
+# Data migrations, run once per database in order; the version reached is stored in PRAGMA user_version.
+# New columns and indexes are added by upgrade_schema and need no entry here.
+MIGRATIONS = [
+    (1, "remove duplicate threads", _remove_duplicate_threads),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Indexes which can only be created once a migration has cleaned the data
+MIGRATION_INDEXES = {
+    'ux_threads_url_forum': 1,
+}
+
+def run_migrations(connection):
+    """
+    Run the migrations newer than the version of the database
+    
+    A migration raising MigrationError (before changing anything) is logged; it and the
+    following ones are retried at the next start.
+    
+    Returns:
+        The version of the database after the migrations
+    """
+    version = connection.execute(text('PRAGMA user_version')).scalar() or 0
+    for target, description, migration in MIGRATIONS:
+        if target > version:
+            logging.info(f"Migrating database to version {target}: {description}")
+            try:
+                migration(connection)
+            except MigrationError as e:
+                logging.error(f"Migration {target} ({description}) not applied: {e}")
+                return version
+            connection.execute(text(f'PRAGMA user_version = {int(target)}'))
+            version = target
+    return version
+
+def upgrade_schema(engine):
+    """Upgrade tables created by an older version: missing columns, migrations, then missing indexes"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        tables = [table for table in Base.metadata.sorted_tables if inspector.has_table(table.name)]
+        for table in tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        version = run_migrations(connection)
+        for table in tables:
+            for index in table.indexes:
+                if index.name in MIGRATION_INDEXES and version < MIGRATION_INDEXES[index.name]:
+                    logging.error(f"Index {index.name} not created until migration {MIGRATION_INDEXES[index.name]} is applied")
+                    continue
+                index.create(connection, checkfirst=True)
+
+# Hot queries and the index each one must use (EXPLAIN QUERY PLAN checked by tests/test_query_plans.py)
+HOT_QUERIES = [
+    ("threads by performer", "SELECT id FROM threads WHERE performer_id = 1", 'ix_threads_performer_id'),
+    ("active performers", "SELECT id FROM performers WHERE is_active = 1", 'ix_performers_is_active'),
+    ("thread by URL", "SELECT id FROM threads WHERE url = 'x'", 'ux_threads_url_forum'),
+    ("expired callbacks", "SELECT id FROM callback_data WHERE expires_at < '2000-01-01'", 'ix_callback_data_expires_at'),
+    ("thread history", "SELECT id FROM posts WHERE thread_id = 1 ORDER BY post_count DESC, id DESC LIMIT 50",
+     'ix_posts_thread_count'),
+]
+
+def link_hosts(urls):
+    """Hosts of the download links of a post, as indexed for the search (k2s.cc filejoker.net)"""
+    hosts = []
+    for url in urls:
+        host = urlparse(url).netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        if host and host not in hosts:
+            hosts.append(host)
+    return ' '.join(hosts)
+
+def search_scope(thread_id, performer_id):
+    """Tokens of the thread and performer of a post, used to filter the search inside the index"""
+    return f"thread{thread_id} performer{performer_id}"
+
+def create_search_index(engine):
+    """
+    Create the FTS5 full-text index of the posts (content, author, link hosts)
+    
+    Post bodies are stored compressed, so the index keeps its own copy of the text;
+    rows are written by DatabaseService.upsert_posts and removed by a trigger when
+    a post is deleted. The existing posts are indexed when the table is created.
+    """
+    inspector = inspect(engine)
+    if inspector.has_table('posts_fts'):
+        return
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE posts_fts USING fts5(content, author, hosts, scope, tokenize='unicode61')"
+            ))
+            connection.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts "
+                "BEGIN DELETE FROM posts_fts WHERE rowid = old.id; END"
+            ))
+            
+            # Index the posts stored before the creation of the index
+            links = {}
+            for post_pk, url in connection.execute(text("SELECT post_pk, url FROM post_links WHERE kind = 'download'")):
+                links.setdefault(post_pk, []).append(url)
+            rows = [
+                {"rowid": post_pk, "content": decompress_text(content), "author": author or '',
+                 "hosts": link_hosts(links.get(post_pk, [])), "scope": search_scope(thread_id, performer_id)}
+                for post_pk, author, content, thread_id, performer_id in connection.execute(text(
+                    "SELECT p.id, p.author, p.content_zlib, t.id, t.performer_id "
+                    "FROM posts p JOIN threads t ON t.id = p.thread_id"))
+            ]
+            if rows:
+                connection.execute(text(
+                    "INSERT INTO posts_fts (rowid, content, author, hosts, scope) "
+                    "VALUES (:rowid, :content, :author, :hosts, :scope)"
+                ), rows)
+    except Exception as e:
+        # SQLite built without FTS5: the search is disabled
+        logging.warning(f"Full-text search index not available: {e}")
+
+# One engine (and connection pool) and one session factory per database file, shared by the process
+_engines = {}
+_session_factories = {}
+_scoped_sessions = {}
+_engines_lock = threading.Lock()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure each new SQLite connection"""
+    config = get_config()
+    cursor = dbapi_connection.cursor()
+    # WAL: readers are not blocked by the scheduler's writes
+    cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+def get_engine(db_path='forum_tracker.db'):
+    """Get the shared engine of a database file"""
+    key = os.path.abspath(db_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            config = get_config()
+            engine = create_engine(
+                f'sqlite:///{db_path}',
+                pool_size=config.SQLITE_POOL_SIZE,
+                max_overflow=config.SQLITE_POOL_SIZE,
+                connect_args={
+                    'check_same_thread': False,  # Pooled connections are used by several threads
+                    'timeout': config.SQLITE_BUSY_TIMEOUT_MS / 1000
+                }
+            )
+            event.listen(engine, 'connect', _set_sqlite_pragmas)
+            _engines[key] = engine
+            _session_factories[key] = sessionmaker(bind=engine)
+            _scoped_sessions[key] = scoped_session(_session_factories[key])
+        return engine
+
+def get_session_factory(db_path='forum_tracker.db'):
+    """Get the shared session factory of a database file"""
+    get_engine(db_path)
+    return _session_factories[os.path.abspath(db_path)]
+
+def get_scoped_session(db_path='forum_tracker.db'):
+    """
+    Get the thread-local session registry of a database file
+    
+    Each thread (Flask request, scheduler job, pipeline worker) gets its own session;
+    it must call remove() once its unit of work is done.
+    """
+    get_engine(db_path)
+    return _scoped_sessions[os.path.abspath(db_path)]
+
 def init_db(db_path='forum_tracker.db'):
     """Initialize the database and create tables"""
-    engine = create_engine(f'sqlite:///{db_path}')
+    engine = get_engine(db_path)
     Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    upgrade_schema(engine)
+    create_search_index(engine)
+    return get_session_factory(db_path)()
 
 def get_session(db_path='forum_tracker.db'):
     """Get a new database session"""
-    engine = create_engine(f'sqlite:///{db_path}')
-    Session = sessionmaker(bind=engine)
-    return Session()
\ No newline at end of file
+    return get_session_factory(db_path)()
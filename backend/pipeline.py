@@ -0,0 +1,407 @@
+"""
+Pipeline de vérification des threads : fetch → parse → extract → notify.
+
+Chaque étape possède sa propre file bornée et son propre pool de workers, de sorte
+qu'une étape lente (par exemple l'envoi Telegram) n'arrête pas les téléchargements :
+les étapes en amont ne sont bloquées que lorsque la file suivante est pleine.
+
+Un thread n'est vérifié qu'une fois à la fois : un job soumis pendant qu'un autre
+job du même thread est en cours récupère ce dernier et partage son résultat.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+from .scrapers import get_scraper
+
+logger = logging.getLogger(__name__)
+
+# Sentinel used to stop the workers of a stage
+_STOP = object()
+
+class CheckJob:
+    """A thread check travelling through the pipeline"""
+
+    def __init__(self, thread_id: int, thread_url: str, forum_type: str,
+                 last_post_id: Optional[str], performer_name: str,
+                 last_post_count: Optional[int] = None, listing_marker: Optional[str] = None):
+        self.thread_id = thread_id
+        self.thread_url = thread_url
+        self.forum_type = forum_type
+        self.last_post_id = last_post_id
+        self.last_post_count = last_post_count
+        self.listing_marker = listing_marker  # Marker read on the forum listings, stored once checked
+        self.performer_name = performer_name
+        self.scraper = None
+        self.pages = []
+        self.new_posts = []  # List of Post objects, newest first
+        self.error = None
+        self.cancel_requested = False  # Skip the job if its fetch has not started yet
+        self.cancelled = False
+        self.shared = False  # Another caller submitted the same thread while this job was in flight
+        self.submitted_at = datetime.utcnow()
+        self.finished_at = None
+        self._done = threading.Event()
+        self._finished = False
+        self._callbacks = []  # Called when the job completes, before its waiters are woken up
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def finish(self):
+        """Mark the job as completed (successfully or not)"""
+        self.pages = []
+        self.finished_at = datetime.utcnow()
+        with self._callbacks_lock:
+            self._finished = True
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Error in the completion callback of thread {self.thread_url}: {e}")
+        self._done.set()
+
+    def add_done_callback(self, callback: Callable[['CheckJob'], None]):
+        """Call a function when the job completes (right away if it already has)"""
+        with self._callbacks_lock:
+            if not self._finished:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the job to complete"""
+        return self._done.wait(timeout)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Return the new posts as dictionaries"""
+        return [post.to_dict() for post in self.new_posts]
+
+    def __repr__(self):
+        return f"<CheckJob(thread_id={self.thread_id}, done={self.done}, new_posts={len(self.new_posts)})>"
+
+class Stage:
+    """A pipeline stage: a bounded queue drained by a pool of worker threads"""
+
+    def __init__(self, name: str, handler: Callable[[CheckJob], bool], workers: int = 1, queue_size: int = 50,
+                 teardown: Optional[Callable[[], None]] = None):
+        """
+        Initialize the stage
+
+        Args:
+            name: Name of the stage (used in logs and stats)
+            handler: Function processing a job; returns True to forward it to the next stage
+            workers: Number of worker threads
+            queue_size: Maximum number of jobs waiting in the stage queue
+            teardown: Function called by the workers after each job (e.g. to release their database session)
+        """
+        self.name = name
+        self.handler = handler
+        self.teardown = teardown
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.next_stage = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Stats
+        self.started_at = None
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self.busy_seconds = 0.0
+
+    def put(self, job: CheckJob):
+        """Enqueue a job; blocks while the queue is full (backpressure)"""
+        self.queue.put(job)
+
+    def start(self):
+        """Start the worker threads"""
+        if self._threads:
+            return
+        self.started_at = time.monotonic()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop the worker threads once the queued jobs are processed"""
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is _STOP:
+                self.queue.task_done()
+                break
+
+            with self._lock:
+                self.busy += 1
+            started = time.monotonic()
+            forward = False
+            try:
+                forward = self.handler(job)
+            except Exception as e:
+                logger.error(f"Stage {self.name} failed for thread {job.thread_url}: {e}")
+                job.error = str(e)
+                with self._lock:
+                    self.failed += 1
+            finally:
+                if self.teardown:
+                    self.teardown()
+                with self._lock:
+                    self.busy -= 1
+                    self.processed += 1
+                    self.busy_seconds += time.monotonic() - started
+
+            if forward and self.next_stage:
+                self.next_stage.put(job)
+            else:
+                job.finish()
+            self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the queue depth, throughput and utilization of the stage"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "in_progress": self.busy,
+                "processed": self.processed,
+                "failed": self.failed,
+                "throughput_per_minute": round(self.processed / elapsed * 60, 2) if elapsed else 0.0,
+                "avg_seconds": round(self.busy_seconds / self.processed, 3) if self.processed else 0.0,
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0
+            }
+
+class CheckPipeline:
+    """Staged fetch → parse → extract → notify pipeline for thread checks"""
+
+    def __init__(self, db_service, notification_service, config, events=None):
+        """
+        Initialize the pipeline
+
+        Args:
+            db_service: Database service used to store the posts and the latest post IDs
+            notification_service: Notification service used to send the new posts
+            config: Configuration object holding the PIPELINE_* settings, CHECK_RESULT_CACHE_SECONDS
+                    and LISTING_MAX_SKIP_SECONDS
+            events: Event broker receiving the new_post and thread_checked events
+        """
+        self.db_service = db_service
+        self.notification_service = notification_service
+        self.events = events
+        self.result_cache_seconds = config.CHECK_RESULT_CACHE_SECONDS
+        # last_check of a thread without new posts is stored at this interval only, often
+        # enough for the change detection to check the threads absent from the listings
+        self.last_check_interval = config.LISTING_MAX_SKIP_SECONDS / 2
+        queue_size = config.PIPELINE_QUEUE_SIZE
+
+        self.stages = [
+            Stage('fetch', self.fetch, config.PIPELINE_FETCH_WORKERS, queue_size),
+            Stage('parse', self.parse, config.PIPELINE_PARSE_WORKERS, queue_size),
+            # Each extract worker writes with its own session, released after each job
+            Stage('extract', self.extract, config.PIPELINE_EXTRACT_WORKERS, queue_size,
+                  teardown=db_service.remove_session),
+            Stage('notify', self.notify, config.PIPELINE_NOTIFY_WORKERS, queue_size)
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+
+        self._start_lock = threading.Lock()
+        self.running = False
+
+        # Singleflight: job in progress and last completed job of each thread
+        self._jobs_lock = threading.Lock()
+        self._in_flight = {}  # thread_id -> CheckJob
+        self._recent = {}  # thread_id -> CheckJob, kept for result_cache_seconds
+
+    def start(self):
+        """Start all stages"""
+        with self._start_lock:
+            if not self.running:
+                for stage in self.stages:
+                    stage.start()
+                self.running = True
+                logger.info("Check pipeline started: " + ", ".join(
+                    f"{stage.name}={stage.workers}" for stage in self.stages))
+
+    def stop(self):
+        """Stop all stages, draining them in order"""
+        with self._start_lock:
+            if self.running:
+                for stage in self.stages:
+                    stage.stop()
+                self.running = False
+
+    def submit(self, job: CheckJob, use_cache: bool = False) -> CheckJob:
+        """
+        Submit a thread check to the pipeline; blocks while the fetch queue is full
+
+        If the thread is already being checked, the job is not submitted and the
+        in-flight job is returned instead: callers must wait on the returned job.
+
+        Args:
+            job: Job describing the thread to check
+            use_cache: Return the last job of the thread if it completed less than
+                       result_cache_seconds ago (manual checks)
+
+        Returns:
+            The job to wait for
+        """
+        with self._jobs_lock:
+            current = self._in_flight.get(job.thread_id)
+            if current is not None:
+                # The new caller wants the check even if an earlier caller cancelled it
+                current.shared = True
+                current.cancel_requested = False
+                logger.info(f"Thread {job.thread_url} is already being checked, sharing the running check")
+                return current
+            if use_cache and self.result_cache_seconds > 0:
+                recent = self._recent.get(job.thread_id)
+                if (recent and not recent.error and not recent.cancelled
+                        and (datetime.utcnow() - recent.finished_at).total_seconds() < self.result_cache_seconds):
+                    logger.info(f"Thread {job.thread_url} was checked at {recent.finished_at}, reusing the result")
+                    return recent
+            job.add_done_callback(self._job_finished)
+            self._in_flight[job.thread_id] = job
+
+        self.start()
+        self.stages[0].put(job)
+        return job
+
+    def _job_finished(self, job: CheckJob):
+        """Forget a completed job, so that the next check of its thread runs again, and publish it"""
+        with self._jobs_lock:
+            if self._in_flight.get(job.thread_id) is job:
+                del self._in_flight[job.thread_id]
+            if self.result_cache_seconds > 0:
+                self._recent[job.thread_id] = job
+                # Drop the expired results
+                for thread_id, recent in list(self._recent.items()):
+                    if (job.finished_at - recent.finished_at).total_seconds() >= self.result_cache_seconds:
+                        del self._recent[thread_id]
+
+        if self.events:
+            self.events.publish('thread_checked', {
+                "thread_id": job.thread_id,
+                "thread_url": job.thread_url,
+                "performer_name": job.performer_name,
+                "status": 'cancelled' if job.cancelled else 'failed' if job.error else 'completed',
+                "new_posts": len(job.new_posts),
+                "error": job.error
+            })
+
+    # Stage handlers
+
+    def fetch(self, job: CheckJob) -> bool:
+        """Download the pages that may hold new posts"""
+        if job.cancel_requested:
+            # Later stages are never skipped: the posts of a fetched thread are always stored and notified
+            job.cancelled = True
+            return False
+        logger.info(f"Checking thread: {job.thread_url}")
+        job.scraper = get_scraper(job.forum_type, job.thread_url, job.last_post_id, job.last_post_count)
+        job.pages = job.scraper.fetch_pages()
+        return bool(job.pages)
+
+    def parse(self, job: CheckJob) -> bool:
+        """Build the documents of the fetched pages"""
+        for page in job.pages:
+            job.scraper.parse_page(page)
+        return True
+
+    def extract(self, job: CheckJob) -> bool:
+        """Extract the posts, keep the new ones and store the latest post ID"""
+        for page in job.pages:
+            job.scraper.extract_page(page)
+
+        new_posts = job.scraper.collect_new_posts(job.pages)
+
+        # The thread may have moved on since the job was built (e.g. by a check that completed
+        # just before): drop the posts that check already stored. Compared by post ID, since
+        # the post counts shift when posts are deleted on the forum
+        thread = self.db_service.get_thread(job.thread_id)
+        if new_posts and thread and thread.last_post_id != job.last_post_id:
+            stored = self.db_service.get_stored_post_ids(job.thread_id, [post.post_id for post in new_posts])
+            new_posts = [post for post in new_posts if post.post_id not in stored]
+
+        if not new_posts:
+            logger.info(f"No new posts found for thread {job.thread_url}")
+            # Every write invalidates the cached API responses: nothing is written when
+            # nothing changed, except a last_check gone stale
+            if thread and ((job.listing_marker is not None and job.listing_marker != thread.listing_marker)
+                           or not thread.last_check
+                           or (datetime.utcnow() - thread.last_check).total_seconds() >= self.last_check_interval):
+                self.db_service.update_thread(job.thread_id, listing_marker=job.listing_marker)
+            return False
+
+        logger.info(f"Found {len(new_posts)} new posts for thread {job.thread_url}")
+        job.scraper.add_video_qualities(new_posts)
+        job.new_posts = new_posts
+
+        # Store the posts, then move the thread to the latest post ID and post count
+        stored, _, error = self.db_service.upsert_posts(job.thread_id, new_posts)
+        if not stored:
+            logger.error(f"Failed to store the posts of thread {job.thread_id}: {error}")
+        success, _, error = self.db_service.update_thread(
+            job.thread_id,
+            last_post_id=new_posts[0].post_id,
+            last_post_count=new_posts[0].post_count,
+            listing_marker=job.listing_marker
+        )
+        if not success:
+            logger.error(f"Failed to update thread {job.thread_id}: {error}")
+
+        for post in new_posts:
+            if post.download_links:
+                logger.info(f"Post {post.post_id} has {len(post.download_links)} download links")
+        return True
+
+    def notify(self, job: CheckJob) -> bool:
+        """Send the notifications for the new posts"""
+        posts = job.results()
+        if self.events:
+            for post in reversed(posts):
+                self.events.publish('new_post', {
+                    "thread_id": job.thread_id,
+                    "thread_url": job.thread_url,
+                    "performer_name": job.performer_name,
+                    "post": post
+                })
+        self.notification_service.notify_new_posts(
+            performer_name=job.performer_name,
+            thread_url=job.thread_url,
+            posts=posts
+        )
+        logger.info(f"Notification sent for {len(job.new_posts)} new posts from {job.performer_name}")
+        return False
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the stats of every stage"""
+        return [stage.stats() for stage in self.stages]
+
+    def log_stats(self):
+        """Log the stats of every stage"""
+        for stats in self.stats():
+            logger.info(
+                f"Stage {stats['name']}: depth={stats['queue_depth']}/{stats['queue_size']}, "
+                f"processed={stats['processed']}, failed={stats['failed']}, "
+                f"{stats['throughput_per_minute']}/min, avg={stats['avg_seconds']}s, "
+                f"utilization={stats['utilization']:.0%}"
+            )
@@ -0,0 +1,120 @@
+"""
+Cache des réponses des routes de lecture de l'API.
+
+Les réponses sont identifiées par leur URL et la version des données
+(`DatabaseService.data_version`, qui change à chaque écriture) : une entrée n'est
+jamais invalidée explicitement, elle cesse simplement d'être demandée après une
+écriture et sort du cache LRU. Le même couple sert d'ETag, ce qui permet de
+répondre `304 Not Modified` sans lire la base ni encoder de JSON. Les versions
+compressées d'un corps sont gardées avec lui : chaque encodage n'est calculé
+qu'une fois par entrée.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .compression import compress
+
+class CachedBody:
+    """A cached response body with its compressed representations"""
+
+    def __init__(self, key: Tuple[str, str], body: bytes):
+        self.key = key
+        self.body = body
+        self.compressed: Dict[str, bytes] = {}  # encoding -> compressed body
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.compressed.values())
+
+class ResponseCache:
+    """In-process LRU cache of serialized response bodies"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of bodies kept (0 disables the storage, ETags still work)
+            max_bytes: Maximum total size of the bodies kept
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (path, version) -> CachedBody
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(path: str, version: str) -> str:
+        """Strong ETag of the response of a path at a data version"""
+        return hashlib.sha1(f"{version} {path}".encode('utf-8')).hexdigest()
+
+    def get(self, path: str, version: str) -> Optional[CachedBody]:
+        """Get a cached body, None if it is not cached"""
+        with self._lock:
+            entry = self.entries.get((path, version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((path, version))
+            self.hits += 1
+            return entry
+
+    def put(self, path: str, version: str, body: bytes) -> CachedBody:
+        """
+        Store a body, evicting the least recently used ones if the cache is full
+
+        Returns:
+            The entry of the body (not kept when the cache is disabled or the body too large)
+        """
+        entry = CachedBody((path, version), body)
+        if not self.max_entries or len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if entry.key in self.entries:
+                self.size -= self.entries.pop(entry.key).size
+            self.entries[entry.key] = entry
+            self.size += entry.size
+            self._evict()
+        return entry
+
+    def encoded(self, entry: CachedBody, encoding: str, level: int = 6) -> bytes:
+        """Body of an entry compressed with an encoding, computed on the first request only"""
+        data = entry.compressed.get(encoding)
+        if data is not None:
+            return data
+        data = compress(entry.body, encoding, level)
+        with self._lock:
+            if encoding not in entry.compressed:
+                entry.compressed[encoding] = data
+                # The entry may have been evicted meanwhile
+                if self.entries.get(entry.key) is entry:
+                    self.size += len(data)
+                    self._evict()
+        return data
+
+    def _evict(self):
+        """Remove the least recently used bodies until the cache fits its limits (lock held)"""
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def clear(self):
+        """Remove every cached body"""
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -1,13 +1,19 @@
 from datetime import datetime
 import logging
+import threading
 from typing import List, Dict, Any, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
-from .models import Performer, Thread
+from .models import Thread
 from .services import get_db_service
 from .services.notification import get_notification_service
-from .scrapers import get_scraper
+from .config import get_config
+from .pipeline import CheckPipeline, CheckJob
+from .backfill import BackfillService
+from .jobs import CheckRunRegistry
+from .events import get_event_broker, ProgressTracker
+from .change_detection import ChangeDetector
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +33,16 @@ class SchedulerService:
         self.check_interval_seconds = check_interval_seconds
         self.db_service = get_db_service()
         self.notification_service = get_notification_service()
+        config = get_config()
+        self.events = get_event_broker()
+        self.pipeline = CheckPipeline(self.db_service, self.notification_service, config, events=self.events)
+        self.backfill_service = BackfillService(self.db_service, self.notification_service,
+                                                batch_size=config.BACKFILL_BATCH_SIZE,
+                                                max_workers=config.BACKFILL_MAX_WORKERS)
+        self.check_runs = CheckRunRegistry(self.pipeline, self.db_service, ttl_seconds=config.CHECK_JOB_TTL_SECONDS,
+                                           events=self.events)
+        self.change_detector = ChangeDetector({'planetsuzy': config.PLANETSUZY_LISTING_URLS},
+                                              max_skip_seconds=config.LISTING_MAX_SKIP_SECONDS)
     
     def start(self):
         """Start the scheduler"""
@@ -57,22 +73,47 @@ class SchedulerService:
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
+        self.pipeline.stop()
     
     def check_all_threads(self):
         """Check all threads of active performers for new posts"""
         logger.info("Starting check for all threads")
         
-        # Get all active performers
-        performers = self.db_service.get_active_performers()
+        # Read the forum listings to only check the threads that changed
+        entries = None
+        if self.change_detector.enabled:
+            try:
+                entries = self.change_detector.scan()
+            except Exception as e:
+                logger.error(f"Change detection failed, checking all threads: {e}")
         
-        for performer in performers:
-            logger.info(f"Checking threads for performer: {performer.name}")
+        jobs = []
+        try:
+            # Threads of all active performers, with their performer, in one query
+            threads = self.db_service.get_active_threads()
+            logger.info(f"Checking {len(threads)} threads of "
+                        f"{len({thread.performer_id for thread in threads})} active performers")
             
-            # Get all threads for this performer
-            threads = self.db_service.get_threads_by_performer(performer.id)
+            if entries is not None:
+                selected = self.change_detector.select_threads(threads, entries)
+            else:
+                selected = [(thread, None) for thread in threads]
             
-            for thread in threads:
-                self.check_thread(thread)
+            for thread, listing_marker in selected:
+                jobs.append(self.make_job(thread, listing_marker=listing_marker))
+        finally:
+            # The scheduler thread releases its session before waiting for the pipeline
+            self.db_service.remove_session()
+        
+        # A thread already being checked (e.g. manually) is shared with the running check
+        tracker = ProgressTracker(self.events, 'scheduler', len(jobs))
+        jobs = [self.pipeline.submit(job) for job in jobs]
+        for job in jobs:
+            job.add_done_callback(tracker.job_done)
+        for job in jobs:
+            job.wait()
+        tracker.finish()
+        self.pipeline.log_stats()
 
     def cleanup_expired_callbacks(self):
         """Clean up expired callback data from the database"""
@@ -91,6 +132,13 @@ class SchedulerService:
                 logger.info(f"Cleaned up {deleted} expired callback records")
         except Exception as e:
             logger.error(f"Error in cleanup_expired_callbacks: {e}")
+        finally:
+            self.db_service.remove_session()
+    
+    def make_job(self, thread: Thread, listing_marker: Optional[str] = None) -> CheckJob:
+        """Build a pipeline job from a thread, in the thread owning its session"""
+        return CheckJob(thread.id, thread.url, thread.forum_type, thread.last_post_id, thread.performer.name,
+                        last_post_count=thread.last_post_count, listing_marker=listing_marker)
     
     def check_thread(self, thread: Thread) -> List[Dict[str, Any]]:
         """
@@ -102,62 +150,61 @@ class SchedulerService:
         Returns:
             List of new posts as dictionaries
         """
-        logger.info(f"Checking thread: {thread.url}")
+        job = self.pipeline.submit(self.make_job(thread))
+        job.wait()
+        return job.results()
+
+    def make_check_jobs(self, thread_id=None, performer_id=None) -> List[CheckJob]:
+        """
+        Build the pipeline jobs of a thread, of the threads of a performer or of all active threads
         
-        try:
-            # Get the appropriate scraper
-            scraper = get_scraper(thread.forum_type, thread.url, thread.last_post_id)
-            
-            # Check for new posts
-            new_posts = scraper.check_for_new_posts()
-            
-            if new_posts:
-                logger.info(f"Found {len(new_posts)} new posts for thread {thread.url}")
-                
-                # Update the thread with the latest post ID
-                latest_post_id = new_posts[0].post_id if new_posts else None
-                if latest_post_id:
-                    success, updated_thread, error = self.db_service.update_thread(
-                        thread.id, 
-                        last_post_id=latest_post_id
-                    )
-                    if not success:
-                        logger.error(f"Failed to update thread {thread.id}: {error}")
-                
-                # Convert posts to dictionaries for return
-                post_dicts = [post.to_dict() for post in new_posts]
-                
-                # For now, just log the download links
-                for post in new_posts:
-                    if post.download_links:
-                        logger.info(f"Post {post.post_id} has {len(post.download_links)} download links:")
-                        for link in post.download_links:
-                            logger.info(f"  - {link}")
-                
-                # Send notification if there are new posts
-                # Get performer name for notification
-                performer = self.db_service.get_performer(thread.performer_id)
-                if performer and post_dicts:
-                    # Send notification
-                    self.notification_service.notify_new_posts(
-                        performer_name=performer.name,
-                        thread_url=thread.url,
-                        posts=post_dicts
-                    )
-                    logger.info(f"Notification sent for {len(post_dicts)} new posts from {performer.name}")
-                
-                return post_dicts
-            else:
-                logger.info(f"No new posts found for thread {thread.url}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error checking thread {thread.url}: {e}")
-            return []
+        Args:
+            thread_id: Optional ID of thread to check
+            performer_id: Optional ID of performer to check all threads for
+        
+        Returns:
+            List of jobs, not submitted yet
+        """
+        # Threads are loaded with their performer, in one query
+        if thread_id:
+            # Check specific thread
+            threads = self.db_service.get_threads_with_performer(thread_id=thread_id)
+            if not threads:
+                logger.error(f"Thread with ID {thread_id} not found")
+        elif performer_id:
+            # Check all threads of a performer
+            threads = self.db_service.get_threads_with_performer(performer_id=performer_id)
+            if not threads and not self.db_service.get_performer(performer_id):
+                logger.error(f"Performer with ID {performer_id} not found")
+        else:
+            # Check all threads of all active performers
+            threads = self.db_service.get_active_threads()
+        return [self.make_job(thread) for thread in threads]
+    
+    def start_check(self, thread_id=None, performer_id=None, listener=None):
+        """
+        Start a check of a thread, of the threads of a performer or of all active threads in the background
+        
+        Args:
+            thread_id: Optional ID of thread to check
+            performer_id: Optional ID of performer to check all threads for
+            listener: Optional function called with each completed thread job, then with None
+        
+        Returns:
+            The CheckRun, to be polled through the check registry
+        """
+        if thread_id:
+            scope, target_id = 'thread', thread_id
+        elif performer_id:
+            scope, target_id = 'performer', performer_id
+        else:
+            scope, target_id = 'all', None
+        return self.check_runs.start(scope, lambda: self.make_check_jobs(thread_id, performer_id), target_id,
+                                     listener=listener)
 
     def run_single_check(self, thread_id=None, performer_id=None):
         """
-        Run a single check for a specific thread or all threads of a performer
+        Run a single check for a specific thread or all threads of a performer, waiting for the results
         
         Args:
             thread_id: Optional ID of thread to check
@@ -169,37 +216,25 @@ class SchedulerService:
         all_new_posts = []
         
         try:
-            if thread_id:
-                # Check specific thread
-                thread = self.db_service.get_thread(thread_id)
-                if thread:
-                    new_posts = self.check_thread(thread)
-                    all_new_posts.extend(new_posts)
-                else:
-                    logger.error(f"Thread with ID {thread_id} not found")
-            elif performer_id:
-                # Check all threads of a performer
-                performer = self.db_service.get_performer(performer_id)
-                if performer:
-                    threads = self.db_service.get_threads_by_performer(performer_id)
-                    for thread in threads:
-                        new_posts = self.check_thread(thread)
-                        all_new_posts.extend(new_posts)
-                else:
-                    logger.error(f"Performer with ID {performer_id} not found")
-            else:
-                # Check all threads of all active performers
-                performers = self.db_service.get_active_performers()
-                for performer in performers:
-                    threads = self.db_service.get_threads_by_performer(performer.id)
-                    for thread in threads:
-                        thread_posts = self.check_thread(thread)
-                        all_new_posts.extend(thread_posts)
-                        # Log the posts we're adding
-                        logger.info(f"Thread {thread.id} returned {len(thread_posts)} posts. Total now: {len(all_new_posts)}")
+            jobs = [self.pipeline.submit(job) for job in self.make_check_jobs(thread_id, performer_id)]
+            for job in jobs:
+                job.wait()
+                thread_posts = job.results()
+                all_new_posts.extend(thread_posts)
+                logger.info(f"Thread {job.thread_id} returned {len(thread_posts)} posts. Total now: {len(all_new_posts)}")
                 
             logger.info(f"Found a total of {len(all_new_posts)} new posts")
             return all_new_posts
         except Exception as e:
             logger.error(f"Error in run_single_check: {e}")
-            return []
\ No newline at end of file
+            return []
+
+# Singleton instance
+_scheduler_service = None
+
+def get_scheduler_service() -> SchedulerService:
+    """Get the scheduler service instance shared by the API and the background jobs"""
+    global _scheduler_service
+    if _scheduler_service is None:
+        _scheduler_service = SchedulerService()
+    return _scheduler_service
@@ -1,8 +1,8 @@
-from .base import BaseScraper, Post
+from .base import BaseScraper, Post, Page, ListingEntry
 from .planetsuzy import PlanetSuzyScraper
 
 # Factory pattern to get appropriate scraper based on forum type
-def get_scraper(forum_type: str, thread_url: str, last_post_id=None) -> BaseScraper:
+def get_scraper(forum_type: str, thread_url: str, last_post_id=None, last_post_count=None) -> BaseScraper:
     """
     Returns the appropriate scraper based on the forum type
     
@@ -10,6 +10,7 @@ def get_scraper(forum_type: str, thread_url: str, last_post_id=None) -> BaseScra
         forum_type: Type of forum (e.g., 'planetsuzy')
         thread_url: URL of the thread to scrape
         last_post_id: ID of the last seen post
+        last_post_count: Post count (position in the thread) of the last seen post
         
     Returns:
         An instance of a BaseScraper subclass
@@ -18,7 +19,7 @@ def get_scraper(forum_type: str, thread_url: str, last_post_id=None) -> BaseScra
         ValueError: If forum_type is not supported
     """
     if forum_type == 'planetsuzy':
-        return PlanetSuzyScraper(thread_url, last_post_id)
+        return PlanetSuzyScraper(thread_url, last_post_id, last_post_count)
     else:
         raise ValueError(f"Unsupported forum type: {forum_type}")
 
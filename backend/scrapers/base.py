@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import codecs
 import requests
 import re
 from bs4 import BeautifulSoup
@@ -7,6 +8,7 @@ from datetime import datetime
 from collections import defaultdict
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 
 from ..config import get_config
@@ -36,8 +38,9 @@ class VideoQuality:
 class Post:
     """Represents a forum post"""
     def __init__(self, post_id: str, date: datetime, author: str, content: str, 
-                 download_links: List[str], images: List[str]):
+                 download_links: List[str], images: List[str], post_count: Optional[int] = None):
         self.post_id = post_id
+        self.post_count = post_count  # Position of the post in the thread (1 = first post)
         self.date = date
         self.author = author
         self.content = content
@@ -48,6 +51,7 @@ class Post:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "post_id": self.post_id,
+            "post_count": self.post_count,
             "date": self.date.isoformat() if self.date else None,
             "author": self.author,
             "content": self.content,
@@ -59,12 +63,39 @@ class Post:
     def __str__(self) -> str:
         return f"Post(id={self.post_id}, author={self.author}, links={len(self.download_links)})"
 
+class ListingEntry:
+    """Represents a thread row of a forum listing page (forum display, new posts search)"""
+    def __init__(self, thread_key: str, replies: Optional[int], last_post_id: Optional[str]):
+        self.thread_key = thread_key      # Forum-side thread ID (e.g. 894033)
+        self.replies = replies
+        self.last_post_id = last_post_id
+    
+    @property
+    def marker(self) -> str:
+        """Marker changing whenever a post is added to the thread"""
+        return f"{self.replies}:{self.last_post_id}"
+    
+    def __str__(self) -> str:
+        return f"ListingEntry(thread={self.thread_key}, marker={self.marker})"
+
+class Page:
+    """Represents a fetched thread page as it moves through the check pipeline"""
+    def __init__(self, url: str, html: Optional[str] = None):
+        self.url = url
+        self.html = html      # Raw HTML (fetch stage)
+        self.soup = None      # Parsed document (parse stage)
+        self.posts = None     # Extracted posts, newest first (extract stage)
+    
+    def __str__(self) -> str:
+        return f"Page(url={self.url}, posts={len(self.posts) if self.posts is not None else '?'})"
+
 class BaseScraper(ABC):
     """Base class for all forum scrapers"""
     
-    def __init__(self, thread_url: str, last_post_id: Optional[str] = None):
+    def __init__(self, thread_url: str, last_post_id: Optional[str] = None, last_post_count: Optional[int] = None):
         self.thread_url = thread_url
         self.last_post_id = last_post_id
+        self.last_post_count = last_post_count
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -341,6 +372,36 @@ class BaseScraper(ABC):
         except requests.RequestException as e:
             raise Exception(f"Error fetching page content: {e}")
     
+    def stream_page_content(self, url: str, chunk_size: int = 16384) -> Iterator[str]:
+        """
+        Fetch the HTML content of a page chunk by chunk, as it downloads
+        
+        Stopping the iteration closes the connection, the rest of the page is not downloaded.
+        """
+        try:
+            response = requests.get(url, headers=self.headers, timeout=30, stream=True)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise Exception(f"Error fetching page content: {e}")
+        
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+        except requests.RequestException as e:
+            raise Exception(f"Error fetching page content: {e}")
+        finally:
+            response.close()
+    
+    def fetch_page(self, url: str) -> Page:
+        """Fetch a page of the thread"""
+        return Page(url, self.get_page_content(url))
+    
     def parse_html(self, html: str) -> BeautifulSoup:
         """Parse HTML content using BeautifulSoup"""
         return BeautifulSoup(html, 'html.parser')
@@ -351,8 +412,8 @@ class BaseScraper(ABC):
         pass
     
     @abstractmethod
-    def extract_posts(self, soup: BeautifulSoup) -> List[Post]:
-        """Extract posts from the page"""
+    def extract_posts(self, soup: BeautifulSoup, with_qualities: bool = True) -> List[Post]:
+        """Extract posts from the page, newest first"""
         pass
     
     @abstractmethod
@@ -360,66 +421,177 @@ class BaseScraper(ABC):
         """Get URL for the next page, if any"""
         pass
     
-    def check_for_new_posts(self) -> List[Post]:
-        """Check for new posts since last_post_id"""
-        all_new_posts = []
-        current_url = self.thread_url
+    @abstractmethod
+    def get_last_page_number(self, soup: BeautifulSoup) -> int:
+        """Find the number of the last page of the thread"""
+        pass
+    
+    @abstractmethod
+    def build_page_url(self, url: str, page: int) -> str:
+        """Build the URL of the given page of the thread"""
+        pass
+    
+    # Nombre maximum de pages parcourues pour rattraper un thread en retard
+    max_catchup_pages = 50
+    # Nombre de pages téléchargées en parallèle
+    max_parallel_pages = 4
+    
+    def get_thread_key(self, url: str) -> Optional[str]:
+        """Return the forum-side ID of a thread from its URL, None if unknown"""
+        return None
+    
+    def parse_listing(self, html: str) -> List[ListingEntry]:
+        """Read the thread rows of a forum listing page"""
+        return []
+    
+    def get_first_page_url(self) -> str:
+        """Return the URL of the first page of the thread"""
+        return self.thread_url
+    
+    def fetch_first_page(self) -> Page:
+        """Fetch the first page of the thread"""
+        return self.fetch_page(self.get_first_page_url())
+    
+    def fetch_pages_parallel(self, url: str, page_numbers: List[int]) -> List[Page]:
+        """Fetch the given pages of the thread concurrently, keeping their order"""
+        if not page_numbers:
+            return []
+        urls = [self.build_page_url(url, page_number) for page_number in page_numbers]
+        logging.info(f"Fetching {len(urls)} pages of {self.thread_url} in parallel")
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.max_parallel_pages)) as executor:
+            return list(executor.map(self.fetch_page, urls))
+    
+    def page_contains_post(self, html: str, post_id: str) -> bool:
+        """Check whether the raw HTML of a page contains the given post"""
+        soup = self.parse_html(html)
+        return any(post.post_id == post_id for post in self.extract_posts(soup, with_qualities=False))
+    
+    def fetch_pages(self) -> List[Page]:
+        """
+        Fetch every page that may hold posts newer than last_post_id (fetch stage)
+        
+        Returns:
+            List of pages, newest page first
+        """
+        pages = []
         
         # Get first page (or last page for forum with newest posts at the end)
-        html_content = self.get_page_content(current_url)
+        first_page = self.fetch_first_page()
+        current_url, html_content = first_page.url, first_page.html
         soup = self.parse_html(html_content)
         
         # Get next URL (for PlanetSuzy, this will be the last page if it's first access)
-        next_url = self.get_next_page_url(soup,current_url)
-
-        # Si on trouve le next url on le parse pour pouvoir l'analyser les posts
+        next_url = self.get_next_page_url(soup, current_url)
+        
+        # Si on trouve le next url on le récupère pour pouvoir analyser ses posts
         if next_url:
             current_url = next_url
             html_content = self.get_page_content(current_url)
-            soup = self.parse_html(html_content)
         
-        # Start checking pages
-        while current_url:
-            posts = self.extract_posts(soup)
+        visited = set()
+        while current_url and current_url not in visited:
+            visited.add(current_url)
+            pages.append(Page(current_url, html_content))
             
-            # Filter posts newer than last_post_id
-            if self.last_post_id:
-                #print(f"--------------Last post ID------------------: {self.last_post_id}")
-                # Find posts newer than the last seen post
-                new_posts = []
-                for post in posts:
-                    #print(f"--------------Post ID------------------: {post.post_id}")
-                    if post.post_id == self.last_post_id:
-                        # Found the last seen post, stop here
-                        break
-                    elif post.post_id > self.last_post_id:
-                        # This post is newer, add it to the list
-                        print(f"Post ID:{post.post_id} is NEWER than Last post ID: {self.last_post_id}")
-                        new_posts.append(post)
-                    else:
-                        # This post is older, skip it
-                        print(f"Post ID:{post.post_id} is OLDER than Last post ID: {self.last_post_id}")
-                        continue
-                
-                # Add the new posts
-                all_new_posts.extend(new_posts)
-                
-                # If we found the last seen post on this page, stop looking
-                if any(post.post_id == self.last_post_id for post in posts):
-                    break
-            else:
+            # Without last_post_id only the latest post matters; otherwise stop
+            # as soon as the page holding the last seen post has been fetched
+            if not self.last_post_id or self.page_contains_post(html_content, self.last_post_id):
+                break
+            if len(pages) >= self.max_catchup_pages:
+                logging.warning(f"Stopped catching up {self.thread_url} after {len(pages)} pages")
+                break
+            
+            # Get previous/next page URL
+            current_url = self.get_next_page_url(self.parse_html(html_content), current_url)
+            if current_url and current_url not in visited:
+                html_content = self.get_page_content(current_url)
+        
+        return pages
+    
+    def parse_page(self, page: Page) -> None:
+        """Build the document of a fetched page (parse stage)"""
+        if page.soup is None and page.posts is None:
+            page.soup = self.parse_html(page.html)
+            page.html = None
+    
+    def extract_page(self, page: Page) -> List[Post]:
+        """Extract the posts of a page without video quality analysis (extract stage)"""
+        if page.posts is None:
+            self.parse_page(page)
+        if page.posts is None:
+            page.posts = self.extract_posts(page.soup, with_qualities=False)
+            page.soup = None
+        return page.posts
+    
+    def is_newer(self, post: Post) -> bool:
+        """
+        Check whether a post is newer than the last seen post, when the last seen
+        post is not on the fetched pages
+        """
+        if self.last_post_count is not None and post.post_count is not None:
+            return post.post_count > self.last_post_count
+        if post.post_id.isdigit() and self.last_post_id.isdigit():
+            return int(post.post_id) > int(self.last_post_id)
+        return post.post_id > self.last_post_id
+    
+    def collect_new_posts(self, pages: List[Page]) -> List[Post]:
+        """
+        Select the posts newer than the last seen post
+        
+        When the last seen post is on the pages, the new posts are the ones above it:
+        its stored post count is too high once older posts were deleted on the forum,
+        so the counts are only compared (is_newer) when it is not found.
+        
+        Args:
+            pages: Extracted pages, newest page first
+            
+        Returns:
+            List of new posts, newest first
+        """
+        all_new_posts = []
+        seen = set()
+        anchor_found = bool(self.last_post_id) and any(
+            post.post_id == self.last_post_id for page in pages for post in page.posts or [])
+        
+        for page in pages:
+            posts = page.posts or []
+            
+            if not self.last_post_id:
                 # No last_post_id, get only the latest post
                 if posts:
                     all_new_posts.append(posts[0])
                 break
             
-            # Get previous/next page URL
-            next_page_url = self.get_next_page_url(soup,current_url)
-            if not next_page_url:
-                break
+            # Find posts newer than the last seen post
+            reached_last_seen = False
+            for post in posts:
+                if post.post_id == self.last_post_id or (not anchor_found and not self.is_newer(post)):
+                    # Found the last seen post (or an older one), stop here
+                    reached_last_seen = True
+                    break
+                if post.post_id not in seen:
+                    logging.debug(f"Post ID:{post.post_id} is NEWER than Last post ID: {self.last_post_id}")
+                    seen.add(post.post_id)
+                    all_new_posts.append(post)
             
-            current_url = next_page_url
-            html_content = self.get_page_content(current_url)
-            soup = self.parse_html(html_content)
+            # If we found the last seen post on this page, stop looking
+            if reached_last_seen:
+                break
+        
+        return all_new_posts
+    
+    def add_video_qualities(self, posts: List[Post]) -> None:
+        """Group the download links of the given posts by video quality"""
+        for post in posts:
+            if post.download_links and not post.video_qualities:
+                post.video_qualities = self.extract_video_qualities(post.content, post.download_links)
+    
+    def check_for_new_posts(self) -> List[Post]:
+        """Check for new posts since last_post_id"""
+        pages = self.fetch_pages()
+        for page in pages:
+            self.extract_page(page)
         
-        return all_new_posts
\ No newline at end of file
+        new_posts = self.collect_new_posts(pages)
+        self.add_video_qualities(new_posts)
+        return new_posts
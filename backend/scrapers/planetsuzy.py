@@ -5,22 +5,276 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, parse_qs
 import logging
 
-from .base import BaseScraper, Post
+from .base import BaseScraper, Post, Page, ListingEntry
+from .post_tokenizer import PostTokenizer, RawPost, tokenize_posts
+from ..config import get_config
 from datetime import timedelta
 
+# Start of a post table: <table class="tborder" id="post123" ...>
+POST_TABLE_PATTERN = re.compile(r'<table\b[^>]*\bid="post(\d+)"')
+# Post count anchor of a post: <a ... id="postcount123" name="541">
+POST_COUNT_PATTERN = re.compile(r'id="postcount\d+"[^>]*?\bname="(\d+)"')
+# Thread ID in a thread URL: t894033-slug.html or showthread.php?t=894033
+THREAD_KEY_PATTERN = re.compile(r'(?:/t(\d+)(?:-|\.html)|[?&]t=(\d+))')
+# Listing rows: <a href="t894033-slug.html" id="thread_title_894033">
+THREAD_TITLE_PATTERN = re.compile(r'id="thread_title_(\d+)"')
+REPLIES_PATTERNS = [
+    re.compile(r'title="Replies:\s*([\d,.]+)'),
+    re.compile(r'whoposted[^"]*"[^>]*>([\d,.]+)<')
+]
+LAST_POST_PATTERN = re.compile(r'#post(\d+)"')
+# Page number of a thread URL: t894033-p12-slug.html or showthread.php?t=894033&page=12
+PAGE_NUMBER_PATTERN = re.compile(r'-p(\d+)-|[?&]page=(\d+)')
+
 class PlanetSuzyScraper(BaseScraper):
     """Scraper for PlanetSuzy forums"""
     
+    # Page variants:
+    # - default: the search-engine friendly pages t894033-p12-slug.html
+    # - showthread: showthread.php?t=894033&page=12&pp=40, more posts per page so
+    #   fewer pages to download for the same posts, same markup as the default pages
+    PAGE_VARIANTS = ('default', 'showthread')
+    # Variants that failed during this run, shared by all scrapers
+    _unavailable_variants = set()
+    
+    def __init__(self, thread_url: str, last_post_id: Optional[str] = None, last_post_count: Optional[int] = None):
+        super().__init__(thread_url, last_post_id, last_post_count)
+        config = get_config()
+        self.posts_per_page = config.PLANETSUZY_POSTS_PER_PAGE  # 0 = deduced from the last page
+        self.max_posts_per_page = config.PLANETSUZY_MAX_POSTS_PER_PAGE
+        self.max_parallel_pages = max(1, config.PLANETSUZY_MAX_PARALLEL_PAGES)
+        self.fast_extractor = config.PLANETSUZY_FAST_EXTRACTOR  # DOM-free extraction of the posts
+        self.streaming = config.PLANETSUZY_STREAMING  # Posts extracted while the pages download
+        self.page_variant = 'default'
+        variant = config.PLANETSUZY_PAGE_VARIANT
+        if variant not in self.PAGE_VARIANTS:
+            logging.warning(f"Unknown PlanetSuzy page variant '{variant}', using the default pages")
+        elif variant not in self._unavailable_variants:
+            self.use_page_variant(variant)
+    
+    def use_page_variant(self, variant: str):
+        """Switch the scraper to the given page variant"""
+        self.page_variant = variant
+        if variant == 'showthread':
+            # The forum may cap the pp parameter, the page size is deduced from the pages
+            self.posts_per_page = 0
+        else:
+            self.posts_per_page = get_config().PLANETSUZY_POSTS_PER_PAGE
+    
     def get_forum_type(self) -> str:
         return 'planetsuzy'
     
-    def extract_posts(self, soup: BeautifulSoup) -> List[Post]:
+    def page_contains_post(self, html: str, post_id: str) -> bool:
+        """Look for the post anchor in the raw HTML, without building a DOM"""
+        return f'id="post{post_id}"' in html
+    
+    def slice_new_posts(self, html: str) -> Optional[str]:
+        """
+        Cut out of the raw HTML the post tables from the last seen post on,
+        so that only the new posts are parsed
+        
+        Posts are in chronological order in the page: the posts after the anchor
+        of last_post_id are newer, whatever their post count (the stored count is
+        too high once older posts were deleted on the forum). The anchor is kept
+        so that collect_new_posts still finds it. Without a watermark only the
+        latest post is kept.
+        
+        Returns:
+            The HTML of the last seen post and the newer posts, or None when the
+            last seen post is not on the page and the whole page must be parsed
+            (collect_new_posts then decides with the other pages)
+        """
+        starts = [(match.start(), match.group(1)) for match in POST_TABLE_PATTERN.finditer(html)]
+        if not starts:
+            return None
+        
+        post_ids = [post_id for _, post_id in starts]
+        if not self.last_post_id:
+            first_new = len(starts) - 1
+        elif self.last_post_id in post_ids:
+            first_new = post_ids.index(self.last_post_id)
+        else:
+            # The page is newer than the page of the last seen post, or the last
+            # seen post was deleted: the counts alone cannot tell the new posts
+            return None
+        return html[starts[first_new][0]:]
+    
+    def parse_page(self, page: Page) -> None:
+        """Build the document of the posts from the last seen post on only, or of the whole page"""
+        if page.soup is None and page.posts is None and page.html is not None:
+            fragment = self.slice_new_posts(page.html)
+            if fragment is not None:
+                logging.debug(f"Parsing {len(fragment)}/{len(page.html)} bytes of {page.url}")
+                page.html = fragment
+            if self.fast_extractor:
+                # The posts are read from the HTML by extract_page
+                return
+            page.soup = self.parse_html(page.html)
+            page.html = None
+            return
+        super().parse_page(page)
+    
+    def extract_page(self, page: Page) -> List[Post]:
+        """Extract the posts of a page, without a DOM when the fast extractor is enabled"""
+        if page.posts is None and self.fast_extractor:
+            self.parse_page(page)
+            if page.posts is None and page.html is not None:
+                page.posts = self.extract_posts_fast(page.html, with_qualities=False)
+                if page.posts is None:
+                    page.soup = self.parse_html(page.html)
+                page.html = None
+        return super().extract_page(page)
+    
+    def parse_post_date(self, date_text: str) -> Optional[datetime]:
+        """Parse the date of a post header"""
+        # Parse date from format like "23rd March 2023, 09:14"
+        date = None
+        date_match = re.search(r'(\d+)(?:st|nd|rd|th)\s+([A-Za-z]+)\s+(\d{4}),\s+(\d{2}):(\d{2})', date_text)
+        if date_match:
+            day, month, year, hour, minute = date_match.groups()
+            month_map = {
+                'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+                'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
+            }
+            month_num = month_map.get(month, 1)  # Default to January if month not found
+            try:
+                date = datetime(int(year), month_num, int(day), int(hour), int(minute))
+            except ValueError:
+                # Handle invalid dates (e.g., February 30)
+                pass
+        # Case 2: "Today, HH:MM" format
+        elif "Today," in date_text:
+            today_match = re.search(r'Today,\s+(\d{2}):(\d{2})', date_text)
+            if today_match:
+                hour, minute = today_match.groups()
+                # Get today's date and combine with the parsed time
+                date = datetime.now().replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
+        # Case 3: "Yesterday"
+        elif "Yesterday," in date_text:
+            yesterday_match = re.search(r'Yesterday,\s+(\d{2}):(\d{2})', date_text)
+            if yesterday_match:
+                hour, minute = yesterday_match.groups()
+                # Get yesterday's date and combine with the parsed time
+                date = datetime.now().replace(hour=int(hour), minute=int(minute), second=0, microsecond=0) - timedelta(days=1)
+        return date
+    
+    def check_raw_posts(self, tokenizer: PostTokenizer, html: Optional[str] = None) -> List[str]:
+        """
+        Structural sanity checks of the posts read by the tokenizer
+        
+        Returns:
+            The problems found, empty when the posts can be used
+        """
+        errors = list(tokenizer.errors)
+        if html is not None:
+            expected = len(POST_TABLE_PATTERN.findall(html))
+            if len(tokenizer.posts) != expected:
+                errors.append(f"{len(tokenizer.posts)} post tables read, {expected} expected")
+        for raw in tokenizer.posts:
+            if raw.header_text is None or not raw.has_message:
+                errors.append(f"post {raw.post_id} has no header or no message")
+        return errors
+    
+    def build_post(self, raw: RawPost, with_qualities: bool = True) -> Post:
+        """Build a post from the fields read by the tokenizer"""
+        post_count = None
+        if raw.post_count is not None:
+            try:
+                post_count = int(raw.post_count)
+            except ValueError:
+                pass
+        
+        images = []
+        for src, classes in raw.images:
+            if src and not src.startswith('http'):
+                src = urljoin(self.get_base_url(self.thread_url), src)
+            if src and 'inlineimg' not in classes:
+                images.append(src)
+        
+        post = Post(
+            post_id=raw.post_id,
+            date=self.parse_post_date(raw.header_text),
+            author=raw.author if raw.author is not None else 'Unknown',
+            content=raw.message_text,
+            download_links=[href for href in raw.links if self.is_download_link(href)],
+            images=images,
+            post_count=post_count
+        )
+        if post.download_links and with_qualities:
+            post.video_qualities = self.extract_video_qualities(post.content, post.download_links)
+        return post
+    
+    def extract_posts_fast(self, html: str, with_qualities: bool = True) -> Optional[List[Post]]:
+        """
+        Extract posts from PlanetSuzy HTML without building a DOM
+        
+        Produces the same posts as extract_posts. Returns None when the page
+        fails the structural sanity checks, the caller then uses the DOM path.
+        """
+        tokenizer = tokenize_posts(html, self.is_download_link)
+        errors = self.check_raw_posts(tokenizer, html)
+        if errors:
+            logging.warning(f"Fast extractor failed on {self.thread_url} ({'; '.join(errors[:3])}), "
+                            f"falling back to the DOM extractor")
+            return None
+        
+        posts = [self.build_post(raw, with_qualities) for raw in tokenizer.posts]
+        return sorted(posts, key=lambda p: (p.post_count or 0, p.post_id), reverse=True)
+    
+    def fetch_page(self, url: str) -> Page:
+        """
+        Fetch a page of the thread; in streaming mode, the posts are extracted
+        while the page downloads
+        
+        The tokenizer is fed with each chunk of the response and each post is
+        built as soon as its table is closed. Only the HTML before the first post
+        (page navigation) is kept, and the download stops once the end of the
+        posts is reached. Falls back to a regular fetch when the posts fail the
+        sanity checks.
+        """
+        if not self.streaming:
+            return super().fetch_page(url)
+        
+        posts = []
+        tokenizer = PostTokenizer(self.is_download_link,
+                                  on_post=lambda raw: posts.append(self.build_post(raw, with_qualities=False)))
+        head = []
+        chunks = self.stream_page_content(url)
+        try:
+            for chunk in chunks:
+                if not tokenizer.started:
+                    head.append(chunk)
+                tokenizer.feed(chunk)
+                if tokenizer.finished:
+                    break
+        finally:
+            chunks.close()
+        tokenizer.close()
+        
+        errors = self.check_raw_posts(tokenizer)
+        if not tokenizer.posts:
+            errors.append("no post found")
+        if errors:
+            logging.warning(f"Streaming extraction failed on {url} ({'; '.join(errors[:3])}), "
+                            f"fetching the whole page")
+            return super().fetch_page(url)
+        
+        page = Page(url, ''.join(head))
+        page.posts = sorted(posts, key=lambda p: (p.post_count or 0, p.post_id), reverse=True)
+        return page
+    
+    def page_post_counts(self, page: Page) -> List[int]:
+        """Return the post counts of a fetched page"""
+        if page.posts is not None:
+            return [post.post_count for post in page.posts if post.post_count is not None]
+        return self.get_post_counts(page.html)
+    
+    def extract_posts(self, soup: BeautifulSoup, with_qualities: bool = True) -> List[Post]:
         """Extract posts from PlanetSuzy HTML"""
         posts = []
         post_tables = soup.select('table[id^="post"]')
         for post_table in post_tables:
-            logging.info(f"------------------------Post table--------------------: {post_table.get('id', '')}")
-            logging.info(f"------------------------postcount--------------------: {post_table.select_one('a[id^="postcount"]').get('name', '')}")
+            logging.debug(f"------------------------Post table--------------------: {post_table.get('id', '')}")
 
                 
             post_id = post_table.get('id', '').replace('post', '')
@@ -39,41 +293,7 @@ class PlanetSuzyScraper(BaseScraper):
             
             # Get post date
             date_text = post_table.select_one('td.thead').text.strip() if post_table.select_one('td.thead') else ''
-            #print(f"------------------------Date text--------------------: {date_text}" )
-            # Parse date from format like "23rd March 2023, 09:14"
-            date = None
-            date_match = re.search(r'(\d+)(?:st|nd|rd|th)\s+([A-Za-z]+)\s+(\d{4}),\s+(\d{2}):(\d{2})', date_text)
-            if date_match:
-                day, month, year, hour, minute = date_match.groups()
-                month_map = {
-                    'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-                    'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
-                }
-                month_num = month_map.get(month, 1)  # Default to January if month not found
-                try:
-                    date = datetime(int(year), month_num, int(day), int(hour), int(minute))
-                    #print(f"------------------------Date--------------------: {date}" )
-                except ValueError:
-                    # Handle invalid dates (e.g., February 30)
-                    pass
-            # Case 2: "Today, HH:MM" format
-            elif "Today," in date_text:
-                today_match = re.search(r'Today,\s+(\d{2}):(\d{2})', date_text)
-                if today_match:
-                    hour, minute = today_match.groups()
-                    # Get today's date and combine with the parsed time
-                    today = datetime.now().replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
-                    date = today
-                    #print(f"------------------------Date--------------------: {date}")
-            # Case 3: "Yesterday"
-            elif "Yesterday," in date_text:
-                yesterday_match = re.search(r'Yesterday,\s+(\d{2}):(\d{2})', date_text)
-                if yesterday_match:
-                    hour, minute = yesterday_match.groups()
-                    # Get yesterday's date and combine with the parsed time
-                    yesterday = datetime.now().replace(hour=int(hour), minute=int(minute), second=0, microsecond=0) - timedelta(days=1)
-                    date = yesterday
-                    #print(f"------------------------Date--------------------: {date}")
+            date = self.parse_post_date(date_text)
 
             # Get author
             author_element = post_table.select_one('a.bigusername')
@@ -126,22 +346,126 @@ class PlanetSuzyScraper(BaseScraper):
                 author=author,
                 content=content,
                 download_links=download_links,
-                images=images
+                images=images,
+                post_count=post_count
             )
             
             # Analyser et regrouper les liens par qualité vidéo
-            if download_links:
+            if download_links and with_qualities:
                 print(f"Analyse du contenu pour {post_id}: {content}")    
                 video_qualities = self.extract_video_qualities(content, download_links)
                 post.video_qualities = video_qualities
             
-            # Store post_count as an attribute for sorting
-            post.post_count = post_count
             posts.append(post)
         
         # Sort posts by post_count (higher = newer)
         # Use post_id as fallback if post_count is not available
-        return sorted(posts, key=lambda p: (p.post_count if hasattr(p, 'post_count') and p.post_count else 0, p.post_id), reverse=True)
+        return sorted(posts, key=lambda p: (p.post_count or 0, p.post_id), reverse=True)
+    
+    def get_page_number(self, url: str) -> int:
+        """Return the page number of a thread URL (-pN- or page=N part), 1 when absent"""
+        match = PAGE_NUMBER_PATTERN.search(url)
+        return int(match.group(1) or match.group(2)) if match else 1
+    
+    def build_page_url(self, url: str, page: int) -> str:
+        """Build the URL of the given page of the thread"""
+        if self.page_variant == 'showthread':
+            page_url = f"{self.get_base_url(url)}/showthread.php?t={self.get_thread_key(url)}"
+            if page > 1:
+                page_url += f"&page={page}"
+            return page_url + f"&pp={self.max_posts_per_page}"
+        
+        # on split le lien pour pouvoir insérer le numéro de page
+        link_split = url.split(sep='-')
+        # si l'url contient déjà -pN- on saute cette partie
+        start = 2 if re.search(r'-p(\d+)-', url) else 1
+        mylink = link_split[0]+"-p"+str(page)  #  on insère le numero de page
+        for i in range(start, len(link_split)):
+            # on reconstruit le lien avec la fin prenom-nom-(surnom)-etc.html
+            mylink = mylink+"-"+link_split[i]
+        return mylink
+    
+    def get_thread_key(self, url: str) -> Optional[str]:
+        """Return the thread ID of a PlanetSuzy thread URL (the 894033 of t894033-...)"""
+        match = THREAD_KEY_PATTERN.search(url)
+        return (match.group(1) or match.group(2)) if match else None
+    
+    def parse_listing(self, html: str) -> List[ListingEntry]:
+        """
+        Read the reply count and last post of each thread row of a listing page
+        (forumdisplay.php, search.php?do=getnew/getdaily), without building a DOM
+        """
+        entries = []
+        matches = list(THREAD_TITLE_PATTERN.finditer(html))
+        for i, match in enumerate(matches):
+            # La ligne du thread s'étend jusqu'au titre du thread suivant
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(html)
+            row = html[match.end():end]
+            
+            replies = None
+            for pattern in REPLIES_PATTERNS:
+                replies_match = pattern.search(row)
+                if replies_match:
+                    replies = int(re.sub(r'[,.]', '', replies_match.group(1)))
+                    break
+            last_post_match = LAST_POST_PATTERN.search(row)
+            last_post_id = last_post_match.group(1) if last_post_match else None
+            
+            if replies is None and last_post_id is None:
+                continue
+            entries.append(ListingEntry(match.group(1), replies, last_post_id))
+        return entries
+    
+    def get_first_page_url(self) -> str:
+        """Return the URL of the first page of the thread"""
+        if self.page_variant != 'default' or re.search(r'-p(\d+)-', self.thread_url):
+            return self.build_page_url(self.thread_url, 1)
+        return self.thread_url
+    
+    def fetch_first_page(self) -> Page:
+        """
+        Fetch the first page of the thread with the configured page variant,
+        falling back to the default pages when the variant is not available
+        """
+        if self.page_variant == 'default':
+            return super().fetch_first_page()
+        
+        try:
+            page = super().fetch_first_page()
+            if page.posts or 'id="post' in page.html:
+                return page
+            error = "no post found in the page"
+        except Exception as e:
+            error = str(e)
+        
+        logging.warning(f"PlanetSuzy page variant '{self.page_variant}' is not available ({error}), "
+                        f"falling back to the default pages")
+        self._unavailable_variants.add(self.page_variant)
+        self.use_page_variant('default')
+        return super().fetch_first_page()
+    
+    def get_last_page_number(self, soup: BeautifulSoup) -> int:
+        """Find the number of the last page in the page navigation"""
+        # Try to find the last page
+        mylastlink = soup.find('a', title=lambda value: value and 'Last Page' in value)
+        logging.info(f"URL de mylastlink est : {mylastlink}")
+        
+        if mylastlink: # on a trouvé Last Page dans les liens de la soup
+            parsed_url = urlparse(mylastlink.get('href'))
+            params = parse_qs(parsed_url.query)
+            return int(params.get('page', ['1'])[0])  # Valeur par défaut '1' si absent
+        
+        ### Gerer le cas où il n'y pas de Last Page car il y a peu de page sur le forum
+        ### alors on recherche le numero de page le plus élevé
+        mylastpage = 1
+        links = soup.find_all('a', href=lambda value: value and 'page' in value)
+        for link in links:
+            # Chercher le paramètre 'page=' dans l'URL
+            match = re.search(r'page=(\d+)', link['href'])
+            if match:
+                # Mettre à jour la page max si on trouve une valeur plus grande
+                mylastpage = max(mylastpage, int(match.group(1)))
+        return mylastpage
     
     def get_next_page_url(self, soup: BeautifulSoup, url: str) -> Optional[str]:
         """
@@ -149,59 +473,104 @@ class PlanetSuzyScraper(BaseScraper):
         """
         ## On test l'url pour savoir si on cherhce une last page ou la page précédente
         # ce test permet de chercher dans l'url -p suiv de chiffre puis suivi d'un autre - : ex -p25-
-        match = re.search(r'-p(\d+)-', url)
-        if match:
-            # on la split pour pouvoir la modifier 
-            logging.info(f"Match est : {match.group(1)}")
-            link_split = url.split(sep='-')
-            mylastlink = link_split[0]+"-p"+str(int(match.group(1))-1)  #  on insère le numero de page
-            for i in range(2, len(link_split)):
-                # on reconstruit le lien avec la fin prenom-nom-(surnom)-etc.html
-                mylastlink = mylastlink+"-"+link_split[i]
-            logging.info(f"URL de la Last page est : {mylastlink}")
-            return mylastlink
+        # (ou page=25 pour les pages showthread.php)
+        if PAGE_NUMBER_PATTERN.search(url):
+            logging.info(f"Page est : {self.get_page_number(url)}")
+            mylastlink = self.build_page_url(url, self.get_page_number(url) - 1)
         else:
-            # Try to find the last page
-            mylastlink = None
-            mylastlink = soup.find('a', title=lambda value: value and 'Last Page' in value)
-            logging.info(f"URL de mylastlink est : {mylastlink}")
-
-            if mylastlink: # on a trouvé Last Page dans les liens de la soup
-                parsed_url = urlparse(mylastlink.get('href'))
-                params = parse_qs(parsed_url.query)                     
-                mylastpage = params.get('page', ['1'])[0]  # Valeur par défaut '1' si absent
-                
-
-            ### Gerer le cas où il n'y pas de Last Page car il y a peu de page sur le forum
-            elif mylastlink is None:
-                ### alors on recherche le numero de page le plus élevé et on retourne cette page
-                # Find all 'a' tags with 'page' in href
-                mylastpage = 1
-                links = soup.find_all('a', href=lambda value: value and 'page' in value)
-                #logging.info(f"URL de links est : {links}")
-                for link in links:
-                    #logging.info(f"URL de link est : {link.get('href')}")
-                    href = link['href']
-                    # Chercher le paramètre 'page=' dans l'URL
-                    match = re.search(r'page=(\d+)', href)
-                    if match:
-                        page_num = int(match.group(1))
-                        # Mettre à jour la page max si on trouve une valeur plus grande
-                        if page_num > mylastpage:
-                            mylastpage = page_num
-                    
-                # Get the link with maximum page number
-                #mylastlink = max(links, key=lambda x: self.extract_page_number(x.get('href')), default=None)
-            #on split le lien pour pouvoir insérer le numéro de page
-
-            link_split = url.split(sep='-')
-            mylastlink = link_split[0]+"-p"+str(mylastpage)  #  on insère le numero de page
-            for i in range(1, len(link_split)):
-            # on reconstruit le lien avec la fin prenom-nom-(surnom)-etc.html
-                mylastlink = mylastlink+"-"+link_split[i]
-            logging.info(f"URL de la Last page est : {mylastlink}")
-            return mylastlink
+            mylastlink = self.build_page_url(url, self.get_last_page_number(soup))
+        logging.info(f"URL de la Last page est : {mylastlink}")
+        return mylastlink
+    
+    def get_post_counts(self, html: str) -> List[int]:
+        """Read the post counts of a page from the raw HTML, without building a DOM"""
+        return [int(count) for count in POST_COUNT_PATTERN.findall(html)]
+    
+    def page_holds_post(self, page: Page, post_id: str) -> bool:
+        """Check whether a fetched page holds the given post"""
+        if page.posts is not None:
+            return any(post.post_id == post_id for post in page.posts)
+        return page.html is not None and self.page_contains_post(page.html, post_id)
+    
+    def reaches_last_seen(self, page: Page) -> Optional[bool]:
+        """
+        Tell whether the pages older than a fetched page may hold unseen posts
         
+        Returns:
+            True when the page holds the last seen post (or, without last_post_id,
+            the post following the stored count), False when the older pages must
+            be fetched, None when the stored count is reached but the last seen post
+            is not on the page: older posts were deleted on the forum, shifting the
+            counts down, so it may be on the page before (or be deleted itself)
+        """
+        if self.last_post_id and self.page_holds_post(page, self.last_post_id):
+            return True
+        counts = self.page_post_counts(page)
+        if counts and min(counts) > self.last_post_count + 1:
+            return False
+        return None if counts and self.last_post_id else True
+    
+    def fetch_pages(self) -> List[Page]:
+        """
+        Fetch the pages holding posts newer than last_post_count
+        
+        The page range is computed from the stored post count and the number of
+        posts per page, and the pages are fetched in parallel. Without a stored
+        post count, falls back to walking back one page at a time. The stored
+        count may be too high when posts were deleted: one page more is fetched
+        when the last seen post is not on the page where the count ends.
+        """
+        if self.last_post_count is None:
+            return super().fetch_pages()
+        
+        # First page of the thread, to find the last page number
+        first = self.fetch_first_page()
+        first_url = first.url
+        last_page = self.get_last_page_number(self.parse_html(first.html))
+        if last_page <= 1:
+            return [first]
+        
+        last_url = self.build_page_url(first_url, last_page)
+        pages = [self.fetch_page(last_url)]
+        reached = self.reaches_last_seen(pages[0])
+        if reached:
+            return pages
+        counts = self.page_post_counts(pages[0])
+        if reached is None:
+            pages.append(first if last_page == 2 else self.fetch_page(self.build_page_url(first_url, last_page - 1)))
+            return pages
+        
+        # Pages holding the unseen posts: page p holds posts (p-1)*ppp+1 .. p*ppp
+        posts_per_page = self.posts_per_page or (min(counts) - 1) // (last_page - 1)
+        first_page = max(1, self.last_post_count // max(1, posts_per_page) + 1)
+        if last_page - first_page > self.max_catchup_pages:
+            logging.warning(f"{self.thread_url} is {last_page - first_page} pages behind, "
+                            f"only fetching the last {self.max_catchup_pages}")
+            first_page = last_page - self.max_catchup_pages
+        
+        # The first page is already downloaded
+        page_numbers = list(range(last_page - 1, max(first_page, 2) - 1, -1))
+        pages.extend(self.fetch_pages_parallel(first_url, page_numbers))
+        if first_page == 1:
+            pages.append(first)
+        
+        # Posts may have been deleted, shifting the post counts: keep walking back
+        # until the last seen post, or one page past the stored count
+        page_number = first_page
+        while page_number > 1 and len(pages) < self.max_catchup_pages:
+            reached = self.reaches_last_seen(pages[-1])
+            if reached:
+                break
+            page_number -= 1
+            if page_number == 1:
+                pages.append(first)
+            else:
+                pages.append(self.fetch_page(self.build_page_url(first_url, page_number)))
+            if reached is None:
+                break
+        
+        return pages
+    
     def extract_page_number(self, href):
         if not href:
             return 0
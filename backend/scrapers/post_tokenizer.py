@@ -0,0 +1,200 @@
+"""
+Extraction des posts vBulletin sans construire de DOM.
+
+`PostTokenizer` parcourt la page avec le tokenizer HTML de la bibliothèque standard
+et ne garde que ce dont les scrapers ont besoin : id du post, postcount, texte de
+l'en-tête (date), auteur, texte du message, liens et images. Les pages dont la
+structure n'est pas celle attendue sont signalées par `errors`, pour que l'appelant
+puisse revenir à l'extraction BeautifulSoup.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Dict, Callable, Optional
+
+POST_TABLE_ID = re.compile(r'post(\d+)$')
+
+class RawPost:
+    """Fields of a post table, as read from the page"""
+
+    def __init__(self, post_id: str):
+        self.post_id = post_id
+        self.post_count = None  # Raw value of the name attribute of the postcount anchor
+        self.header_text = None  # Text of the first td.thead
+        self.author = None  # Text of the first a.bigusername
+        self.has_message = False
+        self.message_parts = []  # Stripped text of the post message, download links in place of the <a>
+        self.links = []  # href of the <a> of the post message
+        self.images = []  # (src, classes) of the <img> of the post message
+
+    @property
+    def message_text(self) -> str:
+        return ' '.join(self.message_parts)
+
+class PostTokenizer(HTMLParser):
+    """Collect the post tables of a vBulletin page while tokenizing it"""
+
+    def __init__(self, is_download_link: Callable[[str], bool],
+                 on_post: Optional[Callable[[RawPost], None]] = None):
+        """
+        Initialize the tokenizer
+
+        Args:
+            is_download_link: Function telling whether an href is a download link
+            on_post: Function called with each post as soon as its table is closed
+        """
+        super().__init__(convert_charrefs=True)
+        self.is_download_link = is_download_link
+        self.on_post = on_post
+        self.posts: List[RawPost] = []
+        self.errors: List[str] = []
+        self.started = False  # A post table has been opened
+        self.finished = False  # The end of the posts (div#lastpost) has been reached
+
+        self._post = None
+        self._table_depth = 0  # Tables open inside the current post table
+        self._header_depth = 0  # Tds open inside the first td.thead
+        self._header_parts = None
+        self._author_parts = None
+        self._message_depth = 0  # Divs open inside the post message
+        self._in_download_link = False
+        self._skip_data = 0  # Inside <script> or <style>
+        self._pending_data = []  # Text node split across fed chunks
+
+    @staticmethod
+    def _classes(attrs: Dict[str, Optional[str]]) -> List[str]:
+        return (attrs.get('class') or '').split()
+
+    def handle_starttag(self, tag: str, attrs_list):
+        self._flush_data()
+        attrs = dict(attrs_list)
+
+        if tag in ('script', 'style'):
+            self._skip_data += 1
+            return
+
+        if tag == 'table':
+            if self._post is None:
+                table_id = attrs.get('id') or ''
+                if table_id.startswith('post'):
+                    match = POST_TABLE_ID.match(table_id)
+                    if not match:
+                        self.errors.append(f"unexpected post table id '{table_id}'")
+                        return
+                    self._post = RawPost(match.group(1))
+                    self._table_depth = 1
+                    self.started = True
+                return
+            self._table_depth += 1
+            return
+
+        post = self._post
+        if post is None:
+            if tag == 'div' and attrs.get('id') == 'lastpost':
+                self.finished = True
+            return
+
+        if tag == 'td':
+            if self._header_depth:
+                self._header_depth += 1
+            elif post.header_text is None and self._header_parts is None and 'thead' in self._classes(attrs):
+                self._header_depth = 1
+                self._header_parts = []
+        elif tag == 'a':
+            if post.post_count is None and (attrs.get('id') or '').startswith('postcount'):
+                post.post_count = attrs.get('name') or ''
+            if post.author is None and self._author_parts is None and 'bigusername' in self._classes(attrs):
+                self._author_parts = []
+            href = attrs.get('href')
+            if self._message_depth and href is not None:
+                post.links.append(href)
+                if self.is_download_link(href):
+                    post.message_parts.append(href)
+                    self._in_download_link = True
+        elif tag == 'div':
+            if self._message_depth:
+                self._message_depth += 1
+            elif not post.has_message and (attrs.get('id') or '').startswith('post_message_'):
+                post.has_message = True
+                self._message_depth = 1
+        elif tag == 'img' and self._message_depth:
+            post.images.append((attrs.get('src') or '', self._classes(attrs)))
+
+    def handle_endtag(self, tag: str):
+        self._flush_data()
+        if tag in ('script', 'style'):
+            self._skip_data = max(0, self._skip_data - 1)
+            return
+
+        post = self._post
+        if post is None:
+            return
+
+        if tag == 'table':
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                if self._message_depth or self._header_depth:
+                    self.errors.append(f"unclosed element in post {post.post_id}")
+                self.posts.append(post)
+                self._post = None
+                if self.on_post:
+                    self.on_post(post)
+                self._header_depth = 0
+                self._header_parts = None
+                self._author_parts = None
+                self._message_depth = 0
+                self._in_download_link = False
+        elif tag == 'td' and self._header_depth:
+            self._header_depth -= 1
+            if self._header_depth == 0:
+                post.header_text = ''.join(self._header_parts).strip()
+                self._header_parts = None
+        elif tag == 'a':
+            if self._author_parts is not None:
+                post.author = ''.join(self._author_parts).strip()
+                self._author_parts = None
+            self._in_download_link = False
+        elif tag == 'div' and self._message_depth:
+            self._message_depth -= 1
+
+    def handle_data(self, data: str):
+        # With incremental feeding a text node may come in several pieces
+        self._pending_data.append(data)
+
+    def handle_comment(self, data: str):
+        self._flush_data()
+
+    def _flush_data(self):
+        if not self._pending_data:
+            return
+        data = ''.join(self._pending_data)
+        self._pending_data = []
+        if self._post is None or self._skip_data:
+            return
+        if self._header_parts is not None:
+            self._header_parts.append(data)
+        if self._author_parts is not None:
+            self._author_parts.append(data)
+        if self._message_depth and not self._in_download_link:
+            text = data.strip()
+            if text:
+                self._post.message_parts.append(text)
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        if self._post is not None:
+            self.errors.append(f"post table {self._post.post_id} is not closed")
+            self._post = None
+
+def tokenize_posts(html: str, is_download_link: Callable[[str], bool]) -> PostTokenizer:
+    """
+    Tokenize a page and collect its post tables
+
+    Returns:
+        The tokenizer, holding the posts and the structural errors found
+    """
+    tokenizer = PostTokenizer(is_download_link)
+    tokenizer.feed(html)
+    tokenizer.close()
+    return tokenizer
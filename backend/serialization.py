@@ -0,0 +1,196 @@
+"""
+Sérialisation JSON commune à l'API, aux notifications et aux callbacks Telegram.
+
+orjson est utilisé s'il est installé (plusieurs fois plus rapide), sinon le module
+json de la bibliothèque standard. Les deux produisent la même sortie : JSON compact
+en UTF-8, dates au format ISO 8601, et `Post` / `VideoQuality` encodés directement
+par leur `to_dict()`. Le choix peut être forcé avec la variable `JSON_BACKEND`
+(`auto`, `orjson` ou `json`).
+
+Mesure du débit d'encodage :
+
+    python -m backend.serialization --iterations 2000
+"""
+
+import json
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Union
+
+from flask.json.provider import JSONProvider
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Encode the types the JSON libraries do not know"""
+    if hasattr(obj, 'to_dict'):
+        # Post, VideoQuality, models
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class JSONSerializer:
+    """JSON encoder/decoder backed by orjson or the standard library"""
+
+    def __init__(self, backend: str = 'auto'):
+        """
+        Initialize the serializer
+
+        Args:
+            backend: 'orjson', 'json', or 'auto' (orjson when it is installed)
+        """
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'json'
+        if backend == 'orjson' and orjson is None:
+            logger.warning("JSON_BACKEND=orjson but orjson is not installed, using json")
+            backend = 'json'
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        self.backend = backend
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        """
+        Encode an object as UTF-8 JSON
+
+        Args:
+            obj: Object to encode
+            indent: Indent the output (2 spaces) for human readers
+
+        Returns:
+            The encoded JSON
+        """
+        if self.backend == 'orjson':
+            # Non-string keys are converted like the standard library does
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            return orjson.dumps(obj, default=_default, option=option)
+        if indent:
+            return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def dumps_str(self, obj: Any, indent: bool = False) -> str:
+        """Encode an object as a JSON string"""
+        return self.dumps(obj, indent).decode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        """
+        Decode JSON
+
+        Raises:
+            ValueError: If the data is not valid JSON (json.JSONDecodeError and
+                        orjson.JSONDecodeError are both subclasses)
+        """
+        if self.backend == 'orjson':
+            return orjson.loads(data)
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider (jsonify, request.get_json) using the shared serializer"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return get_serializer().dumps_str(obj, indent=bool(kwargs.get('indent')))
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return get_serializer().loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Indented in debug mode, like Flask's default provider
+        indent = self._app.debug
+        return self._app.response_class(get_serializer().dumps(obj, indent=indent) + b'\n',
+                                        mimetype=self.mimetype)
+
+# Singleton instance
+_serializer = None
+
+def get_serializer() -> JSONSerializer:
+    """Get the serializer selected by the JSON_BACKEND setting"""
+    global _serializer
+    if _serializer is None:
+        _serializer = JSONSerializer(get_config().JSON_BACKEND)
+        logger.info(f"JSON serializer: {_serializer.backend}")
+    return _serializer
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode an object as UTF-8 JSON with the shared serializer"""
+    return get_serializer().dumps(obj, indent)
+
+def dumps_str(obj: Any, indent: bool = False) -> str:
+    """Encode an object as a JSON string with the shared serializer"""
+    return get_serializer().dumps_str(obj, indent)
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Decode JSON with the shared serializer"""
+    return get_serializer().loads(data)
+
+def benchmark(iterations: int = 1000, posts_per_payload: int = 50) -> Dict[str, Dict[str, float]]:
+    """
+    Measure the encode throughput of each available backend
+
+    The payload looks like a check result: posts with their video qualities and links.
+
+    Args:
+        iterations: Number of payloads encoded per backend
+        posts_per_payload: Number of posts in each payload
+
+    Returns:
+        Dictionary backend -> payloads per second, MB per second and payload size
+    """
+    from .scrapers.base import Post, VideoQuality
+
+    posts = []
+    for index in range(posts_per_payload):
+        post = Post(str(1000000 + index), datetime(2024, 1, 1, 12, index % 60), f"author{index}",
+                    f"Scene {index} - 1920x1080 mp4 1.2 GB " * 5,
+                    [f"https://k2s.cc/file/{index}a", f"https://filejoker.net/{index}b"],
+                    [f"https://img.example.com/{index}.jpg"], post_count=index + 1)
+        quality = VideoQuality("FullHD", "mp4 - 1920x1080 - 1.2 GB")
+        quality.add_link("k2s.cc", f"https://k2s.cc/file/{index}a")
+        quality.add_link("filejoker.net", f"https://filejoker.net/{index}b")
+        post.video_qualities.append(quality)
+        posts.append(post)
+    payload = {"success": True, "checked_at": datetime(2024, 1, 1), "results": posts}
+
+    backends = ['json'] + (['orjson'] if orjson is not None else [])
+    results = {}
+    for backend in backends:
+        encode = JSONSerializer(backend).dumps
+        size = len(encode(payload))
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encode(payload)
+        elapsed = time.perf_counter() - start
+        results[backend] = {
+            "payloads_per_second": iterations / elapsed,
+            "mb_per_second": size * iterations / elapsed / 1e6,
+            "payload_bytes": size
+        }
+    return results
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mesurer le débit d'encodage JSON")
+    parser.add_argument('--iterations', type=int, default=1000, help='Nombre de réponses encodées par bibliothèque')
+    parser.add_argument('--posts', type=int, default=50, help='Nombre de posts par réponse')
+    args = parser.parse_args()
+
+    for backend, stats in benchmark(args.iterations, args.posts).items():
+        print(f"{backend:7} {stats['payloads_per_second']:10.0f} réponses/s  "
+              f"{stats['mb_per_second']:8.1f} Mo/s  ({stats['payload_bytes']} octets par réponse)")
@@ -1,7 +1,7 @@
-from ..models import get_session
+from ..config import get_config
+from ..models import get_scoped_session
 from .db import DatabaseService
 
 def get_db_service(db_path='forum_tracker.db'):
-    """Get a database service instance"""
-    session = get_session(db_path)
-    return DatabaseService(session)
+    """Get a database service instance, using a session per thread"""
+    return DatabaseService(get_scoped_session(db_path), search_rank_window=get_config().SEARCH_RANK_WINDOW)
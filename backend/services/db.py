@@ -1,22 +1,142 @@
+import os
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, delete, func, text, bindparam, DateTime
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, scoped_session, selectinload, contains_eager
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..models import Performer, Thread
+from ..models import Performer, Thread, CallbackData, StoredPost, PostQuality, PostLink, compress_text, link_hosts, search_scope
+
+# Rows fetched at a time by the streamed listings
+STREAM_BATCH_SIZE = 200
+
+# Number of writes committed by this process, shared by all the service instances
+_write_count = 0
+_write_count_lock = threading.Lock()
 
 class DatabaseService:
     """Service for database operations"""
     
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, search_rank_window: int = 2000):
+        # A Session, or a scoped_session giving each thread its own session
         self.session = session
+        self.search_rank_window = search_rank_window  # Matching posts ranked by the search, 0 = all
+        self._search_enabled = None
+        self._db_files = None
+    
+    def _commit(self):
+        """Commit the session and bump the data version"""
+        global _write_count
+        self.session.commit()
+        with _write_count_lock:
+            _write_count += 1
+    
+    @property
+    def data_version(self) -> str:
+        """
+        Token changing whenever data is written, used to validate the cached API responses
+        
+        The writes of this process are counted by the write methods; the writes of other
+        processes (import script, other workers) change the modification time of the
+        database files.
+        """
+        if self._db_files is None:
+            path = self.session.get_bind().url.database
+            self._db_files = [path, path + '-wal'] if path and path != ':memory:' else []
+        stamps = []
+        for path in self._db_files:
+            try:
+                stamps.append(str(os.stat(path).st_mtime_ns))
+            except OSError:
+                stamps.append('0')
+        return '.'.join([str(_write_count)] + stamps)
+    
+    def remove_session(self):
+        """Close the session of the current thread, at the end of a request or a job"""
+        if isinstance(self.session, scoped_session):
+            self.session.remove()
+    
+    @property
+    def search_enabled(self) -> bool:
+        """Whether the full-text search index exists"""
+        if self._search_enabled is None:
+            self._search_enabled = self.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+            )).first() is not None
+        return self._search_enabled
     
     # Performer operations
     def get_all_performers(self) -> List[Performer]:
         """Get all performers from the database"""
         return self.session.query(Performer).all()
     
+    def list_performers(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        is_active: Optional[bool] = None, forum_type: Optional[str] = None,
+                        name_prefix: Optional[str] = None, with_threads: bool = True,
+                        stream: bool = False) -> Tuple[Iterable[Performer], Optional[str]]:
+        """
+        Get performers ordered by ID, optionally filtered and one page at a time
+        
+        Args:
+            limit: Maximum number of performers returned, None for all
+            cursor: Cursor returned with the previous page, None for the first page
+            is_active: Only the active (True) or inactive (False) performers
+            forum_type: Only the performers having a thread on this forum
+            name_prefix: Only the performers whose name starts with this prefix (case-insensitive)
+            with_threads: Load the threads of the performers
+            stream: Without limit, return an iterator loading the performers in batches instead of a list
+            
+        Returns:
+            Tuple (performers, cursor of the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        query = self.session.query(Performer)
+        if cursor:
+            query = query.filter(Performer.id > self._parse_id_cursor(cursor))
+        if is_active is not None:
+            query = query.filter(Performer.is_active == is_active)
+        if forum_type is not None:
+            query = query.filter(Performer.threads.any(Thread.forum_type == forum_type))
+        if name_prefix:
+            escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Performer.name.like(f"{escaped}%", escape='\\'))
+        if with_threads:
+            query = query.options(selectinload(Performer.threads))
+        return self._keyset_page(query.order_by(Performer.id), limit, stream)
+    
+    def get_thread_counts(self, performer_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """Get the number of threads of the given performers (None for all), in one grouped query"""
+        query = self.session.query(Thread.performer_id, func.count(Thread.id))
+        if performer_ids is not None:
+            if not performer_ids:
+                return {}
+            query = query.filter(Thread.performer_id.in_(performer_ids))
+        return dict(query.group_by(Thread.performer_id))
+    
+    @staticmethod
+    def _parse_id_cursor(cursor: str) -> int:
+        try:
+            return int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    
+    @staticmethod
+    def _keyset_page(query, limit: Optional[int], stream: bool = False) -> Tuple[Iterable[Any], Optional[str]]:
+        """Run a query ordered by ID and return (rows, cursor of the next page or None)"""
+        if limit is None:
+            # Streamed rows are fetched from the cursor in batches, never all in memory
+            return (query.yield_per(STREAM_BATCH_SIZE) if stream else query.all()), None
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, str(rows[-1].id)
+        return rows, None
+    
     def get_active_performers(self) -> List[Performer]:
         """Get all active performers from the database"""
         return self.session.query(Performer).filter(Performer.is_active == True).all()
@@ -30,12 +150,57 @@ class DatabaseService:
         try:
             performer = Performer(name=name, is_active=is_active)
             self.session.add(performer)
-            self.session.commit()
+            self._commit()
             return True, performer, ""
         except SQLAlchemyError as e:
             self.session.rollback()
             return False, None, str(e)
     
+    def create_performers(self, items: List[Dict[str, Any]],
+                          atomic: bool = False) -> Tuple[bool, List[Tuple[Optional[Performer], str]], str]:
+        """
+        Create several performers in a single transaction
+        
+        Args:
+            items: Performers to create, as dictionaries with name and is_active
+            atomic: Create nothing if one of the performers cannot be created
+            
+        Returns:
+            Tuple of (success, (created performer as a dictionary or None, error message) for each item,
+            error message)
+        """
+        names = [item['name'] for item in items]
+        existing = {name for (name,) in self.session.query(Performer.name).filter(Performer.name.in_(set(names)))}
+        
+        results = []  # (name or None, error)
+        performers = []
+        seen = set()
+        for item in items:
+            if item['name'] in existing:
+                results.append((None, f"Performer {item['name']} already exists"))
+            elif item['name'] in seen:
+                results.append((None, f"Performer {item['name']} appears several times in the batch"))
+            else:
+                seen.add(item['name'])
+                performers.append({'name': item['name'], 'is_active': item.get('is_active', True)})
+                results.append((item['name'], ""))
+        
+        if atomic and len(performers) < len(items):
+            return False, [(None, error or "Not created: another performer of the batch failed")
+                           for _, error in results], "Some performers cannot be created"
+        try:
+            created = {}
+            if performers:
+                # One executemany, then the new rows read back at once (no reload per row)
+                self.session.execute(insert(Performer), performers)
+                created = {performer.name: dict(performer.to_dict(with_threads=False), threads=[])
+                           for performer in self.session.query(Performer).filter(Performer.name.in_(seen))}
+            self._commit()
+            return True, [(created.get(name), error) for name, error in results], ""
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            return False, [(None, error or str(e)) for _, error in results], str(e)
+    
     def update_performer(self, performer_id: int, name: Optional[str] = None, 
                         is_active: Optional[bool] = None) -> Tuple[bool, Optional[Performer], str]:
         """Update a performer"""
@@ -49,7 +214,7 @@ class DatabaseService:
             if is_active is not None:
                 performer.is_active = is_active
             
-            self.session.commit()
+            self._commit()
             return True, performer, ""
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -63,7 +228,7 @@ class DatabaseService:
                 return False, f"Performer with ID {performer_id} not found"
             
             self.session.delete(performer)
-            self.session.commit()
+            self._commit()
             return True, ""
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -78,6 +243,61 @@ class DatabaseService:
         """Get a thread by ID"""
         return self.session.query(Thread).filter(Thread.id == thread_id).first()
     
+    def get_threads_with_performer(self, thread_id: Optional[int] = None, performer_id: Optional[int] = None,
+                                   active_only: bool = False) -> List[Thread]:
+        """
+        Get threads with their performer loaded, in a single joined query
+        
+        Args:
+            thread_id: Only this thread
+            performer_id: Only the threads of this performer
+            active_only: Only the threads of active performers
+        """
+        query = self.session.query(Thread).join(Thread.performer).options(contains_eager(Thread.performer))
+        if thread_id is not None:
+            query = query.filter(Thread.id == thread_id)
+        if performer_id is not None:
+            query = query.filter(Thread.performer_id == performer_id)
+        if active_only:
+            query = query.filter(Performer.is_active == True)
+        return query.order_by(Performer.id, Thread.id).all()
+    
+    def list_threads(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                     performer_id: Optional[int] = None, forum_type: Optional[str] = None,
+                     is_active: Optional[bool] = None,
+                     stream: bool = False) -> Tuple[Iterable[Thread], Optional[str]]:
+        """
+        Get threads ordered by ID, optionally filtered and one page at a time
+        
+        Args:
+            limit: Maximum number of threads returned, None for all
+            cursor: Cursor returned with the previous page, None for the first page
+            performer_id: Only the threads of this performer
+            forum_type: Only the threads of this forum
+            is_active: Only the threads of active (True) or inactive (False) performers
+            stream: Without limit, return an iterator loading the threads in batches instead of a list
+            
+        Returns:
+            Tuple (threads, cursor of the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        query = self.session.query(Thread)
+        if cursor:
+            query = query.filter(Thread.id > self._parse_id_cursor(cursor))
+        if performer_id is not None:
+            query = query.filter(Thread.performer_id == performer_id)
+        if forum_type is not None:
+            query = query.filter(Thread.forum_type == forum_type)
+        if is_active is not None:
+            query = query.join(Thread.performer).filter(Performer.is_active == is_active)
+        return self._keyset_page(query.order_by(Thread.id), limit, stream)
+    
+    def get_active_threads(self) -> List[Thread]:
+        """Get the threads of all active performers, with their performer loaded"""
+        return self.get_threads_with_performer(active_only=True)
+    
     def get_threads_by_performer(self, performer_id: int) -> List[Thread]:
         """Get all threads for a performer"""
         return self.session.query(Thread).filter(Thread.performer_id == performer_id).all()
@@ -90,6 +310,10 @@ class DatabaseService:
             if not performer:
                 return False, None, f"Performer with ID {performer_id} not found"
             
+            existing = self.get_thread_by_url(url, forum_type)
+            if existing:
+                return False, None, f"Thread {url} is already tracked (thread ID {existing.id})"
+            
             thread = Thread(
                 performer_id=performer_id,
                 url=url,
@@ -97,15 +321,71 @@ class DatabaseService:
                 last_check=datetime.utcnow()
             )
             self.session.add(thread)
-            self.session.commit()
+            self._commit()
             return True, thread, ""
         except SQLAlchemyError as e:
             self.session.rollback()
             return False, None, str(e)
     
+    def create_threads(self, items: List[Dict[str, Any]],
+                       atomic: bool = False) -> Tuple[bool, List[Tuple[Optional[Thread], str]], str]:
+        """
+        Create several threads in a single transaction
+        
+        Args:
+            items: Threads to create, as dictionaries with performer_id, url and forum_type
+            atomic: Create nothing if one of the threads cannot be created
+            
+        Returns:
+            Tuple of (success, (created thread as a dictionary or None, error message) for each item,
+            error message)
+        """
+        performer_ids = {item['performer_id'] for item in items}
+        known_performers = {performer_id for (performer_id,) in
+                            self.session.query(Performer.id).filter(Performer.id.in_(performer_ids))}
+        urls = {item['url'] for item in items}
+        tracked = {(url, forum_type): thread_id for thread_id, url, forum_type in
+                   self.session.query(Thread.id, Thread.url, Thread.forum_type).filter(Thread.url.in_(urls))}
+        
+        results = []  # ((url, forum_type) or None, error)
+        threads = []
+        seen = set()
+        now = datetime.utcnow()
+        for item in items:
+            key = (item['url'], item['forum_type'])
+            if item['performer_id'] not in known_performers:
+                results.append((None, f"Performer with ID {item['performer_id']} not found"))
+            elif key in tracked:
+                results.append((None, f"Thread {item['url']} is already tracked (thread ID {tracked[key]})"))
+            elif key in seen:
+                results.append((None, f"Thread {item['url']} appears several times in the batch"))
+            else:
+                seen.add(key)
+                threads.append({'performer_id': item['performer_id'], 'url': item['url'],
+                                'forum_type': item['forum_type'], 'last_check': now})
+                results.append((key, ""))
+        
+        if atomic and len(threads) < len(items):
+            return False, [(None, error or "Not created: another thread of the batch failed")
+                           for _, error in results], "Some threads cannot be created"
+        try:
+            created = {}
+            if threads:
+                # One executemany, then the new rows read back at once (no reload per row)
+                self.session.execute(insert(Thread), threads)
+                created = {(thread.url, thread.forum_type): thread.to_dict() for thread in
+                           self.session.query(Thread).filter(Thread.url.in_({url for url, _ in seen}))}
+            self._commit()
+            return True, [(created.get(key) if key is not None else None, error) for key, error in results], ""
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            return False, [(None, error or str(e)) for _, error in results], str(e)
+    
     def update_thread(self, thread_id: int, url: Optional[str] = None, 
                      forum_type: Optional[str] = None, 
-                     last_post_id: Optional[str] = None) -> Tuple[bool, Optional[Thread], str]:
+                     last_post_id: Optional[str] = None,
+                     last_post_count: Optional[int] = None,
+                     listing_marker: Optional[str] = None) -> Tuple[bool, Optional[Thread], str]:
         """Update a thread"""
         try:
             thread = self.get_thread(thread_id)
@@ -118,14 +398,32 @@ class DatabaseService:
                 thread.forum_type = forum_type
             if last_post_id is not None:
                 thread.last_post_id = last_post_id
+            if last_post_count is not None:
+                thread.last_post_count = last_post_count
+            if listing_marker is not None:
+                thread.listing_marker = listing_marker
             
             thread.last_check = datetime.utcnow()
-            self.session.commit()
+            self._commit()
             return True, thread, ""
         except SQLAlchemyError as e:
             self.session.rollback()
             return False, None, str(e)
     
+    def update_backfill_checkpoint(self, thread_id: int, page: int) -> Tuple[bool, str]:
+        """Store the last page completed by the backfill of a thread"""
+        try:
+            thread = self.get_thread(thread_id)
+            if not thread:
+                return False, f"Thread with ID {thread_id} not found"
+            
+            thread.backfill_page = page
+            self._commit()
+            return True, ""
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            return False, str(e)
+    
     def delete_thread(self, thread_id: int) -> Tuple[bool, str]:
         """Delete a thread"""
         try:
@@ -134,8 +432,282 @@ class DatabaseService:
                 return False, f"Thread with ID {thread_id} not found"
             
             self.session.delete(thread)
-            self.session.commit()
+            self._commit()
             return True, ""
         except SQLAlchemyError as e:
             self.session.rollback()
             return False, str(e)
+    
+    def get_thread_by_url(self, url: str, forum_type: Optional[str] = None) -> Optional[Thread]:
+        """Get a thread by URL (and forum type)"""
+        query = self.session.query(Thread).filter(Thread.url == url)
+        if forum_type is not None:
+            query = query.filter(Thread.forum_type == forum_type)
+        return query.first()
+    
+    # Callback data operations
+    def cleanup_expired_callbacks(self) -> Tuple[int, str]:
+        """
+        Delete the expired callback data
+        
+        Returns:
+            Tuple of (number of deleted rows, error message)
+        """
+        try:
+            result = self.session.execute(delete(CallbackData).where(CallbackData.expires_at < datetime.utcnow()))
+            if result.rowcount:
+                self._commit()
+            else:
+                # Nothing deleted: the data version (and the cached responses) stay valid
+                self.session.commit()
+            return result.rowcount, ""
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            return 0, str(e)
+    
+    # Post operations
+    def get_stored_post_ids(self, thread_id: int, post_ids: List[str]) -> Set[str]:
+        """Get which of the given posts of a thread are already stored"""
+        if not post_ids:
+            return set()
+        return {post_id for post_id, in self.session.query(StoredPost.post_id).filter(
+            StoredPost.thread_id == thread_id, StoredPost.post_id.in_(post_ids))}
+    
+    def upsert_posts(self, thread_id: int, posts: List[Any]) -> Tuple[bool, int, str]:
+        """
+        Store scraped posts of a thread, replacing the posts already stored
+        
+        Args:
+            thread_id: ID of the thread
+            posts: Post objects returned by a scraper
+            
+        Returns:
+            Tuple (success, number of posts stored, error message)
+        """
+        if not posts:
+            return True, 0, ""
+        try:
+            now = datetime.utcnow()
+            rows = {}
+            for post in posts:
+                rows[post.post_id] = {
+                    "thread_id": thread_id,
+                    "post_id": post.post_id,
+                    "post_count": post.post_count,
+                    "date": post.date,
+                    "author": post.author,
+                    "content_zlib": compress_text(post.content),
+                    "created_at": now,
+                    "updated_at": now
+                }
+            statement = insert(StoredPost)
+            statement = statement.on_conflict_do_update(
+                index_elements=['thread_id', 'post_id'],
+                set_={column: statement.excluded[column]
+                      for column in ('post_count', 'date', 'author', 'content_zlib', 'updated_at')}
+            )
+            self.session.execute(statement, list(rows.values()))
+            
+            # Replace the qualities and links of the stored posts
+            post_pks = dict(self.session.query(StoredPost.post_id, StoredPost.id).filter(
+                StoredPost.thread_id == thread_id, StoredPost.post_id.in_(list(rows))))
+            self.session.execute(delete(PostQuality).where(PostQuality.post_pk.in_(list(post_pks.values()))))
+            self.session.execute(delete(PostLink).where(PostLink.post_pk.in_(list(post_pks.values()))))
+            
+            qualities, links = [], []
+            for post in {post.post_id: post for post in posts}.values():
+                post_pk = post_pks[post.post_id]
+                links.extend({"post_pk": post_pk, "kind": "download", "provider": None, "url": url, "quality": None}
+                             for url in post.download_links)
+                links.extend({"post_pk": post_pk, "kind": "image", "provider": None, "url": url, "quality": None}
+                             for url in post.images)
+                for quality in post.video_qualities:
+                    qualities.append({"post_pk": post_pk, "name": quality.quality_name,
+                                      "description": quality.description})
+                    links.extend({"post_pk": post_pk, "kind": "quality", "provider": provider, "url": url,
+                                  "quality": quality.quality_name}
+                                 for provider, urls in quality.provider_links.items() for url in urls)
+            if qualities:
+                self.session.execute(insert(PostQuality), qualities)
+            if links:
+                self.session.execute(insert(PostLink), links)
+            
+            # Full-text index
+            if self.search_enabled:
+                self.session.execute(
+                    text("DELETE FROM posts_fts WHERE rowid IN :post_pks").bindparams(bindparam('post_pks', expanding=True)),
+                    {"post_pks": list(post_pks.values())}
+                )
+                scope = search_scope(thread_id, self.session.query(Thread.performer_id)
+                                     .filter(Thread.id == thread_id).scalar())
+                self.session.execute(
+                    text("INSERT INTO posts_fts (rowid, content, author, hosts, scope) "
+                         "VALUES (:rowid, :content, :author, :hosts, :scope)"),
+                    [{"rowid": post_pks[post.post_id], "content": post.content or '', "author": post.author or '',
+                      "hosts": link_hosts(post.download_links), "scope": scope}
+                     for post in {post.post_id: post for post in posts}.values()]
+                )
+            
+            self._commit()
+            return True, len(rows), ""
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            return False, 0, str(e)
+    
+    def get_thread_posts(self, thread_id: int, limit: int = 50,
+                         cursor: Optional[str] = None) -> Tuple[List[StoredPost], Optional[str]]:
+        """
+        Get the stored posts of a thread, newest first, one page at a time
+        
+        Args:
+            thread_id: ID of the thread
+            limit: Maximum number of posts returned
+            cursor: Cursor returned with the previous page, None for the first page
+            
+        Returns:
+            Tuple (posts, cursor of the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        # Posts are ordered by (post_count, id) descending, posts without post count last
+        query = self.session.query(StoredPost).filter(StoredPost.thread_id == thread_id)
+        if cursor:
+            try:
+                count_part, id_part = cursor.split(':')
+                last_id = int(id_part)
+                last_count = int(count_part) if count_part else None
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            if last_count is None:
+                query = query.filter(StoredPost.post_count.is_(None), StoredPost.id < last_id)
+            else:
+                query = query.filter(or_(
+                    StoredPost.post_count < last_count,
+                    and_(StoredPost.post_count == last_count, StoredPost.id < last_id),
+                    StoredPost.post_count.is_(None)
+                ))
+        
+        posts = (query.options(selectinload(StoredPost.qualities), selectinload(StoredPost.links))
+                 .order_by(StoredPost.post_count.desc(), StoredPost.id.desc())
+                 .limit(limit + 1)
+                 .all())
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            last = posts[-1]
+            next_cursor = f"{last.post_count if last.post_count is not None else ''}:{last.id}"
+        return posts, next_cursor
+    
+    def search_posts(self, query: Optional[str] = None, performer_id: Optional[int] = None,
+                     quality: Optional[str] = None, provider: Optional[str] = None,
+                     date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                     limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Full-text search over the stored posts
+        
+        Args:
+            query: Words to look for in the content, author and link hosts of the posts
+            performer_id: Only posts of the threads of this performer
+            quality: Only posts with this video quality (HD, FullHD, 4K...)
+            provider: Only posts with a download link on this host (k2s.cc...)
+            date_from: Only posts published at or after this date
+            date_to: Only posts published before this date
+            limit: Maximum number of results
+            offset: Number of results to skip
+            
+        Returns:
+            Tuple (results ordered by relevance, or by date without query; whether there are more results)
+            
+        With a query or a provider, only the search_rank_window matching posts stored last
+        are ranked: the older matches are never returned, whatever the offset.
+        """
+        # Each word is quoted so that user input never reaches the FTS5 query syntax
+        def phrase(value):
+            return '"' + value.replace('"', '""') + '"'
+        
+        match = []
+        if query and query.strip():
+            match.append('{content author hosts} : (' + ' '.join(phrase(word) for word in query.split()) + ')')
+        if provider and provider.strip():
+            match.append('hosts : ' + phrase(provider.strip().lower()))
+        if match and performer_id is not None:
+            # Filtered inside the index rather than after ranking
+            match.append(f'scope : "performer{int(performer_id)}"')
+        
+        conditions = []
+        params = {"limit": limit + 1, "offset": offset}
+        if performer_id is not None:
+            conditions.append("t.performer_id = :performer_id")
+            params["performer_id"] = performer_id
+        if quality:
+            conditions.append("EXISTS (SELECT 1 FROM post_qualities q WHERE q.post_pk = p.id "
+                              "AND q.name = :quality COLLATE NOCASE)")
+            params["quality"] = quality
+        if date_from:
+            conditions.append("p.date >= :date_from")
+            params["date_from"] = date_from
+        if date_to:
+            conditions.append("p.date < :date_to")
+            params["date_to"] = date_to
+        
+        if match:
+            if not self.search_enabled:
+                raise RuntimeError("Full-text search is not available (SQLite built without FTS5)")
+            conditions.insert(0, "posts_fts MATCH :match")
+            params["match"] = ' AND '.join(match)
+            # Only the newest matching posts are ranked: bm25 costs one evaluation per
+            # ranked row, and a common word can match most of the posts
+            window = "ORDER BY posts_fts.rowid DESC LIMIT :window" if self.search_rank_window else ""
+            params["window"] = self.search_rank_window
+            sql = ("SELECT id, score FROM ("
+                   "SELECT p.id AS id, bm25(posts_fts, 1.0, 0.5, 2.0, 0.0) AS score "
+                   "FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid "
+                   "JOIN threads t ON t.id = p.thread_id "
+                   "WHERE " + ' AND '.join(conditions) + " " + window + ") "
+                   "ORDER BY score, id DESC LIMIT :limit OFFSET :offset")
+        else:
+            # For a performer, reading its threads' posts and sorting them is cheaper
+            # than walking the date index of all posts (+ keeps the index out of the sort)
+            order = "+p.date DESC, p.id DESC" if performer_id is not None else "p.date DESC, p.id DESC"
+            sql = ("SELECT p.id, NULL AS score FROM posts p "
+                   "JOIN threads t ON t.id = p.thread_id "
+                   + ("WHERE " + ' AND '.join(conditions) if conditions else "")
+                   + " ORDER BY " + order + " LIMIT :limit OFFSET :offset")
+        
+        statement = text(sql)
+        for name in ("date_from", "date_to"):
+            if name in params:
+                statement = statement.bindparams(bindparam(name, type_=DateTime))
+        rows = self.session.execute(statement, params).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        snippets = {}
+        if match and rows:
+            snippets = dict(self.session.execute(
+                text("SELECT rowid, snippet(posts_fts, 0, '[', ']', '...', 16) FROM posts_fts "
+                     "WHERE posts_fts MATCH :match AND rowid IN :post_pks")
+                .bindparams(bindparam('post_pks', expanding=True)),
+                {"match": params["match"], "post_pks": [row.id for row in rows]}
+            ).all())
+        
+        # Load the matching posts with their thread, performer, qualities and links
+        posts = {post.id: post for post in self.session.query(StoredPost)
+                 .filter(StoredPost.id.in_([row.id for row in rows]))
+                 .options(selectinload(StoredPost.qualities), selectinload(StoredPost.links),
+                          selectinload(StoredPost.thread).selectinload(Thread.performer))}
+        results = []
+        for row in rows:
+            post = posts[row.id]
+            result = post.to_dict()
+            result.update({
+                "thread_id": post.thread_id,
+                "thread_url": post.thread.url,
+                "performer_id": post.thread.performer_id,
+                "performer_name": post.thread.performer.name,
+                "score": round(-row.score, 4) if row.score is not None else None,
+                "snippet": snippets.get(row.id)
+            })
+            results.append(result)
+        return results, has_more
@@ -5,12 +5,12 @@ Service de notification pour envoyer des alertes via Telegram.
 import logging
 import time
 import os
-import json
 import asyncio
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from .telegram_utils import get_telegram_helper
+from ..serialization import dumps_str
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +22,8 @@ class NotificationService:
         self.telegram_enabled = False
         self.telegram_token = os.environ.get('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.environ.get('TELEGRAM_CHAT_ID')
+        # Délai entre deux posts envoyés, pour respecter les limites de Telegram
+        self.delay_seconds = float(os.environ.get('NOTIFICATION_DELAY_SECONDS', 5))
         
         # Check if Telegram is configured
         if self.telegram_token and self.telegram_chat_id:
@@ -48,8 +50,9 @@ class NotificationService:
         """
         # Log the notification
         logger.info(f"NOTIFICATION: {title} - {message}")
-        if data:
-            logger.info(f"DATA: {json.dumps(data, indent=2, default=str)}")
+        if data and logger.isEnabledFor(logging.INFO):
+            # Encoded only when it is actually logged
+            logger.info(f"DATA: {dumps_str(data, indent=True)}")
         
         # Pour le moment, on simule l'envoi en loggant tous les détails
         logger.info("=== TELEGRAM MESSAGE CONTENT ===")
@@ -296,7 +299,7 @@ class NotificationService:
                         if len(image_urls) > 10:
                             additional_msg = f"_...et {len(image_urls) - 10} autres images du post #{post.get('post_id')}_"
                             self.telegram_helper.send_message(additional_msg)
-                time.sleep(5)
+                time.sleep(self.delay_seconds)
         
         return result 
 
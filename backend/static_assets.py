@@ -0,0 +1,119 @@
+"""
+Fichiers statiques du frontend avec des URL versionnées par leur contenu.
+
+`asset_url('js/app.js')` renvoie `js/app.<empreinte>.js` : le nom change dès que
+le contenu change, ces URL sont donc servies avec `Cache-Control: immutable` et
+le navigateur ne les redemande jamais. Seul `index.html`, qui référence ces URL,
+est revalidé à chaque chargement (ETag et `304 Not Modified`). Le contenu des
+fichiers et leurs versions compressées sont gardés en mémoire et relus si le
+fichier est modifié.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import Response, request
+
+from .compression import COMPRESSIBLE_MIMETYPES, compress, negotiate_encoding
+
+# name.<hash>.ext
+HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{12})(?P<ext>\.[^./]+)$')
+
+# Max age of the hashed URLs (one year)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+class StaticAsset:
+    """A static file loaded in memory"""
+
+    def __init__(self, path: str, content: bytes, mtime_ns: int):
+        self.path = path
+        self.content = content
+        self.mtime_ns = mtime_ns
+        self.hash = hashlib.sha256(content).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.compressed: Dict[str, bytes] = {}  # encoding -> compressed content
+
+    def encoded(self, encoding: str) -> bytes:
+        """Content compressed with an encoding, at the highest level since it is computed once"""
+        if encoding not in self.compressed:
+            self.compressed[encoding] = compress(self.content, encoding, level=11 if encoding == 'br' else 9)
+        return self.compressed[encoding]
+
+class StaticAssets:
+    """Static files of a folder, with content-hashed URLs"""
+
+    def __init__(self, folder: str):
+        """
+        Initialize the assets
+
+        Args:
+            folder: Folder of the static files
+        """
+        self.folder = os.path.abspath(folder)
+        self.assets: Dict[str, StaticAsset] = {}  # relative path -> asset
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Get a file by its path relative to the folder, reloaded if it was modified"""
+        full_path = os.path.abspath(os.path.join(self.folder, path))
+        if not full_path.startswith(self.folder + os.sep):
+            return None
+        try:
+            mtime_ns = os.stat(full_path).st_mtime_ns
+        except OSError:
+            return None
+
+        asset = self.assets.get(path)
+        if asset is None or asset.mtime_ns != mtime_ns:
+            with open(full_path, 'rb') as f:
+                asset = StaticAsset(path, f.read(), mtime_ns)
+            with self._lock:
+                self.assets[path] = asset
+        return asset
+
+    def url(self, path: str) -> str:
+        """Content-hashed URL of a file (the path as is if the file does not exist)"""
+        asset = self.get(path)
+        if asset is None:
+            return path
+        stem, ext = os.path.splitext(path)
+        return f"{stem}.{asset.hash}{ext}"
+
+    def resolve(self, path: str) -> Tuple[Optional[StaticAsset], bool]:
+        """
+        Find the file of a requested path
+
+        Returns:
+            Tuple (file or None, whether the path carries the current hash of the file)
+        """
+        match = HASHED_NAME.match(os.path.basename(path))
+        if match and not self.get(path):
+            asset = self.get(os.path.join(os.path.dirname(path), match.group('stem') + match.group('ext')))
+            # An old hash (page loaded before a deployment) gets the current content, without long caching
+            return asset, asset is not None and asset.hash == match.group('hash')
+        return self.get(path), False
+
+    def response(self, asset: StaticAsset, hashed: bool, min_size: int = 1024) -> Response:
+        """
+        Response serving a file, compressed if the client accepts it
+
+        Args:
+            asset: File to serve
+            hashed: Whether the URL carries the current hash (cached for a year)
+            min_size: Smaller files are sent uncompressed
+        """
+        encoding = None
+        if asset.mimetype in COMPRESSIBLE_MIMETYPES and len(asset.content) >= min_size:
+            encoding = negotiate_encoding()
+
+        response = Response(asset.encoded(encoding) if encoding else asset.content, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{asset.hash}-{encoding}" if encoding else asset.hash)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if hashed else 'no-cache'
+        return response.make_conditional(request)
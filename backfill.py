@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script pour récupérer l'historique complet d'un ou plusieurs threads
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement depuis .env si présent
+load_dotenv()
+
+from backend.backfill import BackfillService
+from backend.config import get_config
+from backend.models import init_db
+from backend.serialization import dumps
+from backend.services import get_db_service
+from backend.services.notification import get_notification_service
+
+def backfill(thread_ids, db_path, all_threads=False, batch_size=None, workers=None, output=None, restart=False):
+    """
+    Récupère tous les posts des threads demandés, en reprenant à la dernière page terminée
+    """
+    config = get_config()
+    init_db(db_path)
+    db_service = get_db_service(db_path)
+    service = BackfillService(
+        db_service,
+        get_notification_service(),
+        batch_size=batch_size or config.BACKFILL_BATCH_SIZE,
+        max_workers=workers or config.BACKFILL_MAX_WORKERS
+    )
+
+    if all_threads:
+        thread_ids = [thread.id for thread in db_service.get_all_threads()]
+
+    # Fichier de sortie (un post JSON par ligne)
+    output_file = open(output, 'ab') if output else None
+
+    def sink(thread_id, posts):
+        if output_file:
+            for post in posts:
+                record = post.to_dict()
+                record['thread_id'] = thread_id
+                output_file.write(dumps(record) + b'\n')
+            output_file.flush()
+
+    def report(progress):
+        print(f"  Thread {progress.thread_id}: {progress.completed_pages}/{progress.total_pages} pages, "
+              f"{progress.posts_found} posts")
+
+    success = True
+    try:
+        for thread_id in thread_ids:
+            if restart:
+                db_service.update_backfill_checkpoint(thread_id, 0)
+            print(f"Backfill du thread {thread_id}...")
+            progress = service.backfill_thread(thread_id, sink=sink, progress_callback=report)
+            if progress.status == 'failed':
+                print(f"ERREUR: {progress.error}")
+                success = False
+            else:
+                print(f"Thread {thread_id} terminé: {progress.posts_found} posts sur {progress.total_pages} pages")
+    finally:
+        if output_file:
+            output_file.close()
+
+    return success
+
+def main():
+    parser = argparse.ArgumentParser(description="Récupérer l'historique complet de threads")
+    parser.add_argument('thread_ids', nargs='*', type=int, help='IDs des threads à récupérer')
+    parser.add_argument('--all', action='store_true', help='Récupérer tous les threads')
+    parser.add_argument('--db-path', default='forum_tracker.db', help='Chemin vers la base de données')
+    parser.add_argument('--batch-size', type=int, help='Nombre de pages entre deux points de reprise')
+    parser.add_argument('--workers', type=int, help='Nombre de pages téléchargées en parallèle')
+    parser.add_argument('--output', help='Fichier NDJSON où écrire les posts récupérés')
+    parser.add_argument('--restart', action='store_true', help='Ignorer le point de reprise et repartir de la page 1')
+
+    args = parser.parse_args()
+    if not args.thread_ids and not args.all:
+        parser.error("Indiquez au moins un ID de thread ou --all")
+
+    success = backfill(args.thread_ids, args.db_path, args.all, args.batch_size, args.workers,
+                       args.output, args.restart)
+    if not success:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
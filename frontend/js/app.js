@@ -4,8 +4,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const threadsTable = document.getElementById('threads-table').querySelector('tbody');
     const statusMessage = document.getElementById('status-message');
     const resultsContainer = document.getElementById('results-container');
-    const performersPagination = document.getElementById('performers-pagination');
-    const performersPerPage = document.getElementById('performers-per-page');
+    const performersViewport = document.getElementById('performers-viewport');
+    const performersCount = document.getElementById('performers-count');
     
     // Buttons
     const savePerformerBtn = document.getElementById('savePerformerBtn');
@@ -23,24 +23,58 @@ document.addEventListener('DOMContentLoaded', function() {
     // State variables
     let currentPerformerId = null;
     let currentPerformerName = null;
-    let allPerformers = [];
+    const watchedJobs = {};  // Check job ID -> label, followed through the live events
+    let livePostsReceived = 0;
     
-    // Pagination state
-    const paginationState = {
-        currentPage: 1,
-        itemsPerPage: parseInt(performersPerPage.value) || 10
+    // Performer list: pages are fetched as the list is scrolled and only the visible rows are rendered
+    const PERFORMERS_PAGE_SIZE = 200;
+    const PERFORMERS_OVERSCAN = 10;        // Rows rendered above and below the viewport
+    const PERFORMERS_PREFETCH_ROWS = 100;  // Next page fetched when this close to the last loaded row
+    const performerList = {
+        items: [],           // Loaded performers, ordered by ID
+        index: new Map(),    // Performer ID -> position in items
+        rows: new Map(),     // Performer ID -> rendered row
+        nextCursor: null,
+        complete: false,     // All pages loaded
+        loading: false,
+        generation: 0,       // Incremented on reload, to ignore the pages of a previous load
+        rowHeight: 49,       // Measured after the first render
+        renderScheduled: false
     };
+    const topSpacer = createSpacerRow();
+    const bottomSpacer = createSpacerRow();
+    const loadingRow = document.createElement('tr');
+    loadingRow.innerHTML = '<td colspan="5" class="text-center text-muted">Loading more performers...</td>';
     
     // Load performers when page loads
     loadPerformers();
     
+    // Subscribe to the live events
+    const eventSource = subscribeToEvents();
+    
     // Event Listeners
     
-    // Pagination items per page change
-    performersPerPage.addEventListener('change', function() {
-        paginationState.itemsPerPage = parseInt(this.value) || 10;
-        paginationState.currentPage = 1; // Reset to first page
-        renderPerformers(allPerformers);
+    // Render the rows brought into view
+    performersViewport.addEventListener('scroll', scheduleRenderPerformers, { passive: true });
+    window.addEventListener('resize', scheduleRenderPerformers);
+    
+    // Performer row buttons (delegated: the rows are created and recycled while scrolling)
+    performersTable.addEventListener('change', function(e) {
+        if (e.target.classList.contains('performer-active-toggle')) {
+            updatePerformerStatus(e.target.dataset.id, e.target.checked);
+        }
+    });
+    
+    performersTable.addEventListener('click', function(e) {
+        const viewButton = e.target.closest('.view-threads-btn');
+        if (viewButton) {
+            viewPerformerThreads(viewButton.dataset.id, findPerformer(viewButton.dataset.id).name);
+            return;
+        }
+        const deleteButton = e.target.closest('.delete-performer-btn');
+        if (deleteButton && confirm('Are you sure you want to delete this performer? This will also delete all associated threads.')) {
+            deletePerformer(deleteButton.dataset.id);
+        }
     });
     
     // Add Performer
@@ -92,173 +126,215 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Helper Functions
     
-    // Load performers from API
-    function loadPerformers() {
-        setStatus('Loading performers...', 'info');
+    // Load the next page of performers (summary mode: thread counts instead of the threads)
+    function loadNextPerformersPage() {
+        if (performerList.loading || performerList.complete) {
+            return;
+        }
+        performerList.loading = true;
+        const generation = performerList.generation;
         
-        fetch('/api/performers')
+        let url = `/api/performers?summary=1&limit=${PERFORMERS_PAGE_SIZE}`;
+        if (performerList.nextCursor) {
+            url += `&cursor=${encodeURIComponent(performerList.nextCursor)}`;
+        }
+        
+        fetch(url)
             .then(response => response.json())
             .then(data => {
+                if (generation !== performerList.generation) {
+                    return; // The list was reloaded meanwhile
+                }
+                performerList.loading = false;
                 if (data.success) {
-                    allPerformers = data.performers;
-                    renderPerformers(allPerformers);
+                    data.performers.forEach(performer => {
+                        performerList.index.set(performer.id, performerList.items.length);
+                        performerList.items.push(performer);
+                    });
+                    performerList.nextCursor = data.next_cursor;
+                    performerList.complete = !data.next_cursor;
+                    renderPerformers();
                     setStatus('Performers loaded successfully', 'success');
                 } else {
                     setStatus('Failed to load performers: ' + data.error, 'danger');
                 }
             })
             .catch(error => {
+                if (generation === performerList.generation) {
+                    performerList.loading = false;
+                }
                 setStatus('Error loading performers: ' + error.message, 'danger');
             });
     }
     
-    // Render performers table
-    function renderPerformers(performers) {
-        performersTable.innerHTML = '';
+    // Reload the performer list from the first page
+    function loadPerformers() {
+        setStatus('Loading performers...', 'info');
+        performerList.generation++;
+        performerList.items = [];
+        performerList.index = new Map();
+        performerList.rows = new Map();
+        performerList.nextCursor = null;
+        performerList.complete = false;
+        performerList.loading = false;
+        performersViewport.scrollTop = 0;
+        loadNextPerformersPage();
+    }
+    
+    // Render the performer rows on the next animation frame (scroll, resize)
+    function scheduleRenderPerformers() {
+        if (!performerList.renderScheduled) {
+            performerList.renderScheduled = true;
+            requestAnimationFrame(() => {
+                performerList.renderScheduled = false;
+                renderPerformers();
+            });
+        }
+    }
+    
+    // Render only the rows visible in the viewport, between two spacer rows
+    function renderPerformers() {
+        const items = performerList.items;
+        performersCount.textContent = `${items.length}${performerList.complete ? '' : '+'} performer${items.length === 1 ? '' : 's'}`;
         
-        if (performers.length === 0) {
+        if (items.length === 0) {
             const row = document.createElement('tr');
-            row.innerHTML = '<td colspan="5" class="text-center">No performers found</td>';
-            performersTable.appendChild(row);
-            
-            // Clear pagination
-            renderPagination(0, 1);
+            row.innerHTML = `<td colspan="5" class="text-center">${performerList.complete ? 'No performers found' : 'Loading performers...'}</td>`;
+            performersTable.replaceChildren(row);
+            performerList.rows = new Map();
             return;
         }
         
-        // Calculate pagination
-        const totalPages = Math.ceil(performers.length / paginationState.itemsPerPage);
-        if (paginationState.currentPage > totalPages) {
-            paginationState.currentPage = totalPages;
+        const rowHeight = performerList.rowHeight;
+        // The viewport shrinks to its content while few rows are rendered: the window height is the upper bound
+        const viewportHeight = Math.max(performersViewport.clientHeight, window.innerHeight);
+        let first = Math.max(0, Math.floor(performersViewport.scrollTop / rowHeight) - PERFORMERS_OVERSCAN);
+        first -= first % 2; // Keep the stripes of the rows in place
+        const last = Math.min(items.length, first + Math.ceil(viewportHeight / rowHeight) + 2 * PERFORMERS_OVERSCAN);
+        
+        // Rows already rendered are reused, only the new ones are built
+        const rows = new Map();
+        for (let i = first; i < last; i++) {
+            const performer = items[i];
+            rows.set(performer.id, performerList.rows.get(performer.id) || createPerformerRow(performer));
         }
+        performerList.rows = rows;
         
-        // Get current page data
-        const startIndex = (paginationState.currentPage - 1) * paginationState.itemsPerPage;
-        const endIndex = Math.min(startIndex + paginationState.itemsPerPage, performers.length);
-        const currentPageData = performers.slice(startIndex, endIndex);
-        
-        // Render table rows
-        currentPageData.forEach(performer => {
-            const row = document.createElement('tr');
-            row.innerHTML = `
-                <td>${performer.id}</td>
-                <td>${performer.name}</td>
-                <td>
-                    <div class="form-check form-switch">
-                        <input class="form-check-input performer-active-toggle" type="checkbox" 
-                            data-id="${performer.id}" ${performer.is_active ? 'checked' : ''}>
-                    </div>
-                </td>
-                <td>
-                    <button class="btn btn-sm btn-info view-threads-btn" data-id="${performer.id}" data-name="${performer.name}">
-                        View Threads (${performer.threads.length})
-                    </button>
-                </td>
-                <td>
-                    <button class="btn btn-sm btn-danger delete-performer-btn" data-id="${performer.id}">
-                        Delete
-                    </button>
-                </td>
-            `;
-            performersTable.appendChild(row);
-        });
-        
-        // Render pagination
-        renderPagination(performers.length, paginationState.currentPage);
-        
-        // Add event listeners to buttons
-        document.querySelectorAll('.performer-active-toggle').forEach(toggle => {
-            toggle.addEventListener('change', function() {
-                const performerId = this.dataset.id;
-                const isActive = this.checked;
-                updatePerformerStatus(performerId, isActive);
-            });
-        });
+        topSpacer.firstChild.style.height = `${first * rowHeight}px`;
+        bottomSpacer.firstChild.style.height = `${(items.length - last) * rowHeight}px`;
+        const children = [topSpacer, ...rows.values(), bottomSpacer];
+        if (!performerList.complete) {
+            children.push(loadingRow);
+        }
+        performersTable.replaceChildren(...children);
         
-        document.querySelectorAll('.view-threads-btn').forEach(button => {
-            button.addEventListener('click', function() {
-                const performerId = this.dataset.id;
-                const performerName = this.dataset.name;
-                viewPerformerThreads(performerId, performerName);
-            });
-        });
+        // Measure the actual row height once rows are displayed
+        const sample = rows.values().next().value;
+        if (sample && sample.offsetHeight && sample.offsetHeight !== rowHeight) {
+            performerList.rowHeight = sample.offsetHeight;
+            scheduleRenderPerformers();
+        }
         
-        document.querySelectorAll('.delete-performer-btn').forEach(button => {
-            button.addEventListener('click', function() {
-                const performerId = this.dataset.id;
-                if (confirm('Are you sure you want to delete this performer? This will also delete all associated threads.')) {
-                    deletePerformer(performerId);
-                }
-            });
-        });
+        // Fetch the next page before the end of the loaded rows is reached
+        if (!performerList.complete && last >= items.length - PERFORMERS_PREFETCH_ROWS) {
+            loadNextPerformersPage();
+        }
     }
     
-    // Render pagination
-    function renderPagination(totalItems, currentPage) {
-        performersPagination.innerHTML = '';
-        
-        const totalPages = Math.ceil(totalItems / paginationState.itemsPerPage);
-        
-        if (totalPages <= 1) {
+    // Spacer row standing for the rows that are not rendered
+    function createSpacerRow() {
+        const row = document.createElement('tr');
+        row.className = 'performer-spacer';
+        row.innerHTML = '<td colspan="5"></td>';
+        return row;
+    }
+    
+    // Build the row of a performer
+    function createPerformerRow(performer) {
+        const row = document.createElement('tr');
+        row.className = 'performer-row';
+        row.dataset.id = performer.id;
+        row.innerHTML = `
+            <td>${performer.id}</td>
+            <td>${escapeHtml(performer.name)}</td>
+            <td>
+                <div class="form-check form-switch">
+                    <input class="form-check-input performer-active-toggle" type="checkbox" 
+                        data-id="${performer.id}" ${performer.is_active ? 'checked' : ''}>
+                </div>
+            </td>
+            <td>
+                <button class="btn btn-sm btn-info view-threads-btn" data-id="${performer.id}">
+                    View Threads (${performer.thread_count})
+                </button>
+            </td>
+            <td>
+                <button class="btn btn-sm btn-danger delete-performer-btn" data-id="${performer.id}">
+                    Delete
+                </button>
+            </td>
+        `;
+        return row;
+    }
+    
+    // Get a loaded performer by ID
+    function findPerformer(performerId) {
+        const position = performerList.index.get(Number(performerId));
+        return position === undefined ? undefined : performerList.items[position];
+    }
+    
+    // Update a loaded performer and its row only, if it is rendered
+    function patchPerformer(performerId, changes) {
+        const performer = findPerformer(performerId);
+        if (!performer) {
             return;
         }
-        
-        // Previous button
-        const prevLi = document.createElement('li');
-        prevLi.className = `page-item ${currentPage === 1 ? 'disabled' : ''}`;
-        prevLi.innerHTML = `
-            <a class="page-link" href="#" aria-label="Previous" data-page="${currentPage - 1}">
-                <span aria-hidden="true">&laquo;</span>
-            </a>
-        `;
-        performersPagination.appendChild(prevLi);
-        
-        // Page numbers
-        let startPage = Math.max(1, currentPage - 2);
-        let endPage = Math.min(totalPages, startPage + 4);
-        
-        // Adjust if we're near the end
-        if (endPage - startPage < 4) {
-            startPage = Math.max(1, endPage - 4);
+        Object.assign(performer, changes);
+        const row = performerList.rows.get(performer.id);
+        if (row) {
+            const newRow = createPerformerRow(performer);
+            row.replaceWith(newRow);
+            performerList.rows.set(performer.id, newRow);
         }
-        
-        for (let i = startPage; i <= endPage; i++) {
-            const pageLi = document.createElement('li');
-            pageLi.className = `page-item ${i === currentPage ? 'active' : ''}`;
-            pageLi.innerHTML = `
-                <a class="page-link" href="#" data-page="${i}">${i}</a>
-            `;
-            performersPagination.appendChild(pageLi);
+    }
+    
+    // Update the thread count shown for a performer
+    function adjustThreadCount(performerId, delta) {
+        const performer = findPerformer(performerId);
+        if (performer) {
+            patchPerformer(performerId, { thread_count: performer.thread_count + delta });
         }
-        
-        // Next button
-        const nextLi = document.createElement('li');
-        nextLi.className = `page-item ${currentPage === totalPages ? 'disabled' : ''}`;
-        nextLi.innerHTML = `
-            <a class="page-link" href="#" aria-label="Next" data-page="${currentPage + 1}">
-                <span aria-hidden="true">&raquo;</span>
-            </a>
-        `;
-        performersPagination.appendChild(nextLi);
-        
-        // Remove any existing event listeners (important!)
-        document.querySelectorAll('#performers-pagination .page-link').forEach(link => {
-            const newLink = link.cloneNode(true);
-            link.parentNode.replaceChild(newLink, link);
-        });
-        
-        // Add event listeners to pagination links
-        document.querySelectorAll('#performers-pagination .page-link').forEach(link => {
-            link.addEventListener('click', function(e) {
-                e.preventDefault();
-                const page = parseInt(this.dataset.page);
-                if (page && page > 0 && page <= totalPages) {
-                    console.log(`Changing page to ${page}`); // Debug log
-                    paginationState.currentPage = page;
-                    renderPerformers(allPerformers);
-                }
-            });
-        });
+    }
+    
+    // Add a created performer at the end of the list, if the last page is loaded
+    function appendPerformer(performer) {
+        if (!performerList.complete) {
+            return; // It will come with the last page
+        }
+        performerList.index.set(performer.id, performerList.items.length);
+        performerList.items.push(performer);
+        renderPerformers();
+    }
+    
+    // Remove a deleted performer from the list
+    function removePerformer(performerId) {
+        const position = performerList.index.get(Number(performerId));
+        if (position === undefined) {
+            return;
+        }
+        performerList.items.splice(position, 1);
+        performerList.index.delete(Number(performerId));
+        for (let i = position; i < performerList.items.length; i++) {
+            performerList.index.set(performerList.items[i].id, i);
+        }
+        renderPerformers();
+    }
+    
+    // Escape a text inserted in HTML
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
     }
     
     // Add new performer
@@ -282,7 +358,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 addPerformerModal.hide();
                 document.getElementById('performerName').value = '';
                 document.getElementById('isActive').checked = true;
-                loadPerformers();
+                appendPerformer(Object.assign(data.performer, { thread_count: data.performer.threads.length }));
             } else {
                 setStatus('Failed to add performer: ' + data.error, 'danger');
             }
@@ -309,14 +385,15 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             if (data.success) {
                 setStatus('Performer updated successfully', 'success');
+                patchPerformer(performerId, { is_active: data.performer.is_active });
             } else {
                 setStatus('Failed to update performer: ' + data.error, 'danger');
-                loadPerformers(); // Reload to reset the toggle
+                patchPerformer(performerId, {}); // Re-render the row to reset the toggle
             }
         })
         .catch(error => {
             setStatus('Error updating performer: ' + error.message, 'danger');
-            loadPerformers(); // Reload to reset the toggle
+            patchPerformer(performerId, {}); // Re-render the row to reset the toggle
         });
     }
     
@@ -331,7 +408,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             if (data.success) {
                 setStatus('Performer deleted successfully', 'success');
-                loadPerformers();
+                removePerformer(performerId);
             } else {
                 setStatus('Failed to delete performer: ' + data.error, 'danger');
             }
@@ -388,7 +465,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     </a>
                 </td>
                 <td>${thread.forum_type}</td>
-                <td>${lastCheck}</td>
+                <td class="thread-last-check" data-thread-id="${thread.id}">${lastCheck}</td>
                 <td>
                     <button class="btn btn-sm btn-primary check-thread-btn" data-id="${thread.id}">
                         Check
@@ -438,6 +515,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 setStatus('Thread added successfully', 'success');
                 addThreadModal.hide();
                 document.getElementById('threadUrl').value = '';
+                adjustThreadCount(performerId, 1);
                 viewPerformerThreads(performerId, currentPerformerName);
             } else {
                 setStatus('Failed to add thread: ' + data.error, 'danger');
@@ -459,6 +537,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             if (data.success) {
                 setStatus('Thread deleted successfully', 'success');
+                adjustThreadCount(currentPerformerId, -1);
                 viewPerformerThreads(currentPerformerId, currentPerformerName);
             } else {
                 setStatus('Failed to delete thread: ' + data.error, 'danger');
@@ -471,95 +550,136 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Check thread for new posts
     function checkThread(threadId) {
-        setStatus('Checking thread...', 'info');
         resultsContainer.innerHTML = '<p class="text-center">Checking thread for new posts...</p>';
-        
-        fetch(`/api/check/thread/${threadId}`)
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    if (data.new_posts && data.new_posts.length > 0) {
-                        setStatus(`Check completed: Found ${data.new_posts.length} new posts`, 'success');
-                    displayResults(data.new_posts);
-                } else {
-                        setStatus('Check completed: No new posts found', 'info');
-                        resultsContainer.innerHTML = '<p class="text-muted">No new posts found.</p>';
-                    }
-                } else {
-                    setStatus('Failed to check thread: ' + data.error, 'danger');
-                    resultsContainer.innerHTML = '<p class="text-danger">Error: ' + data.error + '</p>';
-                }
-            })
-            .catch(error => {
-                setStatus('Error checking thread: ' + error.message, 'danger');
-                resultsContainer.innerHTML = '<p class="text-danger">Error: ' + error.message + '</p>';
-                console.error('Error checking thread:', error);
-            });
+        startCheck(`/api/check/thread/${threadId}`, 'thread');
     }
     
     // Check all threads of a performer
     function checkPerformerThreads(performerId) {
-        setStatus('Checking performer threads...', 'info');
         resultsContainer.innerHTML = '<p class="text-center">Checking all threads for new posts...</p>';
+        startCheck(`/api/check/performer/${performerId}`, 'performer threads');
+    }
+    
+    // Check all threads
+    function checkAllThreads() {
+        resultsContainer.innerHTML = '<p class="text-center">Checking all threads for new posts...</p>';
+        startCheck('/api/check/all', 'threads');
+    }
+    
+    // Live events (new posts, checked threads, check progress)
+    function subscribeToEvents() {
+        if (!window.EventSource) {
+            return null;
+        }
+        const source = new EventSource('/api/events');
+        
+        source.addEventListener('new_post', function(e) {
+            const data = JSON.parse(e.data);
+            livePostsReceived++;
+            displayLivePost(data.post, data.performer_name);
+        });
+        
+        source.addEventListener('thread_checked', function(e) {
+            const data = JSON.parse(e.data);
+            document.querySelectorAll(`.thread-last-check[data-thread-id="${data.thread_id}"]`).forEach(cell => {
+                cell.textContent = new Date().toLocaleString();
+            });
+            if (data.status === 'failed') {
+                console.warn(`Check of thread ${data.thread_url} failed: ${data.error}`);
+            }
+        });
         
-        fetch(`/api/check/performer/${performerId}`)
+        source.addEventListener('cycle_progress', function(e) {
+            const data = JSON.parse(e.data);
+            const label = data.job_id ? watchedJobs[data.job_id] : 'threads (scheduled check)';
+            if (!label) {
+                return;
+            }
+            
+            if (data.status === 'running') {
+                setStatus(`Checking ${label}... ${data.completed_threads}/${data.total_threads} threads, ` +
+                          `${data.new_posts} new posts`, 'info');
+                return;
+            }
+            
+            if (data.job_id) {
+                delete watchedJobs[data.job_id];
+                if (data.status === 'failed' || data.new_posts > livePostsReceived) {
+                    // Error, or posts reused from a recent check without new_post events
+                    pollCheckJob(data.job_id, label);
+                    return;
+                }
+            }
+            if (data.new_posts > 0) {
+                setStatus(`Check ${data.status}: Found ${data.new_posts} new posts`, 'success');
+            } else {
+                setStatus(`Check ${data.status}: No new posts found`, 'info');
+                if (data.job_id && !document.getElementById('live-posts-header')) {
+                    resultsContainer.innerHTML = '<p class="text-muted">No new posts found.</p>';
+                }
+            }
+        });
+        
+        return source;
+    }
+    
+    // Start a check job on the server and follow it through the live events (or by polling)
+    function startCheck(url, label) {
+        setStatus(`Checking ${label}...`, 'info');
+        
+        fetch(url, { method: 'POST' })
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    if (data.new_posts && data.new_posts.length > 0) {
-                        setStatus(`Check completed: Found ${data.new_posts.length} new posts`, 'success');
-                    displayResults(data.new_posts);
-                } else {
-                        setStatus('Check completed: No new posts found', 'info');
-                        resultsContainer.innerHTML = '<p class="text-muted">No new posts found.</p>';
+                    if (eventSource && eventSource.readyState === EventSource.OPEN) {
+                        watchedJobs[data.job.id] = label;
+                        livePostsReceived = 0;
+                    } else {
+                        pollCheckJob(data.job.id, label);
                     }
                 } else {
-                    setStatus('Failed to check performer threads: ' + data.error, 'danger');
+                    setStatus(`Failed to check ${label}: ` + data.error, 'danger');
                     resultsContainer.innerHTML = '<p class="text-danger">Error: ' + data.error + '</p>';
                 }
             })
             .catch(error => {
-                setStatus('Error checking performer threads: ' + error.message, 'danger');
+                setStatus(`Error checking ${label}: ` + error.message, 'danger');
                 resultsContainer.innerHTML = '<p class="text-danger">Error: ' + error.message + '</p>';
-                console.error('Error checking performer threads:', error);
+                console.error(`Error checking ${label}:`, error);
             });
     }
     
-    // Check all threads
-    function checkAllThreads() {
-        setStatus('Checking all threads...', 'info');
-        resultsContainer.innerHTML = '<p class="text-center">Checking all threads for new posts...</p>';
-        
-        fetch('/api/check/all')
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Server responded with status: ${response.status}`);
-                }
-                return response.json();
-            })
+    // Poll a check job until it is finished
+    function pollCheckJob(jobId, label) {
+        fetch(`/api/jobs/${jobId}`)
+            .then(response => response.json())
             .then(data => {
-                console.log('Check all response:', data); // Debug log
+                if (!data.success) {
+                    throw new Error(data.error || 'Unknown error');
+                }
+                const job = data.job;
+                if (job.status === 'pending' || job.status === 'running') {
+                    setStatus(`Checking ${label}... ${job.completed_threads}/${job.total_threads} threads, ` +
+                              `${job.new_posts} new posts`, 'info');
+                    setTimeout(() => pollCheckJob(jobId, label), 1000);
+                    return;
+                }
                 
-                if (data.success) {
-                    if (data.new_posts && Array.isArray(data.new_posts) && data.new_posts.length > 0) {
-                        console.log(`Found ${data.new_posts.length} new posts. First post:`, data.new_posts[0]); // Debug log
-                        setStatus(`Check completed: Found ${data.new_posts.length} new posts`, 'success');
-                    displayResults(data.new_posts);
-                } else {
-                        console.log('No new posts found in response:', data); // Debug log
-                        setStatus('Check completed: No new posts found', 'info');
-                        resultsContainer.innerHTML = '<p class="text-muted">No new posts found.</p>';
-                    }
+                if (job.status === 'failed') {
+                    setStatus(`Failed to check ${label}: ` + job.error, 'danger');
+                    resultsContainer.innerHTML = '<p class="text-danger">Error: ' + job.error + '</p>';
+                } else if (job.results.length > 0) {
+                    setStatus(`Check ${job.status}: Found ${job.results.length} new posts`, 'success');
+                    displayResults(job.results);
                 } else {
-                    console.error('API reported failure:', data.error); // Debug log
-                    setStatus('Failed to check threads: ' + (data.error || 'Unknown error'), 'danger');
-                    resultsContainer.innerHTML = '<p class="text-danger">Error: ' + (data.error || 'Unknown error') + '</p>';
+                    setStatus(`Check ${job.status}: No new posts found`, 'info');
+                    resultsContainer.innerHTML = '<p class="text-muted">No new posts found.</p>';
                 }
             })
             .catch(error => {
-                console.error('Error checking all threads:', error); // Debug log
-                setStatus('Error checking threads: ' + error.message, 'danger');
+                setStatus(`Error checking ${label}: ` + error.message, 'danger');
                 resultsContainer.innerHTML = '<p class="text-danger">Error: ' + error.message + '</p>';
+                console.error(`Error polling check job ${jobId}:`, error);
             });
     }
     
@@ -600,61 +720,7 @@ document.addEventListener('DOMContentLoaded', function() {
         resultsContainer.appendChild(header);
         
         posts.forEach((post, index) => {
-            const postElement = document.createElement('div');
-            postElement.className = 'result-item';
-            
-            let postDate = 'Unknown date';
-            if (post.date) {
-                try {
-                    postDate = new Date(post.date).toLocaleString();
-                } catch (e) {
-                    // Keep default
-                }
-            }
-            
-            let downloadLinksHtml = '';
-            if (post.download_links && post.download_links.length > 0) {
-                downloadLinksHtml = '<h6>Download Links:</h6><div>';
-                post.download_links.forEach(link => {
-                    downloadLinksHtml += `<a href="${link}" target="_blank" class="download-link">${link}</a>`;
-                });
-                downloadLinksHtml += '</div>';
-            } else {
-                downloadLinksHtml = '<p class="text-muted small">No download links found in this post.</p>';
-            }
-            
-            let imagesHtml = '';
-            if (post.images && post.images.length > 0) {
-                imagesHtml = '<h6>Images:</h6><div class="row">';
-                post.images.forEach(image => {
-                    imagesHtml += `
-                        <div class="col-md-3 col-sm-4 col-6 mb-2">
-                            <a href="${image}" target="_blank">
-                                <img src="${image}" class="img-thumbnail" alt="Post image" style="max-height: 100px; width: auto;">
-                            </a>
-                        </div>
-                    `;
-                });
-                imagesHtml += '</div>';
-            }
-            
-            postElement.innerHTML = `
-                <div class="card mb-3">
-                    <div class="card-header d-flex justify-content-between align-items-center">
-                        <h5 class="mb-0">Post #${post.post_id} by ${post.author}</h5>
-                    <span class="text-muted">${postDate}</span>
-                </div>
-                    <div class="card-body">
-                        <div class="post-content mb-3">
-                            <p>${post.content.substring(0, 300)}${post.content.length > 300 ? '...' : ''}</p>
-                </div>
-                ${downloadLinksHtml}
-                ${imagesHtml}
-                    </div>
-                </div>
-            `;
-            
-            resultsContainer.appendChild(postElement);
+            resultsContainer.appendChild(renderPost(post));
             
             // Add a divider except for the last item
             if (index < posts.length - 1) {
@@ -664,6 +730,85 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Add a post received from the live events at the top of the results
+    function displayLivePost(post, performerName) {
+        let header = document.getElementById('live-posts-header');
+        if (!header) {
+            resultsContainer.innerHTML = '';
+            header = document.createElement('div');
+            header.id = 'live-posts-header';
+            header.className = 'alert alert-info mb-3';
+            header.dataset.count = '0';
+            resultsContainer.appendChild(header);
+        }
+        header.dataset.count = String(parseInt(header.dataset.count) + 1);
+        header.innerHTML = `<strong>Found ${header.dataset.count} new posts</strong>`;
+        
+        const postElement = renderPost(post, performerName);
+        header.after(postElement);
+        if (postElement.nextElementSibling) {
+            postElement.after(document.createElement('hr'));
+        }
+    }
+    
+    // Build the card of a post
+    function renderPost(post, performerName) {
+        const postElement = document.createElement('div');
+        postElement.className = 'result-item';
+        
+        let postDate = 'Unknown date';
+        if (post.date) {
+            try {
+                postDate = new Date(post.date).toLocaleString();
+            } catch (e) {
+                // Keep default
+            }
+        }
+        
+        let downloadLinksHtml = '';
+        if (post.download_links && post.download_links.length > 0) {
+            downloadLinksHtml = '<h6>Download Links:</h6><div>';
+            post.download_links.forEach(link => {
+                downloadLinksHtml += `<a href="${link}" target="_blank" class="download-link">${link}</a>`;
+            });
+            downloadLinksHtml += '</div>';
+        } else {
+            downloadLinksHtml = '<p class="text-muted small">No download links found in this post.</p>';
+        }
+        
+        let imagesHtml = '';
+        if (post.images && post.images.length > 0) {
+            imagesHtml = '<h6>Images:</h6><div class="row">';
+            post.images.forEach(image => {
+                imagesHtml += `
+                    <div class="col-md-3 col-sm-4 col-6 mb-2">
+                        <a href="${image}" target="_blank">
+                            <img src="${image}" class="img-thumbnail" alt="Post image" style="max-height: 100px; width: auto;">
+                        </a>
+                    </div>
+                `;
+            });
+            imagesHtml += '</div>';
+        }
+        
+        postElement.innerHTML = `
+            <div class="card mb-3">
+                <div class="card-header d-flex justify-content-between align-items-center">
+                    <h5 class="mb-0">${performerName ? performerName + ' - ' : ''}Post #${post.post_id} by ${post.author}</h5>
+                    <span class="text-muted">${postDate}</span>
+                </div>
+                <div class="card-body">
+                    <div class="post-content mb-3">
+                        <p>${post.content.substring(0, 300)}${post.content.length > 300 ? '...' : ''}</p>
+                    </div>
+                    ${downloadLinksHtml}
+                    ${imagesHtml}
+                </div>
+            </div>
+        `;
+        return postElement;
+    }
+    
     // Set status message
     function setStatus(message, type = 'info') {
         statusMessage.className = `alert alert-${type}`;
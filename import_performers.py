@@ -1,18 +1,218 @@
 #!/usr/bin/env python3
 """
 Script pour importer les performers depuis un fichier JSON
+
+L'import est ensembliste : les performers et threads existants sont chargés en une
+fois, les différences (ajouts, mises à jour, désactivations) sont calculées en
+mémoire puis appliquées dans une seule transaction par insertions et mises à jour
+groupées. Le fichier est lu en flux, ce qui permet d'importer de très grandes listes.
 """
 
 import json
 import argparse
 import sys
+from sqlalchemy import insert, update
 from backend.models import init_db, Performer, Thread
 from backend.scrapers import detect_forum_type
 
-def import_performers(json_file, db_path):
+# Champs d'URL du fichier JSON et type de forum correspondant
+# (None : type détecté depuis l'URL)
+URL_FIELDS = [
+    ('url_psuzy', 'planetsuzy'),
+    # Ajouter d'autres types d'URL ici si nécessaire
+]
+
+# Caractères pouvant prolonger un nombre JSON
+NUMBER_CHARS = set('0123456789.eE+-')
+
+def iter_json_array(f, chunk_size=65536):
+    """
+    Lit les éléments d'un tableau JSON un par un, sans charger tout le fichier
+
+    Les éléments doivent être séparés par exactement une virgule, sans virgule
+    avant le premier ni après le dernier, comme le demande la syntaxe JSON.
+
+    Raises:
+        ValueError: Si le fichier n'est pas un tableau JSON valide
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    offset = 0  # Position du début du buffer dans le fichier
+    # Ce qui est attendu : 'start' ([), 'first' (élément ou ]), 'item' (élément), 'separator' (, ou ])
+    expected = 'start'
+    eof = False
+
+    while True:
+        # Sauter les blancs
+        while position < len(buffer) and buffer[position] in ' \t\r\n':
+            position += 1
+
+        if position < len(buffer):
+            char = buffer[position]
+            if expected == 'start':
+                if char != '[':
+                    raise ValueError("Le fichier JSON doit contenir un tableau")
+                expected = 'first'
+                position += 1
+                continue
+            if expected == 'separator':
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"',' ou ']' attendu à la position {offset + position}")
+                expected = 'item'
+                position += 1
+                continue
+            if char == ']':
+                if expected == 'first':
+                    return
+                raise ValueError(f"Virgule en trop avant ']' à la position {offset + position}")
+            if char == ',':
+                raise ValueError(f"Élément attendu à la position {offset + position}, ',' trouvée")
+
+            # Un élément n'est décodé que s'il est suivi d'autres caractères ou de la fin du fichier
+            if eof or len(buffer) - position > 1:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                    # Un nombre coupé par la fin du buffer ("-1" de "-1.5e3") n'est pas complet
+                    if eof or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+                        yield item
+                        position = end
+                        expected = 'separator'
+                        continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+
+        if eof:
+            raise ValueError("Tableau JSON incomplet")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        offset += position
+        buffer = buffer[position:] + chunk
+        position = 0
+
+def read_entries(json_file):
+    """
+    Lit le fichier JSON et normalise les entrées
+
+    Returns:
+        Tuple (entrées par nom, nombre d'entrées ignorées)
+    """
+    entries = {}
+    skipped = 0
+    with open(json_file, 'r', encoding='utf-8') as f:
+        for performer_data in iter_json_array(f):
+            name = performer_data.get('name') if isinstance(performer_data, dict) else None
+            if not name:
+                print("ERREUR: Un performer sans nom a été trouvé, ignoré.")
+                skipped += 1
+                continue
+
+            urls = []
+            for field, forum_type in URL_FIELDS:
+                url = performer_data.get(field)
+                if url:
+                    urls.append((forum_type or detect_forum_type(url), url))
+
+            # Un nom présent plusieurs fois : la dernière entrée l'emporte
+            entries[name] = {'is_active': bool(performer_data.get('active', False)), 'urls': urls}
+    return entries, skipped
+
+def compute_diff(session, entries, deactivate_missing=False):
+    """
+    Compare les entrées du fichier avec la base
+
+    Returns:
+        Dictionnaire des performers à créer, à mettre à jour, à désactiver et des threads à créer
+    """
+    performers = {name: (performer_id, is_active)
+                  for performer_id, name, is_active in session.query(Performer.id, Performer.name, Performer.is_active)}
+    threads = {(url, forum_type): performer_id
+               for url, forum_type, performer_id in session.query(Thread.url, Thread.forum_type, Thread.performer_id)}
+
+    diff = {'new_performers': [], 'updated_performers': [], 'deactivated_performers': [],
+            'new_threads': [], 'existing_threads': [], 'conflicting_threads': []}
+
+    for name, entry in entries.items():
+        existing = performers.get(name)
+        if existing is None:
+            diff['new_performers'].append({'name': name, 'is_active': entry['is_active']})
+        elif bool(existing[1]) != entry['is_active']:
+            diff['updated_performers'].append({'id': existing[0], 'name': name, 'is_active': entry['is_active']})
+
+        for forum_type, url in entry['urls']:
+            # Propriétaire : ID du performer, ou son nom s'il est créé par cet import
+            owner = threads.get((url, forum_type))
+            if owner is None:
+                diff['new_threads'].append({'performer_name': name, 'url': url, 'forum_type': forum_type})
+                # Une même URL n'est ajoutée qu'une fois
+                threads[(url, forum_type)] = existing[0] if existing else name
+            elif owner == (existing[0] if existing else name):
+                diff['existing_threads'].append({'performer_name': name, 'url': url})
+            else:
+                diff['conflicting_threads'].append({'performer_name': name, 'url': url})
+
+    if deactivate_missing:
+        for name, (performer_id, is_active) in performers.items():
+            if name not in entries and is_active:
+                diff['deactivated_performers'].append({'id': performer_id, 'name': name, 'is_active': False})
+
+    return diff
+
+def apply_diff(session, diff):
+    """
+    Applique les différences dans une seule transaction
+    """
+    try:
+        if diff['new_performers']:
+            session.execute(insert(Performer), diff['new_performers'])
+        updates = [{'id': p['id'], 'is_active': p['is_active']}
+                   for p in diff['updated_performers'] + diff['deactivated_performers']]
+        if updates:
+            session.execute(update(Performer), updates)
+
+        if diff['new_threads']:
+            # IDs des performers, y compris ceux qui viennent d'être insérés
+            ids = dict(session.query(Performer.name, Performer.id))
+            session.execute(insert(Thread), [
+                {'performer_id': ids[thread['performer_name']], 'url': thread['url'], 'forum_type': thread['forum_type']}
+                for thread in diff['new_threads']
+            ])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+def print_report(diff, skipped, dry_run):
+    """
+    Affiche le rapport d'importation
+    """
+    title = "Différences (simulation, rien n'a été modifié)" if dry_run else "Rapport d'importation"
+    print(f"\n{title}:")
+    for performer in diff['new_performers']:
+        print(f"  + performer '{performer['name']}' ({'actif' if performer['is_active'] else 'inactif'})")
+    for performer in diff['updated_performers']:
+        print(f"  ~ performer '{performer['name']}' -> {'actif' if performer['is_active'] else 'inactif'}")
+    for performer in diff['deactivated_performers']:
+        print(f"  - performer '{performer['name']}' désactivé (absent du fichier)")
+    for thread in diff['new_threads']:
+        print(f"  + thread '{thread['url']}' pour '{thread['performer_name']}'")
+    for thread in diff['conflicting_threads']:
+        print(f"  ! thread '{thread['url']}' déjà suivi pour un autre performer, ignoré")
+
+    print(f"- Performers ajoutés: {len(diff['new_performers'])}")
+    print(f"- Performers mis à jour: {len(diff['updated_performers'])}")
+    print(f"- Performers désactivés: {len(diff['deactivated_performers'])}")
+    print(f"- Threads ajoutés: {len(diff['new_threads'])}")
+    print(f"- Threads déjà présents: {len(diff['existing_threads'])}")
+    print(f"- Entrées ignorées: {skipped + len(diff['conflicting_threads'])}")
+
+def import_performers(json_file, db_path, dry_run=False, deactivate_missing=False):
     """
     Importe les performers depuis un fichier JSON
-    
+
     Format JSON attendu:
     [
         {
@@ -24,104 +224,42 @@ def import_performers(json_file, db_path):
     ]
     """
     print(f"Importation des performers depuis {json_file} vers {db_path}")
-    
-    # Charger le fichier JSON
+
+    # Lire le fichier JSON
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            performers_data = json.load(f)
+        entries, skipped = read_entries(json_file)
     except Exception as e:
         print(f"Erreur lors de la lecture du fichier JSON: {e}")
         return False
-    
+
     # Initialiser la base de données
     session = init_db(db_path)
-    
-    # Compteurs pour le rapport
-    performers_added = 0
-    performers_skipped = 0
-    threads_added = 0
-    
-    # Parcourir les performers
-    for performer_data in performers_data:
-        name = performer_data.get('name')
-        is_active = performer_data.get('active', False)
-        
-        if not name:
-            print("ERREUR: Un performer sans nom a été trouvé, ignoré.")
-            performers_skipped += 1
-            continue
-        
-        # Vérifier si le performer existe déjà
-        existing_performer = session.query(Performer).filter(Performer.name == name).first()
-        
-        if existing_performer:
-            print(f"Le performer '{name}' existe déjà, mise à jour des informations...")
-            existing_performer.is_active = is_active
-            performer = existing_performer
-            performers_skipped += 1
-        else:
-            # Créer le nouveau performer
-            performer = Performer(name=name, is_active=is_active)
-            session.add(performer)
-            performers_added += 1
-            print(f"Performer '{name}' ajouté.")
-        
-        # Commit pour obtenir l'ID du performer
-        session.commit()
-        
-        # Ajouter les URLs de thread si présentes
-        urls = []
-        
-        # PlanetSuzy URL
-        if 'url_psuzy' in performer_data and performer_data['url_psuzy']:
-            urls.append(('planetsuzy', performer_data['url_psuzy']))
-        
-        # Ajouter d'autres types d'URL ici si nécessaire
-        
-        # Ajouter les threads
-        for forum_type, url in urls:
-            # Vérifier si le thread existe déjà
-            existing_thread = session.query(Thread).filter(
-                Thread.performer_id == performer.id, 
-                Thread.url == url
-            ).first()
-            
-            if existing_thread:
-                print(f"  Thread '{url}' existe déjà pour '{name}'")
-                continue
-            
-            # Créer le nouveau thread
-            thread = Thread(
-                performer_id=performer.id,
-                url=url,
-                forum_type=forum_type
-            )
-            session.add(thread)
-            threads_added += 1
-            print(f"  Thread '{url}' ajouté pour '{name}'")
-    
-    # Commit final
-    session.commit()
-    
-    # Afficher le rapport
-    print("\nRapport d'importation:")
-    print(f"- Performers ajoutés: {performers_added}")
-    print(f"- Performers mis à jour/ignorés: {performers_skipped}")
-    print(f"- Threads ajoutés: {threads_added}")
-    print(f"- Total performers traités: {performers_added + performers_skipped}")
-    
+    try:
+        diff = compute_diff(session, entries, deactivate_missing)
+        if not dry_run:
+            apply_diff(session, diff)
+    except Exception as e:
+        print(f"Erreur lors de l'importation: {e}")
+        return False
+    finally:
+        session.close()
+
+    print_report(diff, skipped, dry_run)
     return True
 
 def main():
     parser = argparse.ArgumentParser(description="Importer des performers depuis un fichier JSON")
     parser.add_argument('json_file', help='Chemin vers le fichier JSON')
     parser.add_argument('--db-path', default='forum_tracker.db', help='Chemin vers la base de données')
-    
+    parser.add_argument('--dry-run', action='store_true', help='Afficher les différences sans modifier la base')
+    parser.add_argument('--deactivate-missing', action='store_true',
+                        help='Désactiver les performers actifs absents du fichier')
+
     args = parser.parse_args()
-    
-    success = import_performers(args.json_file, args.db_path)
+
+    success = import_performers(args.json_file, args.db_path, args.dry_run, args.deactivate_missing)
     if not success:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,7 +4,6 @@ Script pour exécuter le bot Telegram et gérer les callbacks
 """
 import os
 import sys
-import json
 import logging
 import asyncio
 from datetime import datetime
@@ -30,6 +29,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Importer les modules nécessaires du projet
 from backend.models import init_db, get_session, CallbackData
+from backend.serialization import loads
 from backend.services.myjdownloader import get_myjdownloader_service
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -53,9 +53,9 @@ class CallbackDataService:
             
             # Parse JSON data
             try:
-                data = json.loads(callback_data.data)
+                data = loads(callback_data.data)
                 return data
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 logger.error(f"Invalid JSON data for callback {callback_id}: {e}")
                 return None
                 
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# Modules of the project are imported as in the root scripts (backend.models, import_performers)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a new database file"""
+    return str(tmp_path / 'forum_tracker.db')
+
+@pytest.fixture
+def db_service(db_path):
+    """Database service of a new database"""
+    from backend.models import init_db
+    from backend.services import get_db_service
+    init_db(db_path).close()
+    service = get_db_service(db_path)
+    yield service
+    service.remove_session()
+
+@pytest.fixture
+def client(db_service, monkeypatch):
+    """Test client of the API, on a new database"""
+    from flask import Flask
+    from backend import api as api_module
+    from backend.serialization import FastJSONProvider
+    monkeypatch.setattr(api_module, 'db_service', db_service)
+    api_module.response_cache.clear()
+    app = Flask('test')
+    app.json = FastJSONProvider(app)
+    app.register_blueprint(api_module.api)
+    return app.test_client()
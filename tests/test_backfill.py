@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+from backend import backfill as backfill_module
+from backend.backfill import BackfillService
+from backend.scrapers.base import Page, Post
+
+class FakeScraper:
+    """Scraper of a thread whose pages hold the given posts"""
+
+    def __init__(self, pages):
+        self.pages = pages  # page number -> posts
+        self.max_parallel_pages = 1
+
+    def fetch_first_page(self):
+        return Page("http://forum.example/t1.html", "")
+
+    def parse_html(self, html):
+        return None
+
+    def get_last_page_number(self, soup):
+        return len(self.pages)
+
+    def fetch_pages_parallel(self, url, page_numbers):
+        pages = []
+        for number in page_numbers:
+            page = Page(f"{url}?page={number}")
+            page.posts = self.pages[number]
+            pages.append(page)
+        return pages
+
+    def add_video_qualities(self, posts):
+        pass
+
+class RecordingNotifications:
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, performer_name, message, *args, **kwargs):
+        self.sent.append((performer_name, message))
+
+def make_post(count):
+    return Post(str(1000 + count), datetime(2024, 1, 1), "author", f"post {count}", [], [], post_count=count)
+
+@pytest.fixture
+def thread_id(db_service):
+    db_service.create_performers([{'name': 'performer'}])
+    _, results, _ = db_service.create_threads(
+        [{'performer_id': 1, 'url': "http://forum.example/t1.html", 'forum_type': 'planetsuzy'}])
+    return results[0][0]['id']
+
+def run_backfill(db_service, thread_id, monkeypatch, pages):
+    monkeypatch.setattr(backfill_module, 'get_scraper', lambda *args: FakeScraper(pages))
+    notifications = RecordingNotifications()
+    progress = BackfillService(db_service, notifications, batch_size=2).backfill_thread(thread_id)
+    return progress, notifications.sent
+
+def test_summary_notification(db_service, thread_id, monkeypatch):
+    pages = {1: [make_post(1), make_post(2)], 2: [make_post(3)], 3: [make_post(4)]}
+    progress, sent = run_backfill(db_service, thread_id, monkeypatch, pages)
+
+    assert progress.status == 'completed'
+    assert progress.posts_found == 4
+    assert sent == [('performer', "Historique récupéré : 4 posts sur 3 pages")]
+
+def test_no_notification_without_posts(db_service, thread_id, monkeypatch):
+    progress, sent = run_backfill(db_service, thread_id, monkeypatch, {1: [], 2: []})
+
+    assert progress.status == 'completed'
+    assert progress.completed_pages == 2
+    assert sent == []
+
+def test_no_notification_when_already_backfilled(db_service, thread_id, monkeypatch):
+    pages = {1: [make_post(1)], 2: [make_post(2)]}
+    run_backfill(db_service, thread_id, monkeypatch, pages)
+
+    # Every page is already done: nothing is fetched nor reported
+    progress, sent = run_backfill(db_service, thread_id, monkeypatch, pages)
+    assert progress.status == 'completed'
+    assert progress.posts_found == 0
+    assert sent == []
@@ -0,0 +1,68 @@
+from sqlalchemy import event
+
+def count_statements(db_service):
+    """Count the SQL statements run on the engine of a database service"""
+    statements = []
+    event.listen(db_service.session.get_bind(), 'before_cursor_execute',
+                 lambda *args: statements.append(args[2]))
+    return statements
+
+def test_create_performers_reports_each_item(client):
+    response = client.post('/api/performers/batch', json={'performers': [
+        {'name': 'a'}, {'name': 'b', 'is_active': False}, {'name': 'a'}, {'name': ''}, 5]})
+
+    assert response.status_code == 207
+    data = response.get_json()
+    assert (data['created'], data['failed']) == (2, 3)
+    assert [result['success'] for result in data['results']] == [True, True, False, False, False]
+    assert data['results'][1]['performer'] == {'id': 2, 'name': 'b', 'is_active': False, 'threads': []}
+    assert data['results'][2]['error'] == "Performer a appears several times in the batch"
+
+def test_create_performers_atomic_creates_nothing_on_error(client):
+    client.post('/api/performers/batch', json=[{'name': 'a'}])
+
+    response = client.post('/api/performers/batch', json={'performers': [{'name': 'c'}, {'name': 'a'}], 'atomic': True})
+
+    assert response.status_code == 400
+    assert [result['error'] for result in response.get_json()['results']] == [
+        "Not created: another performer of the batch failed", "Performer a already exists"]
+    assert [p['name'] for p in client.get('/api/performers').get_json()['performers']] == ['a']
+
+def test_create_threads_detects_forum_type_and_rejects_invalid_items(client):
+    client.post('/api/performers/batch', json=[{'name': 'a'}])
+    client.post('/api/threads/batch', json=[{'performer_id': 1, 'url': 'http://www.planetsuzy.org/t0.html'}])
+
+    response = client.post('/api/threads/batch', json={'threads': [
+        {'performer_id': 1, 'url': 'http://www.planetsuzy.org/t1.html'},
+        {'performer_id': 1, 'url': 'http://www.planetsuzy.org/t0.html'},
+        {'performer_id': 9, 'url': 'http://www.planetsuzy.org/t2.html'},
+        {'performer_id': 1, 'url': 'https://example.com/t3'},
+        {'url': 'http://www.planetsuzy.org/t4.html'},
+    ]})
+
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['thread']['forum_type'] == 'planetsuzy'
+    assert [result['error'] for result in results[1:]] == [
+        "Thread http://www.planetsuzy.org/t0.html is already tracked (thread ID 1)",
+        "Performer with ID 9 not found",
+        "Could not detect forum type from URL: https://example.com/t3",
+        "performer_id is required",
+    ]
+
+def test_batch_statement_count_does_not_grow_with_the_batch(client, db_service):
+    client.post('/api/performers/batch', json=[{'name': 'a'}])
+    statements = count_statements(db_service)
+
+    response = client.post('/api/threads/batch', json=[
+        {'performer_id': 1, 'url': f'http://www.planetsuzy.org/t{i}.html'} for i in range(300)])
+    assert response.status_code == 201
+    thread_statements = len(statements)
+
+    statements.clear()
+    response = client.post('/api/performers/batch', json=[{'name': f'p{i}'} for i in range(200)])
+    assert response.status_code == 201
+
+    # Lookups and one multi-row insert, no reload of each created row
+    assert thread_statements < 10
+    assert len(statements) < 10
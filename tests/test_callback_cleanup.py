@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from backend.models import CallbackData
+from backend.services import db as db_module
+
+def add_callbacks(db_service, **expires_in):
+    now = datetime.utcnow()
+    for callback_id, minutes in expires_in.items():
+        db_service.session.add(CallbackData(callback_id=callback_id, data='{}',
+                                            expires_at=now + timedelta(minutes=minutes)))
+    db_service.session.commit()
+
+def test_cleanup_expired_callbacks(db_service):
+    add_callbacks(db_service, old=-10, older=-60, fresh=10)
+    writes = db_module._write_count
+
+    assert db_service.cleanup_expired_callbacks() == (2, "")
+    assert [callback.callback_id for callback in db_service.session.query(CallbackData)] == ['fresh']
+    # Counted as a write of this process
+    assert db_module._write_count == writes + 1
+
+def test_cleanup_without_expired_callbacks(db_service):
+    add_callbacks(db_service, fresh=10)
+    writes, version = db_module._write_count, db_service.data_version
+
+    assert db_service.cleanup_expired_callbacks() == (0, "")
+    assert db_module._write_count == writes
+    assert db_service.data_version == version
@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from backend.jobs import CheckRunRegistry
+from backend.pipeline import CheckJob
+from backend.scrapers.base import Post
+
+class FakePipeline:
+    """Pipeline keeping the submitted jobs, finished by the tests; the first submission can be held"""
+
+    def __init__(self, hold=False):
+        self.submitted = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def submit(self, job, use_cache=False):
+        self.entered.set()
+        assert self.release.wait(5)
+        self.submitted.append(job)
+        return job
+
+def make_job(thread_id):
+    return CheckJob(thread_id, f"http://forum.example/t{thread_id}.html", 'planetsuzy', None, 'performer')
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def make_registry(pipeline, ttl_seconds=3600):
+    return CheckRunRegistry(pipeline, SimpleNamespace(remove_session=lambda: None), ttl_seconds=ttl_seconds)
+
+def test_check_lifecycle():
+    pipeline = FakePipeline()
+    registry = make_registry(pipeline)
+    jobs = [make_job(1), make_job(2)]
+    notified = []
+
+    run = registry.start('performer', lambda: jobs, 7, listener=notified.append)
+    assert run.scope == 'performer' and run.target_id == 7
+    assert registry.get(run.id) is run
+    wait_until(lambda: len(pipeline.submitted) == 2)
+    assert run.to_dict()['completed_threads'] == 0
+
+    # Polled while the threads complete
+    jobs[0].new_posts = [Post('100', datetime(2024, 1, 1), "author", "post", [], [])]
+    jobs[0].finish()
+    assert registry.get(run.id).to_dict()['completed_threads'] == 1
+    jobs[1].error = "forum down"
+    jobs[1].finish()
+    wait_until(lambda: not run.running)
+
+    data = registry.get(run.id).to_dict()
+    assert data['status'] == 'completed' and data['finished_at']
+    assert [thread['status'] for thread in data['threads']] == ['completed', 'failed']
+    assert data['new_posts'] == 1
+    assert [(post['post_id'], post['thread_id']) for post in data['results']] == [('100', 1)]
+    assert notified == jobs + [None]
+    assert registry.list() == [run]
+
+def test_cancelled_check_skips_the_threads_not_submitted():
+    pipeline = FakePipeline(hold=True)
+    registry = make_registry(pipeline)
+    jobs = [make_job(1), make_job(2), make_job(3)]
+
+    run = registry.start('all', lambda: jobs)
+    assert pipeline.entered.wait(5)
+    assert registry.cancel(run.id)
+    pipeline.release.set()
+    wait_until(lambda: jobs[1].done and jobs[2].done)
+    jobs[0].finish()
+    wait_until(lambda: not run.running)
+
+    assert run.status == 'cancelled'
+    assert pipeline.submitted == [jobs[0]]
+    assert [thread['status'] for thread in run.to_dict()['threads']] == ['completed', 'cancelled', 'cancelled']
+    # Only a running check can be cancelled
+    assert not registry.cancel(run.id)
+    assert not registry.cancel('unknown')
+
+def test_failed_check():
+    def make_jobs():
+        raise RuntimeError("database locked")
+    registry = make_registry(FakePipeline())
+    notified = []
+
+    run = registry.start('all', make_jobs, listener=notified.append)
+    wait_until(lambda: not run.running)
+    assert run.status == 'failed'
+    assert run.error == "database locked"
+    assert notified == [None]
+
+def test_finished_checks_expire():
+    pipeline = FakePipeline()
+    registry = make_registry(pipeline, ttl_seconds=60)
+    finished = registry.start('thread', lambda: [], 1)
+    wait_until(lambda: not finished.running)
+    job = make_job(2)
+    running = registry.start('thread', lambda: [job], 2)
+    wait_until(lambda: pipeline.submitted == [job])
+
+    # Only the checks finished for more than ttl_seconds are removed
+    finished.finished_at -= timedelta(seconds=61)
+    running.created_at -= timedelta(seconds=61)
+    assert registry.get(finished.id) is None
+    assert registry.list() == [running]
+    job.finish()
+    wait_until(lambda: not running.running)
+    assert registry.get(running.id) is running
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from backend.models import get_engine
+
+@contextmanager
+def count_queries(db_path):
+    """Collect the SQL statements run on the database while the block runs"""
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engine = get_engine(db_path)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def create_data(db_service, performers=20, threads_per_performer=3):
+    success, _, error = db_service.create_performers(
+        [{'name': f"performer{i}", 'is_active': i % 4 != 0} for i in range(1, performers + 1)])
+    assert success, error
+    success, _, error = db_service.create_threads(
+        [{'performer_id': performer_id, 'url': f"http://forum.example/t{performer_id}-{i}.html",
+          'forum_type': 'planetsuzy'}
+         for performer_id in range(1, performers + 1) for i in range(threads_per_performer)])
+    assert success, error
+    # A new session: nothing is already loaded
+    db_service.remove_session()
+
+def test_performer_listing_with_threads(db_service, db_path):
+    create_data(db_service)
+    with count_queries(db_path) as statements:
+        performers, _ = db_service.list_performers()
+        items = [performer.to_dict() for performer in performers]
+    assert len(items) == 20 and all(len(item['threads']) == 3 for item in items)
+    # The performers, then the threads of all of them
+    assert len(statements) == 2
+
+def test_performer_page_with_threads(db_service, db_path):
+    create_data(db_service)
+    with count_queries(db_path) as statements:
+        performers, _ = db_service.list_performers(limit=5)
+        items = [performer.to_dict() for performer in performers]
+    assert len(items) == 5
+    assert len(statements) == 2
+
+def test_active_threads_with_their_performer(db_service, db_path):
+    create_data(db_service)
+    with count_queries(db_path) as statements:
+        threads = db_service.get_active_threads()
+        names = {thread.performer.name for thread in threads}
+    assert len(threads) == 45 and len(names) == 15
+    assert len(statements) == 1
+
+def test_threads_of_a_performer_with_their_performer(db_service, db_path):
+    create_data(db_service)
+    with count_queries(db_path) as statements:
+        threads = db_service.get_threads_with_performer(performer_id=2)
+        assert [thread.performer.name for thread in threads] == ['performer2'] * 3
+    assert len(statements) == 1
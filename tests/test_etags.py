@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+def count_calls(monkeypatch, db_service, name):
+    calls = []
+    method = getattr(db_service, name)
+    def counting(*args, **kwargs):
+        calls.append(name)
+        return method(*args, **kwargs)
+    monkeypatch.setattr(db_service, name, counting)
+    return calls
+
+@pytest.fixture
+def performers(db_service):
+    success, _, error = db_service.create_performers([{'name': f"performer{i}"} for i in range(1, 4)])
+    assert success, error
+    return db_service
+
+def test_not_modified(client, performers, monkeypatch):
+    calls = count_calls(monkeypatch, performers, 'list_performers')
+    response = client.get('/api/performers')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    # Revalidated without running the view
+    revalidated = client.get('/api/performers', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.get_data() == b''
+    assert calls == ['list_performers']
+
+def test_cached_body(client, performers, monkeypatch):
+    calls = count_calls(monkeypatch, performers, 'list_performers')
+    first = client.get('/api/performers')
+    second = client.get('/api/performers')
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert calls == ['list_performers']
+
+    # Each URL has its own ETag
+    other = client.get('/api/performers?limit=1')
+    assert other.headers['ETag'] != first.headers['ETag']
+    assert len(other.get_json()['performers']) == 1
+
+def test_write_invalidates(client, performers):
+    response = client.get('/api/performers')
+    etag = response.headers['ETag']
+
+    created = client.post('/api/performers', json={'name': 'late'})
+    assert created.status_code == 201
+    response = client.get('/api/performers', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'late' in [performer['name'] for performer in response.get_json()['performers']]
+
+def test_write_of_another_process_invalidates(client, performers, db_path):
+    response = client.get('/api/performers')
+    etag = response.headers['ETag']
+
+    # E.g. the import script: the database files change, not the write count of this process
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.execute("UPDATE performers SET name = 'renamed' WHERE id = 1")
+    connection.close()
+
+    response = client.get('/api/performers', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['performers'][0]['name'] == 'renamed'
+
+def test_errors_are_not_cached(client, performers):
+    response = client.get('/api/threads?cursor=abc')
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
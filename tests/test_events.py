@@ -0,0 +1,61 @@
+import json
+
+from backend import api as api_module
+from backend.events import EventBroker
+
+def drain(subscriber):
+    events = []
+    while not subscriber.empty():
+        events.append(subscriber.get_nowait())
+    return events
+
+def parse_sse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+def test_replay_after_last_event_id():
+    broker = EventBroker()
+    for number in range(1, 6):
+        broker.publish('new_post', {'post_id': str(number)})
+
+    # A reconnecting client gets the events published after the last one it received
+    subscriber = broker.subscribe(last_event_id=3)
+    assert [event.id for event in drain(subscriber)] == [4, 5]
+    broker.publish('thread_checked', {'thread_id': 1})
+    assert [(event.id, event.name) for event in drain(subscriber)] == [(6, 'thread_checked')]
+
+    # A new client gets the new events only
+    assert drain(broker.subscribe()) == []
+
+def test_replay_is_limited_to_the_history():
+    broker = EventBroker(history_size=3)
+    for number in range(1, 11):
+        broker.publish('new_post', {'post_id': str(number)})
+
+    assert [event.id for event in drain(broker.subscribe(last_event_id=2))] == [8, 9, 10]
+
+def test_slow_subscriber_loses_its_oldest_events():
+    broker = EventBroker(subscriber_queue_size=2)
+    subscriber = broker.subscribe()
+    for number in range(1, 5):
+        broker.publish('new_post', {'post_id': str(number)})
+
+    assert [event.id for event in drain(subscriber)] == [3, 4]
+
+def test_event_stream_resumes_after_last_event_id(client, monkeypatch):
+    broker = EventBroker()
+    monkeypatch.setattr(api_module, 'get_event_broker', lambda: broker)
+    for number in range(1, 4):
+        broker.publish('new_post', {'post_id': str(number), 'content': 'café'})
+
+    response = client.get('/api/events', headers={'Last-Event-ID': '1'})
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).decode('utf-8').startswith('retry:')
+    replayed = [parse_sse(next(chunks).decode('utf-8')) for _ in range(2)]
+    assert replayed == [(2, 'new_post', {'post_id': '2', 'content': 'café'}),
+                        (3, 'new_post', {'post_id': '3', 'content': 'café'})]
+
+    # Closing the stream unsubscribes the client
+    response.close()
+    assert broker.subscribers == []
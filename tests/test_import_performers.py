@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+
+from import_performers import iter_json_array
+
+def read_array(text, chunk_size=65536):
+    return list(iter_json_array(io.StringIO(text), chunk_size))
+
+VALID = [
+    '[]',
+    ' [ ] ',
+    '[1]',
+    '[1, 2, 3]',
+    '[\n  {"name": "a", "active": true},\n  {"name": "b, c"}\n]\n',
+    '[[1, 2], [], {"a": [3]}, "x]", null]',
+    '[12345, -1.5e3, "long string value"]',
+]
+
+@pytest.mark.parametrize('text', VALID)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 65536])
+def test_valid_arrays(text, chunk_size):
+    # Chunk boundaries inside numbers, strings and separators must not matter
+    assert read_array(text, chunk_size) == json.loads(text)
+
+@pytest.mark.parametrize('text', [
+    '[1 2]',
+    '[1,,2]',
+    '[1,2,]',
+    '[,1]',
+    '[,]',
+    '[{"a":1} {"b":2}]',
+    '[1;2]',
+    '{"a": 1}',
+    '',
+    '[1, 2',
+    '[1, {"a": ',
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 65536])
+def test_invalid_arrays(text, chunk_size):
+    with pytest.raises(ValueError):
+        read_array(text, chunk_size)
+
+def test_error_position():
+    with pytest.raises(ValueError, match="position 9"):
+        read_array('[1, 2, 3 4]', chunk_size=2)
@@ -0,0 +1,88 @@
+import pytest
+
+def all_pages(list_rows, limit, **filters):
+    """Follow the cursors of a listing, return the IDs of each page"""
+    pages = []
+    cursor = None
+    while True:
+        rows, cursor = list_rows(limit=limit, cursor=cursor, **filters)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+@pytest.fixture
+def listing_data(db_service):
+    """Seven performers (every third one inactive), each with a thread on one of two forums"""
+    success, _, error = db_service.create_performers(
+        [{'name': f"performer{i}", 'is_active': i % 3 != 0} for i in range(1, 8)])
+    assert success, error
+    success, _, error = db_service.create_threads(
+        [{'performer_id': i, 'url': f"http://forum.example/t{i}.html",
+          'forum_type': 'planetsuzy' if i % 2 else 'other'} for i in range(1, 8)])
+    assert success, error
+    return db_service
+
+def test_performer_pages(listing_data):
+    assert all_pages(listing_data.list_performers, 3) == [[1, 2, 3], [4, 5, 6], [7]]
+    # The last page is full: it still ends the listing
+    assert all_pages(listing_data.list_performers, 7) == [[1, 2, 3, 4, 5, 6, 7]]
+
+def test_performer_pages_with_filters(listing_data):
+    assert all_pages(listing_data.list_performers, 2, is_active=True) == [[1, 2], [4, 5], [7]]
+    assert all_pages(listing_data.list_performers, 2, forum_type='other') == [[2, 4], [6]]
+    assert all_pages(listing_data.list_performers, 2, name_prefix='PERFORMER1') == [[1]]
+
+def test_performer_page_after_insert(listing_data):
+    performers, cursor = listing_data.list_performers(limit=4)
+    assert cursor == '4'
+    # A performer added between two pages appears on the next page, none is repeated
+    listing_data.create_performers([{'name': 'late'}])
+    performers, cursor = listing_data.list_performers(limit=4, cursor=cursor)
+    assert [performer.id for performer in performers] == [5, 6, 7, 8]
+    assert cursor is None
+
+def test_thread_pages(listing_data):
+    assert all_pages(listing_data.list_threads, 3) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert all_pages(listing_data.list_threads, 2, forum_type='planetsuzy') == [[1, 3], [5, 7]]
+    assert all_pages(listing_data.list_threads, 2, is_active=False) == [[3, 6]]
+    assert all_pages(listing_data.list_threads, 2, performer_id=4) == [[4]]
+
+def test_listing_without_limit(listing_data):
+    performers, cursor = listing_data.list_performers()
+    assert len(performers) == 7 and cursor is None
+    threads, cursor = listing_data.list_threads(stream=True)
+    assert [thread.id for thread in threads] == list(range(1, 8)) and cursor is None
+
+def test_invalid_cursor(listing_data):
+    with pytest.raises(ValueError):
+        listing_data.list_performers(limit=2, cursor='abc')
+    with pytest.raises(ValueError):
+        listing_data.list_threads(limit=2, cursor='1:2')
+
+def test_api_cursor(client, listing_data):
+    response = client.get('/api/performers?limit=5')
+    data = response.get_json()
+    assert [performer['id'] for performer in data['performers']] == [1, 2, 3, 4, 5]
+
+    response = client.get(f"/api/performers?limit=5&cursor={data['next_cursor']}")
+    data = response.get_json()
+    assert [performer['id'] for performer in data['performers']] == [6, 7]
+    assert data['next_cursor'] is None
+
+    assert client.get('/api/threads?limit=5&cursor=abc').status_code == 400
+
+def test_api_summary(client, listing_data):
+    listing_data.create_threads([{'performer_id': 1, 'url': "http://forum.example/t8.html", 'forum_type': 'other'}])
+    performers = client.get('/api/performers?summary=1&limit=2').get_json()['performers']
+    assert [(performer['id'], performer['thread_count']) for performer in performers] == [(1, 2), (2, 1)]
+    assert all('threads' not in performer for performer in performers)
+
+def test_api_projection(client, listing_data):
+    data = client.get('/api/performers?fields=id,name&limit=2').get_json()
+    assert data['performers'] == [{'id': 1, 'name': 'performer1'}, {'id': 2, 'name': 'performer2'}]
+    threads = client.get('/api/threads?fields=url&performer_id=3').get_json()['threads']
+    assert threads == [{'url': "http://forum.example/t3.html"}]
+
+    response = client.get('/api/threads?fields=url,unknown')
+    assert response.status_code == 400
+    assert 'unknown' in response.get_json()['error']
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from backend.models import init_db, SCHEMA_VERSION
+
+def make_old_database(db_path):
+    """Database as created before the unique thread URL index (user_version 0)"""
+    init_db(db_path).close()
+    connection = sqlite3.connect(db_path)
+    connection.execute("DROP INDEX ux_threads_url_forum")
+    connection.execute("PRAGMA user_version = 0")
+    connection.executemany("INSERT INTO performers (id, name, is_active) VALUES (?, ?, 1)", [(1, 'a'), (2, 'b')])
+    return connection
+
+def add_thread(connection, thread_id, performer_id, url, last_post_count=None, backfill_page=None,
+               last_post_id=None):
+    if last_post_id is None and last_post_count is not None:
+        last_post_id = str(last_post_count)
+    connection.execute(
+        "INSERT INTO threads (id, performer_id, url, forum_type, last_post_id, last_post_count, backfill_page) "
+        "VALUES (?, ?, ?, 'planetsuzy', ?, ?, ?)",
+        (thread_id, performer_id, url, last_post_id, last_post_count, backfill_page))
+
+def add_post(connection, thread_id, post_id):
+    cursor = connection.execute("INSERT INTO posts (thread_id, post_id, post_count) VALUES (?, ?, ?)",
+                                (thread_id, post_id, int(post_id)))
+    connection.execute("INSERT INTO post_links (post_pk, kind, url) VALUES (?, 'download', 'https://k2s.cc/x')",
+                       (cursor.lastrowid,))
+
+def test_duplicates_of_the_same_performer_are_merged(db_path):
+    connection = make_old_database(db_path)
+    add_thread(connection, 1, 1, 'http://forum/t1', last_post_count=10, backfill_page=2)
+    add_thread(connection, 2, 1, 'http://forum/t1', last_post_count=20)
+    add_post(connection, 1, '1')
+    add_post(connection, 1, '2')
+    add_post(connection, 2, '2')
+    add_post(connection, 2, '3')
+    connection.commit()
+    connection.close()
+
+    init_db(db_path).close()
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert connection.execute("SELECT id, last_post_count, backfill_page FROM threads").fetchall() == [(1, 20, 2)]
+    assert connection.execute("SELECT thread_id, post_id FROM posts ORDER BY post_id").fetchall() == [
+        (1, '1'), (1, '2'), (1, '3')]
+    # The links of the post stored twice went with the removed copy
+    assert connection.execute("SELECT COUNT(*) FROM post_links").fetchone()[0] == 3
+    assert connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_threads_url_forum'").fetchone() is not None
+
+@pytest.mark.parametrize('survivor_id, duplicate_id, expected', [
+    # Post counts NULL (databases from before they were stored): the post IDs decide
+    ('900', '1200', '1200'),
+    ('1200', '900', '1200'),
+    # Compared as numbers, not as strings
+    ('99', '100', '100'),
+    # A known post ID is never replaced by NULL
+    (None, '900', '900'),
+    ('900', None, '900'),
+    (None, None, None),
+])
+def test_merged_watermark_without_post_counts(db_path, survivor_id, duplicate_id, expected):
+    connection = make_old_database(db_path)
+    add_thread(connection, 1, 1, 'http://forum/t1', last_post_id=survivor_id)
+    add_thread(connection, 2, 1, 'http://forum/t1', last_post_id=duplicate_id)
+    connection.commit()
+    connection.close()
+
+    init_db(db_path).close()
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("SELECT id, last_post_id, last_post_count FROM threads").fetchall() == [
+        (1, expected, None)]
+
+def test_merged_watermark_with_post_counts(db_path):
+    connection = make_old_database(db_path)
+    # The counts decide when both are known, the post IDs when they are equal
+    add_thread(connection, 1, 1, 'http://forum/t1', last_post_count=30, last_post_id='500')
+    add_thread(connection, 2, 1, 'http://forum/t1', last_post_count=20, last_post_id='900')
+    add_thread(connection, 3, 1, 'http://forum/t2', last_post_count=20, last_post_id='500')
+    add_thread(connection, 4, 1, 'http://forum/t2', last_post_count=20, last_post_id='600')
+    connection.commit()
+    connection.close()
+
+    init_db(db_path).close()
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("SELECT id, last_post_id, last_post_count FROM threads ORDER BY id").fetchall() == [
+        (1, '500', 30), (3, '600', 20)]
+
+def test_url_tracked_by_several_performers_is_left_in_place(db_path, caplog):
+    connection = make_old_database(db_path)
+    add_thread(connection, 1, 1, 'http://forum/t1')
+    add_thread(connection, 2, 2, 'http://forum/t1')
+    add_thread(connection, 3, 1, 'http://forum/t2')
+    add_thread(connection, 4, 1, 'http://forum/t2')
+    add_post(connection, 2, '1')
+    connection.commit()
+    connection.close()
+
+    init_db(db_path).close()
+
+    connection = sqlite3.connect(db_path)
+    # Nothing changed, not even the duplicates that could be merged
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert [row[0] for row in connection.execute("SELECT id FROM threads ORDER BY id")] == [1, 2, 3, 4]
+    assert connection.execute("SELECT COUNT(*) FROM posts WHERE thread_id = 2").fetchone()[0] == 1
+    assert connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ux_threads_url_forum'").fetchone() is None
+    assert "thread 2 of performer 'b' (ID 2)" in caplog.text
@@ -0,0 +1,107 @@
+import json
+from datetime import datetime
+import pytest
+
+from backend import api as api_module
+from backend.jobs import CheckRunRegistry
+from backend.pipeline import CheckJob
+from backend.scrapers.base import Post
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+def read_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+class FinishingPipeline:
+    """Pipeline completing each job right away with the posts of its thread"""
+
+    def __init__(self, posts):
+        self.posts = posts  # thread id -> post ids
+
+    def submit(self, job, use_cache=False):
+        job.new_posts = [Post(post_id, datetime(2024, 1, 1), "author", "post", [], [])
+                         for post_id in self.posts[job.thread_id]]
+        job.finish()
+        return job
+
+class HangingPipeline:
+    """Pipeline whose jobs never complete on their own"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, job, use_cache=False):
+        self.submitted.append(job)
+        return job
+
+class FakeScheduler:
+    def __init__(self, db_service, posts=None, pipeline=None):
+        self.db_service = db_service
+        self.check_runs = CheckRunRegistry(pipeline or FinishingPipeline(posts), db_service)
+
+    def start_check(self, thread_id=None, performer_id=None, listener=None):
+        make_jobs = lambda: [CheckJob(thread.id, thread.url, thread.forum_type, None, thread.performer.name)
+                             for thread in self.db_service.get_threads_with_performer(thread_id, performer_id)]
+        return self.check_runs.start('performer', make_jobs, performer_id, listener=listener)
+
+@pytest.fixture
+def performers(db_service):
+    success, _, error = db_service.create_performers([{'name': f"performer{i}"} for i in range(1, 6)])
+    assert success, error
+    success, _, error = db_service.create_threads(
+        [{'performer_id': 1, 'url': f"http://forum.example/t{i}.html", 'forum_type': 'planetsuzy'} for i in (1, 2)])
+    assert success, error
+    return db_service
+
+def test_listing_stream(client, performers):
+    response = client.get('/api/performers?limit=3&fields=id,name', headers=NDJSON)
+    assert response.mimetype == 'application/x-ndjson'
+    assert read_lines(response) == [{'id': 1, 'name': 'performer1'}, {'id': 2, 'name': 'performer2'},
+                                    {'id': 3, 'name': 'performer3'}]
+    assert response.headers['X-Next-Cursor'] == '3'
+    # Streams are not cached
+    assert 'ETag' not in response.headers
+
+    response = client.get('/api/performers?limit=3&cursor=3', headers=NDJSON)
+    assert [performer['id'] for performer in read_lines(response)] == [4, 5]
+    assert 'X-Next-Cursor' not in response.headers
+
+def test_full_listing_stream(client, performers):
+    lines = read_lines(client.get('/api/threads', headers=NDJSON))
+    assert [thread['url'] for thread in lines] == ["http://forum.example/t1.html", "http://forum.example/t2.html"]
+    # The JSON representation is unchanged
+    assert client.get('/api/threads').get_json()['threads'] == lines
+
+def test_check_stream(client, performers, monkeypatch):
+    monkeypatch.setattr(api_module, 'scheduler', FakeScheduler(performers, {1: ['12', '11'], 2: []}))
+
+    lines = read_lines(client.post('/api/check/performer/1', headers=NDJSON))
+    assert [line['type'] for line in lines] == ['job', 'post', 'post', 'thread', 'thread', 'done']
+    assert [(line['post_id'], line['thread_id']) for line in lines if line['type'] == 'post'] == [
+        ('12', 1), ('11', 1)]
+    assert [(line['thread_id'], line['new_posts'], line['status']) for line in lines if line['type'] == 'thread'] == [
+        (1, 2, 'completed'), (2, 0, 'completed')]
+    assert lines[-1]['status'] == 'completed' and lines[-1]['new_posts'] == 2
+    assert lines[0]['id'] == lines[-1]['id']
+
+def test_check_stream_timeout(client, performers, monkeypatch):
+    pipeline = HangingPipeline()
+    scheduler = FakeScheduler(performers, pipeline=pipeline)
+    monkeypatch.setattr(api_module, 'scheduler', scheduler)
+    client.application.config['CHECK_STREAM_TIMEOUT_SECONDS'] = 0.2
+
+    lines = read_lines(client.post('/api/check/performer/1', headers=NDJSON))
+    assert [line['type'] for line in lines] == ['job', 'error']
+    assert lines[-1]['error'] == "No thread checked for 0.2 seconds"
+    # The check is cancelled with the stream
+    run = scheduler.check_runs.get(lines[0]['id'])
+    assert run.cancel_requested
+    for job in pipeline.submitted:
+        job.finish()
+
+def test_check_without_stream(client, performers, monkeypatch):
+    monkeypatch.setattr(api_module, 'scheduler', FakeScheduler(performers, {1: ['12'], 2: []}))
+
+    response = client.post('/api/check/performer/1')
+    assert response.status_code == 202
+    assert response.get_json()['job']['scope'] == 'performer'
@@ -0,0 +1,166 @@
+import pytest
+
+from backend.scrapers import PlanetSuzyScraper
+from backend.scrapers.base import BaseScraper, Page
+
+THREAD_URL = "http://www.planetsuzy.org/t894033-victoria-june.html"
+
+def post_html(post_id, post_count):
+    return f"""
+<table class="tborder" id="post{post_id}">
+<tr>
+    <td class="thead">1st May 2023, 18:30</td>
+    <td class="thead">#<a href="showpost.php?p={post_id}" id="postcount{post_id}" name="{post_count}">{post_count}</a></td>
+</tr>
+<tr>
+    <td class="alt2"><a class="bigusername" href="members/1-poster.html">poster</a></td>
+    <td class="alt1"><div id="post_message_{post_id}">post {post_id}</div></td>
+</tr>
+</table>"""
+
+class FakeThread:
+    """A PlanetSuzy thread of numbered posts, some of them deleted (the counts then shift)"""
+
+    def __init__(self, total_posts, posts_per_page, deleted=()):
+        self.post_ids = [5000 + number for number in range(1, total_posts + 1) if 5000 + number not in deleted]
+        self.posts_per_page = posts_per_page
+        self.last_page = max(1, -(-len(self.post_ids) // posts_per_page))
+        self.fetched = []  # Page numbers, in fetch order
+
+    def count_of(self, post_id):
+        return self.post_ids.index(post_id) + 1
+
+    def html(self, page):
+        navigation = ''
+        if self.last_page > 1:
+            navigation = (f'<a href="showthread.php?t=894033&amp;page={self.last_page}" '
+                          f'title="Last Page - Results">Last &raquo;</a>')
+        start = (page - 1) * self.posts_per_page
+        posts = ''.join(post_html(post_id, start + index + 1)
+                        for index, post_id in enumerate(self.post_ids[start:start + self.posts_per_page]))
+        return f'<html><body><div class="pagenav">{navigation}</div><div id="posts">{posts}</div></body></html>'
+
+    def scraper(self, last_post_id=None, last_post_count=None):
+        scraper = PlanetSuzyScraper(THREAD_URL, last_post_id, last_post_count)
+        def fetch_page(url):
+            page = scraper.get_page_number(url)
+            self.fetched.append(page)
+            return Page(url, self.html(page))
+        scraper.fetch_page = fetch_page
+        return scraper
+
+def page_numbers(scraper, pages):
+    return [scraper.get_page_number(page.url) for page in pages]
+
+def test_build_page_url():
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    assert scraper.build_page_url(THREAD_URL, 7) == "http://www.planetsuzy.org/t894033-p7-victoria-june.html"
+    # An URL already carrying a page number
+    assert (scraper.build_page_url("http://www.planetsuzy.org/t894033-p36-victoria-june.html", 2)
+            == "http://www.planetsuzy.org/t894033-p2-victoria-june.html")
+    assert scraper.get_page_number("http://www.planetsuzy.org/t894033-p36-victoria-june.html") == 36
+    assert scraper.get_page_number(THREAD_URL) == 1
+
+    scraper.use_page_variant('showthread')
+    assert (scraper.build_page_url(THREAD_URL, 3)
+            == f"http://www.planetsuzy.org/showthread.php?t=894033&page=3&pp={scraper.max_posts_per_page}")
+    assert scraper.get_page_number(scraper.build_page_url(THREAD_URL, 3)) == 3
+
+def test_get_last_page_number():
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    assert scraper.get_last_page_number(scraper.parse_html(FakeThread(95, 10).html(1))) == 10
+    # Without "Last Page" link, the highest page linked
+    few_pages = '<a href="showthread.php?t=894033&amp;page=2">2</a><a href="showthread.php?t=894033&amp;page=3">3</a>'
+    assert scraper.get_last_page_number(scraper.parse_html(few_pages)) == 3
+    assert scraper.get_last_page_number(scraper.parse_html('<html></html>')) == 1
+
+@pytest.mark.parametrize('last_post_count, expected', [
+    # Up to date, or every unseen post on the last page
+    (100, [10]),
+    (91, [10]),
+    # Page p holds the posts (p-1)*10+1 .. p*10, down to the page of the last seen post
+    (90, [10, 9]),
+    (89, [10, 9]),
+    (75, [10, 9, 8]),
+    (10, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1]),
+    (5, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1]),
+])
+def test_fetch_pages_range(last_post_count, expected):
+    thread = FakeThread(100, 10)
+    scraper = thread.scraper(str(5000 + last_post_count), last_post_count)
+
+    pages = scraper.fetch_pages()
+    assert page_numbers(scraper, pages) == expected
+    # The first page is always downloaded for the page navigation, never twice
+    assert sorted(thread.fetched) == sorted(set(expected) | {1})
+
+def test_fetch_pages_range_is_capped():
+    thread = FakeThread(100, 10)
+    scraper = thread.scraper('5010', 10)
+    scraper.max_catchup_pages = 3
+
+    assert page_numbers(scraper, scraper.fetch_pages()) == [10, 9, 8, 7]
+
+def test_fetch_pages_single_page():
+    thread = FakeThread(8, 10)
+    scraper = thread.scraper('5003', 3)
+
+    assert page_numbers(scraper, scraper.fetch_pages()) == [1]
+    assert thread.fetched == [1]
+
+@pytest.mark.parametrize('total_posts, deleted, last_post_id, expected', [
+    # Two posts before the last seen one were deleted: it moved from count 91 (page 10)
+    # to 89 (page 9), the stored count 91 ends on page 10
+    (102, {5010, 5020}, 5091, [10, 9]),
+    (102, {5010, 5020}, 5075, [10, 9, 8]),
+])
+def test_fetch_pages_after_deletions(total_posts, deleted, last_post_id, expected):
+    thread = FakeThread(total_posts, 10, deleted)
+    stored_count = last_post_id - 5000
+    scraper = thread.scraper(str(last_post_id), stored_count)
+
+    pages = scraper.fetch_pages()
+    assert page_numbers(scraper, pages) == expected
+
+    for page in pages:
+        scraper.extract_page(page)
+    new_ids = [int(post.post_id) for post in scraper.collect_new_posts(pages)]
+    assert new_ids == [post_id for post_id in reversed(thread.post_ids) if post_id > last_post_id]
+
+def test_fetch_pages_after_deleted_last_seen_post():
+    # The last seen post itself was deleted: one page more only, and the counts decide
+    # (the post now at the stored count 91 is taken as seen)
+    thread = FakeThread(101, 10, {5091})
+    scraper = thread.scraper('5091', 91)
+
+    pages = scraper.fetch_pages()
+    assert page_numbers(scraper, pages) == [10, 9]
+    for page in pages:
+        scraper.extract_page(page)
+    new_ids = [int(post.post_id) for post in scraper.collect_new_posts(pages)]
+    assert new_ids == [post_id for post_id in reversed(thread.post_ids) if thread.count_of(post_id) > 91]
+
+def test_new_posts_of_the_fetched_pages():
+    thread = FakeThread(100, 10)
+    scraper = thread.scraper('5075', 75)
+
+    pages = scraper.fetch_pages()
+    for page in pages:
+        scraper.extract_page(page)
+    new_posts = scraper.collect_new_posts(pages)
+    assert [post.post_id for post in new_posts] == [str(5000 + number) for number in range(100, 75, -1)]
+
+def test_page_navigation_is_required():
+    # A scraper without page navigation cannot be instantiated
+    class NoNavigationScraper(BaseScraper):
+        def get_forum_type(self):
+            return 'none'
+
+        def extract_posts(self, soup, with_qualities=True):
+            return []
+
+        def get_next_page_url(self, soup, url):
+            return None
+
+    with pytest.raises(TypeError):
+        NoNavigationScraper(THREAD_URL)
@@ -0,0 +1,308 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from backend import pipeline as pipeline_module
+from backend.pipeline import CheckJob, CheckPipeline, Stage
+from backend.scrapers.base import Page, Post
+
+THREAD_URL = "http://forum.example/t1.html"
+
+def make_post(number, post_count=None):
+    return Post(str(number), datetime(2024, 1, 1), "author", f"post {number}", [], [],
+                post_count=post_count if post_count is not None else number)
+
+class FakeScraper:
+    """Scraper returning the given posts (newest first), optionally waiting before fetching"""
+
+    def __init__(self, posts, release=None):
+        self.posts = posts
+        self.release = release
+        self.fetches = 0
+
+    def fetch_pages(self):
+        self.fetches += 1
+        if self.release is not None:
+            assert self.release.wait(5)
+        return [Page(THREAD_URL, '')]
+
+    def parse_page(self, page):
+        pass
+
+    def extract_page(self, page):
+        page.posts = list(self.posts)
+        return page.posts
+
+    def collect_new_posts(self, pages):
+        return [post for page in pages for post in page.posts]
+
+    def add_video_qualities(self, posts):
+        pass
+
+class RecordingNotifications:
+    def __init__(self):
+        self.sent = []
+
+    def notify_new_posts(self, performer_name, thread_url, posts):
+        self.sent.append((performer_name, [post['post_id'] for post in posts]))
+
+def pipeline_config(**overrides):
+    settings = dict(PIPELINE_QUEUE_SIZE=10, PIPELINE_FETCH_WORKERS=2, PIPELINE_PARSE_WORKERS=1,
+                    PIPELINE_EXTRACT_WORKERS=1, PIPELINE_NOTIFY_WORKERS=1, CHECK_RESULT_CACHE_SECONDS=0,
+                    LISTING_MAX_SKIP_SECONDS=86400)
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+@pytest.fixture
+def thread_id(db_service):
+    db_service.create_performers([{'name': 'performer'}])
+    _, results, _ = db_service.create_threads([{'performer_id': 1, 'url': THREAD_URL, 'forum_type': 'planetsuzy'}])
+    return results[0][0]['id']
+
+@pytest.fixture
+def make_pipeline(db_service):
+    pipelines = []
+    def make(**config):
+        pipeline = CheckPipeline(db_service, RecordingNotifications(), pipeline_config(**config))
+        pipelines.append(pipeline)
+        return pipeline
+    yield make
+    for pipeline in pipelines:
+        pipeline.stop()
+
+def use_scraper(monkeypatch, scraper):
+    monkeypatch.setattr(pipeline_module, 'get_scraper', lambda *args: scraper)
+
+def make_job(thread_id, last_post_id=None, last_post_count=None):
+    return CheckJob(thread_id, THREAD_URL, 'planetsuzy', last_post_id, 'performer', last_post_count)
+
+class RecordingScraper(FakeScraper):
+    """Scraper recording the pipeline steps and the worker thread running each of them"""
+
+    def __init__(self, posts, steps, fail_on=None):
+        super().__init__(posts)
+        self.steps = steps
+        self.fail_on = fail_on
+
+    def record(self, step):
+        self.steps.append((step, threading.current_thread().name))
+        if step == self.fail_on:
+            raise RuntimeError(f"{step} failed")
+
+    def fetch_pages(self):
+        self.record('fetch')
+        return super().fetch_pages()
+
+    def parse_page(self, page):
+        self.record('parse')
+
+    def extract_page(self, page):
+        self.record('extract')
+        return super().extract_page(page)
+
+def test_stages_run_in_order(make_pipeline, thread_id, monkeypatch):
+    steps = []
+    use_scraper(monkeypatch, RecordingScraper([make_post(2)], steps))
+    pipeline = make_pipeline()
+    notifications = pipeline.notification_service
+    notifications.notify_new_posts = lambda **kwargs: steps.append(('notify', threading.current_thread().name))
+
+    job = pipeline.submit(make_job(thread_id, '1', 1))
+    assert job.wait(5)
+    assert job.error is None
+    # Each step runs on a worker of its own stage
+    assert [step for step, _ in steps] == ['fetch', 'parse', 'extract', 'notify']
+    assert all(worker.startswith(f"pipeline-{step}-") for step, worker in steps)
+    assert [stats['processed'] for stats in pipeline.stats()] == [1, 1, 1, 1]
+
+@pytest.mark.parametrize('fail_on, failed_stage', [('fetch', 0), ('parse', 1), ('extract', 2)])
+def test_stage_error_ends_the_job(make_pipeline, thread_id, monkeypatch, fail_on, failed_stage):
+    steps = []
+    use_scraper(monkeypatch, RecordingScraper([make_post(2)], steps, fail_on=fail_on))
+    pipeline = make_pipeline()
+
+    job = pipeline.submit(make_job(thread_id, '1', 1))
+    assert job.wait(5)
+    assert job.error == f"{fail_on} failed"
+    assert steps[-1][0] == fail_on
+    assert pipeline.notification_service.sent == []
+    assert [stats['failed'] for stats in pipeline.stats()] == [int(index == failed_stage) for index in range(4)]
+    # The failed thread can be checked again
+    assert pipeline._in_flight == {}
+
+def test_full_stage_queue_blocks_the_producer():
+    release = threading.Event()
+    stage = Stage('slow', lambda job: release.wait(5) and False, workers=1, queue_size=2)
+    stage.start()
+    jobs = [make_job(number) for number in range(4)]
+    try:
+        # One job in progress, two queued: the next put waits for room in the queue
+        for job in jobs[:3]:
+            stage.put(job)
+        producer = threading.Thread(target=stage.put, args=(jobs[3],))
+        producer.start()
+        time.sleep(0.2)
+        assert producer.is_alive()
+        assert stage.stats()['queue_depth'] == 2
+        assert stage.stats()['in_progress'] == 1
+
+        release.set()
+        producer.join(5)
+        assert not producer.is_alive()
+        assert all(job.wait(5) for job in jobs)
+    finally:
+        release.set()
+        stage.stop()
+    assert stage.stats()['processed'] == 4
+
+def test_log_stats(make_pipeline, thread_id, monkeypatch, caplog):
+    use_scraper(monkeypatch, FakeScraper([]))
+    pipeline = make_pipeline()
+    assert pipeline.submit(make_job(thread_id)).wait(5)
+
+    with caplog.at_level(logging.INFO, logger='backend.pipeline'):
+        pipeline.log_stats()
+    lines = [record.getMessage() for record in caplog.records]
+    assert [line.split(':')[0] for line in lines] == ['Stage fetch', 'Stage parse', 'Stage extract', 'Stage notify']
+    # Without new posts the job ends at the extract stage
+    assert lines[0].startswith("Stage fetch: depth=0/10, processed=1, failed=0, ")
+    assert lines[3].startswith("Stage notify: depth=0/10, processed=0, failed=0, ")
+
+def test_concurrent_submits_share_one_check(make_pipeline, thread_id, monkeypatch):
+    release = threading.Event()
+    scraper = FakeScraper([make_post(3), make_post(2)], release)
+    use_scraper(monkeypatch, scraper)
+    pipeline = make_pipeline()
+
+    # Several callers submit the same thread while its check is in flight
+    jobs = []
+    submitters = [threading.Thread(target=lambda: jobs.append(pipeline.submit(make_job(thread_id, '1', 1))))
+                  for _ in range(5)]
+    for submitter in submitters:
+        submitter.start()
+    for submitter in submitters:
+        submitter.join()
+    release.set()
+
+    assert len({id(job) for job in jobs}) == 1
+    job = jobs[0]
+    assert job.wait(5)
+    assert job.shared
+    assert scraper.fetches == 1
+    assert [post['post_id'] for post in job.results()] == ['3', '2']
+    assert pipeline.notification_service.sent == [('performer', ['3', '2'])]
+
+def test_next_check_runs_again(make_pipeline, thread_id, monkeypatch):
+    scraper = FakeScraper([])
+    use_scraper(monkeypatch, scraper)
+    pipeline = make_pipeline()
+
+    first = pipeline.submit(make_job(thread_id))
+    assert first.wait(5)
+    second = pipeline.submit(make_job(thread_id))
+    assert second.wait(5)
+    assert second is not first
+    assert scraper.fetches == 2
+
+def test_recent_result_is_reused(make_pipeline, thread_id, monkeypatch):
+    scraper = FakeScraper([make_post(2)])
+    use_scraper(monkeypatch, scraper)
+    pipeline = make_pipeline(CHECK_RESULT_CACHE_SECONDS=60)
+
+    first = pipeline.submit(make_job(thread_id, '1', 1))
+    assert first.wait(5)
+    # Manual checks reuse the recent result, scheduled checks run again
+    assert pipeline.submit(make_job(thread_id, '1', 1), use_cache=True) is first
+    assert scraper.fetches == 1
+    scheduled = pipeline.submit(make_job(thread_id, '2', 2))
+    assert scheduled.wait(5)
+    assert scheduled is not first
+    assert scraper.fetches == 2
+
+def test_failed_result_is_not_reused(make_pipeline, thread_id, monkeypatch):
+    class FailingScraper(FakeScraper):
+        def fetch_pages(self):
+            self.fetches += 1
+            raise RuntimeError("forum down")
+    scraper = FailingScraper([])
+    use_scraper(monkeypatch, scraper)
+    pipeline = make_pipeline(CHECK_RESULT_CACHE_SECONDS=60)
+
+    first = pipeline.submit(make_job(thread_id))
+    assert first.wait(5)
+    assert first.error == "forum down"
+    second = pipeline.submit(make_job(thread_id), use_cache=True)
+    assert second is not first
+    assert second.wait(5)
+    assert scraper.fetches == 2
+
+def run_extract(pipeline, job, posts):
+    job.scraper = FakeScraper(posts)
+    job.pages = [Page(THREAD_URL, '')]
+    return pipeline.extract(job)
+
+def test_extract_drops_posts_stored_by_an_earlier_check(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline()
+    # A check completed while this job was queued: posts 2 and 3 are stored
+    db_service.upsert_posts(thread_id, [make_post(3), make_post(2)])
+    db_service.update_thread(thread_id, last_post_id='3', last_post_count=3)
+
+    job = make_job(thread_id, '1', 1)
+    assert run_extract(pipeline, job, [make_post(4), make_post(3), make_post(2)])
+    assert [post.post_id for post in job.new_posts] == ['4']
+    assert db_service.get_thread(thread_id).last_post_id == '4'
+
+def test_extract_keeps_new_posts_after_a_deletion(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline()
+    # The stored count (5) is too high: a post was deleted on the forum since, the new
+    # posts 6 and 7 have the counts 5 and 6
+    db_service.upsert_posts(thread_id, [make_post(5)])
+    db_service.update_thread(thread_id, last_post_id='5', last_post_count=5)
+
+    job = make_job(thread_id, '4', 4)
+    assert run_extract(pipeline, job, [make_post(7, 6), make_post(6, 5), make_post(5, 4)])
+    assert [post.post_id for post in job.new_posts] == ['7', '6']
+
+def test_extract_without_new_post(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline()
+    db_service.upsert_posts(thread_id, [make_post(2)])
+    db_service.update_thread(thread_id, last_post_id='2', last_post_count=2)
+
+    job = make_job(thread_id, '1', 1)
+    assert not run_extract(pipeline, job, [make_post(2)])
+    assert job.new_posts == []
+
+def test_unchanged_thread_is_not_written(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline()
+    db_service.update_thread(thread_id, last_post_id='2', last_post_count=2, listing_marker='5:2')
+    version = db_service.data_version
+
+    # Same listing marker, recent last_check: the cached API responses stay valid
+    for listing_marker in (None, '5:2'):
+        job = make_job(thread_id, '2', 2)
+        job.listing_marker = listing_marker
+        assert not run_extract(pipeline, job, [])
+    assert db_service.data_version == version
+
+def test_changed_listing_marker_is_written(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline()
+    db_service.update_thread(thread_id, last_post_id='2', last_post_count=2, listing_marker='5:2')
+    version = db_service.data_version
+
+    job = make_job(thread_id, '2', 2)
+    job.listing_marker = '6:2'
+    assert not run_extract(pipeline, job, [])
+    assert db_service.data_version != version
+    assert db_service.get_thread(thread_id).listing_marker == '6:2'
+
+def test_stale_last_check_is_written(make_pipeline, db_service, thread_id):
+    pipeline = make_pipeline(LISTING_MAX_SKIP_SECONDS=0)
+    before = db_service.get_thread(thread_id).last_check
+
+    assert not run_extract(pipeline, make_job(thread_id, '2', 2), [])
+    db_service.session.expire_all()
+    assert db_service.get_thread(thread_id).last_check > before
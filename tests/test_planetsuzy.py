@@ -0,0 +1,198 @@
+import os
+
+import pytest
+
+from backend.scrapers import PlanetSuzyScraper
+from backend.scrapers.base import Page
+from backend.scrapers.post_tokenizer import PostTokenizer
+
+THREAD_URL = "http://www.planetsuzy.org/t894033-p36-victoria-june.html"
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'backend', 'test_data', 'planetsuzy-thread.html')
+
+# Posts of the fixture page, in page order, have the post counts 538 to 541:
+# 9100001, 9100007, 9100002, 9100004
+
+@pytest.fixture(scope='module')
+def html():
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        return f.read()
+
+def post_ids(posts):
+    return [post.post_id for post in posts]
+
+@pytest.mark.parametrize('with_qualities', [True, False])
+def test_fast_extractor_matches_dom_extractor(html, with_qualities):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    fast = scraper.extract_posts_fast(html, with_qualities)
+    dom = scraper.extract_posts(scraper.parse_html(html), with_qualities)
+
+    assert fast is not None
+    assert [post.to_dict() for post in fast] == [post.to_dict() for post in dom]
+    assert post_ids(fast) == ['9100004', '9100002', '9100007', '9100001']
+
+def test_fixture_posts(html):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    posts = {post.post_id: post for post in scraper.extract_posts_fast(html)}
+
+    first = posts['9100001']
+    assert first.author == 'ScenePoster'
+    assert first.date.isoformat() == '2023-03-23T09:14:00'
+    assert len(first.download_links) == 4
+    assert len(first.video_qualities) == 2
+    # Relative images are made absolute, smilies (inlineimg) are left out
+    assert posts['9100002'].images == [
+        "http://www.planetsuzy.org/attachment.php?attachmentid=771234&stc=1&d=1681185780"]
+    assert posts['9100007'].images == []
+    assert posts['9100007'].download_links == []
+    assert posts['9100007'].content.startswith('Quote: Originally Posted by ScenePoster')
+
+def test_streamed_tokenizer_matches_whole_page(html):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    tokenizer = PostTokenizer(scraper.is_download_link)
+    # Small chunks split tags and text nodes
+    for start in range(0, len(html), 37):
+        tokenizer.feed(html[start:start + 37])
+    tokenizer.close()
+
+    assert scraper.check_raw_posts(tokenizer, html) == []
+    streamed = sorted((scraper.build_post(raw) for raw in tokenizer.posts),
+                      key=lambda p: (p.post_count or 0, p.post_id), reverse=True)
+    assert ([post.to_dict() for post in streamed]
+            == [post.to_dict() for post in scraper.extract_posts_fast(html)])
+
+def test_fast_extractor_rejects_truncated_page(html):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    truncated = html[:html.index('id="post_message_9100004"')]
+
+    assert scraper.extract_posts_fast(truncated) is None
+
+@pytest.mark.parametrize('last_post_id, last_post_count, expected', [
+    # Without a watermark only the latest post is kept
+    (None, None, ['9100004']),
+    # From the anchor of the last seen post on, kept for collect_new_posts
+    ('9100007', None, ['9100007', '9100002', '9100004']),
+    ('9100007', 539, ['9100007', '9100002', '9100004']),
+    # A post before the last seen one was deleted: its stored count (540) is too
+    # high, the post right after it (now count 540) is still new
+    ('9100007', 540, ['9100007', '9100002', '9100004']),
+    ('9100007', 900, ['9100007', '9100002', '9100004']),
+    ('9100001', 600, ['9100001', '9100007', '9100002', '9100004']),
+    # Nothing new: only the last seen post is parsed
+    ('9100004', 541, ['9100004']),
+    ('9100004', 900, ['9100004']),
+])
+def test_slice_new_posts(html, last_post_id, last_post_count, expected):
+    scraper = PlanetSuzyScraper(THREAD_URL, last_post_id, last_post_count)
+    fragment = scraper.slice_new_posts(html)
+
+    assert fragment is not None
+    posts = scraper.extract_posts_fast(fragment)
+    assert sorted(post_ids(posts)) == sorted(expected)
+
+@pytest.mark.parametrize('last_post_id, last_post_count, expected', [
+    ('9100007', 540, ['9100004', '9100002']),
+    ('9100004', 541, []),
+])
+def test_new_posts_of_a_sliced_page(html, last_post_id, last_post_count, expected):
+    scraper = PlanetSuzyScraper(THREAD_URL, last_post_id, last_post_count)
+    page = Page(THREAD_URL, html)
+    scraper.extract_page(page)
+
+    assert post_ids(scraper.collect_new_posts([page])) == expected
+
+@pytest.mark.parametrize('last_post_id, last_post_count', [
+    ('9000000', None),
+    # The post counts do not tell which posts are new: the last seen post may be on
+    # an older page with counts shifted by deletions, or be deleted itself
+    ('9000000', 539),
+    ('9000000', 900),
+])
+def test_slice_new_posts_needs_the_whole_page(html, last_post_id, last_post_count):
+    assert PlanetSuzyScraper(THREAD_URL, last_post_id, last_post_count).slice_new_posts(html) is None
+
+def test_slice_new_posts_without_post_table():
+    assert PlanetSuzyScraper(THREAD_URL, '9100001', 538).slice_new_posts('<html><body></body></html>') is None
+
+def extracted_page(html):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    page = Page(THREAD_URL)
+    page.posts = scraper.extract_posts_fast(html)
+    return page
+
+@pytest.mark.parametrize('last_post_id, last_post_count, expected', [
+    (None, None, ['9100004']),
+    ('9100007', 539, ['9100004', '9100002']),
+    # A post before the last seen one was deleted: its stored count (540) is now too
+    # high, the posts above it on the page are still new
+    ('9100007', 540, ['9100004', '9100002']),
+    ('9100007', 900, ['9100004', '9100002']),
+    ('9100004', 541, []),
+    # The last seen post was deleted: the counts decide
+    ('9000000', 539, ['9100004', '9100002']),
+    ('9000000', None, ['9100004', '9100002', '9100007', '9100001']),
+])
+def test_collect_new_posts(html, last_post_id, last_post_count, expected):
+    scraper = PlanetSuzyScraper(THREAD_URL, last_post_id, last_post_count)
+
+    assert post_ids(scraper.collect_new_posts([extracted_page(html)])) == expected
+
+def test_collect_new_posts_across_pages(html):
+    scraper = PlanetSuzyScraper(THREAD_URL, '9100002', 999)
+    newer = Page(THREAD_URL + '?page=2')
+    newer.posts = scraper.extract_posts_fast(html.replace('id="post9100', 'id="post9200'))
+
+    # The anchor is on the older page: the whole newer page and the posts above it are new
+    assert post_ids(scraper.collect_new_posts([newer, extracted_page(html)])) == [
+        '9200004', '9200002', '9200007', '9200001', '9100004']
+
+class StreamedPage:
+    """Chunks of a page as streamed by the forum, with a long footer after the posts"""
+
+    def __init__(self, html, chunk_size=256, footer_chunks=100):
+        self.html = html + '<div class="footer">' + 'x' * chunk_size * footer_chunks + '</div>'
+        self.chunks = [self.html[start:start + chunk_size] for start in range(0, len(self.html), chunk_size)]
+        self.read = 0
+        self.closed = False
+
+    def stream(self, url, chunk_size=16384):
+        try:
+            for chunk in self.chunks:
+                self.read += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+def streaming_scraper(stream, whole_page):
+    scraper = PlanetSuzyScraper(THREAD_URL)
+    scraper.streaming = True
+    scraper.stream_page_content = stream
+    scraper.get_page_content = lambda url: whole_page
+    return scraper
+
+def test_streamed_fetch_stops_after_the_posts(html):
+    streamed = StreamedPage(html)
+    scraper = streaming_scraper(streamed.stream, None)
+
+    page = scraper.fetch_page(THREAD_URL)
+    assert ([post.to_dict() for post in page.posts]
+            == [post.to_dict() for post in scraper.extract_posts_fast(html, with_qualities=False)])
+    # The download stopped at the end of the posts, the footer was never read
+    assert streamed.closed
+    assert streamed.read * 256 < len(html) + 256
+    # Only the HTML before the posts is kept, with the page navigation
+    assert html.startswith(page.html)
+    assert 'class="pagenav"' in page.html
+    assert 'post_message_9100004' not in page.html
+    assert (scraper.get_last_page_number(scraper.parse_html(page.html))
+            == scraper.get_last_page_number(scraper.parse_html(html)))
+
+def test_streamed_fetch_of_a_truncated_page(html):
+    truncated = html[:html.index('id="post_message_9100004"')]
+    streamed = StreamedPage(truncated, footer_chunks=0)
+    scraper = streaming_scraper(streamed.stream, html)
+
+    # The posts fail the sanity checks: the whole page is fetched again
+    page = scraper.fetch_page(THREAD_URL)
+    assert page.html == html
+    assert page.posts is None
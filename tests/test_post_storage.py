@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, text
+
+from backend.models import PostLink, PostQuality, StoredPost
+from backend.scrapers.base import Post, VideoQuality
+
+def make_post(number, content=None, links=1):
+    post = Post(str(9000 + number), datetime(2024, 1, number), "author", content or f"Scène {number}",
+                [f"https://k2s.cc/file/{number}-{index}" for index in range(links)],
+                [f"https://img.example.com/{number}.jpg"], post_count=number)
+    quality = VideoQuality("FullHD", "mp4 - 1920x1080")
+    quality.add_link("k2s.cc", f"https://k2s.cc/file/{number}-0")
+    post.video_qualities.append(quality)
+    return post
+
+@pytest.fixture
+def thread_id(db_service):
+    db_service.create_performers([{'name': 'performer'}])
+    _, results, _ = db_service.create_threads(
+        [{'performer_id': 1, 'url': "http://forum.example/t1.html", 'forum_type': 'planetsuzy'}])
+    return results[0][0]['id']
+
+def row_counts(db_service):
+    session = db_service.session
+    counts = [session.query(func.count(model.id)).scalar() for model in (StoredPost, PostQuality, PostLink)]
+    if db_service.search_enabled:
+        counts.append(session.execute(text("SELECT count(*) FROM posts_fts")).scalar())
+    return counts
+
+def stored(db_service, thread_id):
+    posts, _ = db_service.get_thread_posts(thread_id, limit=100)
+    return [post.to_dict() for post in posts]
+
+def test_upsert_is_idempotent(db_service, thread_id):
+    posts = [make_post(3), make_post(2), make_post(1)]
+    assert db_service.upsert_posts(thread_id, posts) == (True, 3, "")
+    counts = row_counts(db_service)
+    first = stored(db_service, thread_id)
+    created = {post.post_id: post.created_at for post in db_service.session.query(StoredPost)}
+
+    # The same posts stored again (e.g. by a retried or shared check)
+    assert db_service.upsert_posts(thread_id, posts) == (True, 3, "")
+    db_service.session.expire_all()
+    assert row_counts(db_service) == counts
+    assert stored(db_service, thread_id) == first == [post.to_dict() for post in posts]
+    assert {post.post_id: post.created_at for post in db_service.session.query(StoredPost)} == created
+
+def test_upsert_replaces_an_edited_post(db_service, thread_id):
+    db_service.upsert_posts(thread_id, [make_post(2), make_post(1)])
+    counts = row_counts(db_service)
+
+    edited = make_post(2, content="Scène 2 (edited)", links=3)
+    db_service.upsert_posts(thread_id, [edited])
+    db_service.session.expire_all()
+    assert stored(db_service, thread_id) == [edited.to_dict(), make_post(1).to_dict()]
+    # The links of the post are replaced, not added to the old ones
+    assert row_counts(db_service)[2] == counts[2] + 2
+
+def test_upsert_of_a_batch_with_duplicates(db_service, thread_id):
+    assert db_service.upsert_posts(thread_id, [make_post(1), make_post(1)]) == (True, 1, "")
+    assert row_counts(db_service)[:2] == [1, 1]
+
+def test_thread_history_pages(db_service, thread_id):
+    db_service.upsert_posts(thread_id, [make_post(number) for number in range(1, 6)])
+
+    pages, cursor = [], None
+    while True:
+        posts, cursor = db_service.get_thread_posts(thread_id, limit=2, cursor=cursor)
+        pages.append([post.post_count for post in posts])
+        if cursor is None:
+            break
+    assert pages == [[5, 4], [3, 2], [1]]
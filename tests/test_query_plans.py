@@ -0,0 +1,11 @@
+import pytest
+from sqlalchemy import text
+
+from backend.models import init_db, get_engine, HOT_QUERIES
+
+@pytest.mark.parametrize("name, query, index_name", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_its_index(db_path, name, query, index_name):
+    init_db(db_path).close()
+    with get_engine(db_path).connect() as connection:
+        plan = ' | '.join(row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {query}')))
+    assert index_name in plan, f"{name} does not use {index_name}: {plan}"
@@ -0,0 +1,85 @@
+import gzip
+
+from backend import response_cache as response_cache_module
+from backend.response_cache import ResponseCache
+
+def create_performers(db_service, count=60):
+    success, _, error = db_service.create_performers([{'name': f"performer{i}"} for i in range(count)])
+    assert success, error
+
+def count_compressions(monkeypatch):
+    calls = []
+    compress = response_cache_module.compress
+    def counting_compress(data, encoding, level=6):
+        calls.append(encoding)
+        return compress(data, encoding, level)
+    monkeypatch.setattr(response_cache_module, 'compress', counting_compress)
+    return calls
+
+def test_cache_hit_is_not_compressed_again(client, db_service, monkeypatch):
+    create_performers(db_service)
+    calls = count_compressions(monkeypatch)
+
+    responses = [client.get('/api/performers', headers={'Accept-Encoding': 'gzip'}) for _ in range(3)]
+    assert calls == ['gzip']
+    for response in responses:
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'].endswith('-gzip"')
+        assert 'Accept-Encoding' in response.headers['Vary']
+    assert len({response.get_data() for response in responses}) == 1
+    assert len(gzip.decompress(responses[0].get_data()).decode('utf-8')) > 1024
+
+    # The compressed representation is revalidated with its own ETag
+    etag = responses[0].headers['ETag'].strip('"')
+    revalidated = client.get('/api/performers', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+    assert revalidated.status_code == 304
+
+def test_uncompressed_representation(client, db_service, monkeypatch):
+    create_performers(db_service)
+    calls = count_compressions(monkeypatch)
+
+    compressed = client.get('/api/performers', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/api/performers', headers={'Accept-Encoding': 'identity'})
+    assert calls == ['gzip']
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == gzip.decompress(compressed.get_data())
+    assert plain.headers['ETag'] != compressed.headers['ETag']
+
+def test_small_body_is_not_compressed(client, db_service, monkeypatch):
+    create_performers(db_service, 1)
+    calls = count_compressions(monkeypatch)
+
+    response = client.get('/api/performers', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert calls == []
+
+def test_a_write_changes_the_cached_body(client, db_service):
+    create_performers(db_service)
+    first = client.get('/api/performers', headers={'Accept-Encoding': 'gzip'})
+    success, _, error = db_service.create_performers([{'name': 'late'}])
+    assert success, error
+    second = client.get('/api/performers', headers={'Accept-Encoding': 'gzip'})
+
+    assert first.headers['ETag'] != second.headers['ETag']
+    assert gzip.decompress(first.get_data()) != gzip.decompress(second.get_data())
+
+def test_compressed_bodies_count_in_the_cache_size():
+    cache = ResponseCache(max_entries=10, max_bytes=10000)
+    body = b'{"value": "' + b'x' * 4000 + b'"}'
+    entry = cache.put('/a', '1', body)
+    cache.encoded(entry, 'gzip')
+    assert cache.size == len(body) + len(entry.compressed['gzip'])
+
+    # Evicted entries free their compressed bodies too
+    cache.put('/b', '1', body)
+    cache.put('/c', '1', body)
+    assert cache.get('/a', '1') is None
+    assert cache.size == 2 * len(body)
+
+def test_disabled_cache_still_compresses():
+    cache = ResponseCache(max_entries=0)
+    entry = cache.put('/a', '1', b'x' * 2000)
+    assert gzip.decompress(cache.encoded(entry, 'gzip')) == b'x' * 2000
+    assert cache.stats()['entries'] == 0 and cache.size == 0
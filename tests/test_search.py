@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+from backend.scrapers.base import Post, VideoQuality
+
+def make_post(number, content, author="author", links=(), quality=None):
+    post = Post(str(9000 + number), datetime(2024, 1, number), author, content, list(links), [], post_count=number)
+    if quality:
+        post.video_qualities.append(VideoQuality(quality, ""))
+    return post
+
+@pytest.fixture
+def search_data(db_service):
+    assert db_service.search_enabled
+    db_service.create_performers([{'name': 'alice'}, {'name': 'bob'}])
+    db_service.create_threads([{'performer_id': 1, 'url': "http://forum.example/t1.html", 'forum_type': 'planetsuzy'},
+                               {'performer_id': 2, 'url': "http://forum.example/t2.html", 'forum_type': 'planetsuzy'}])
+    db_service.upsert_posts(1, [
+        make_post(1, "Beach scene 1080p 1080p", links=["https://k2s.cc/file/a"], quality='FullHD'),
+        make_post(2, "Garden scene 720p", author="uploader", links=["https://rg.to/file/b"], quality='HD'),
+        make_post(3, "Thanks for the share"),
+    ])
+    db_service.upsert_posts(2, [make_post(4, "Pool scene 1080p", links=["https://k2s.cc/file/c"])])
+    return db_service
+
+def post_ids(results):
+    return [result['post_id'] for result in results]
+
+def test_search(search_data):
+    results, has_more = search_data.search_posts('1080p')
+    # The post repeating the word ranks first
+    assert post_ids(results) == ['9001', '9004']
+    assert not has_more
+    assert results[0]['snippet'].count('[1080p]') == 2
+    assert results[0]['performer_name'] == 'alice' and results[0]['thread_id'] == 1
+
+def test_search_fields_and_filters(search_data):
+    assert post_ids(search_data.search_posts('uploader')[0]) == ['9002']
+    assert post_ids(search_data.search_posts(provider='k2s.cc')[0]) == ['9004', '9001']
+    assert post_ids(search_data.search_posts('scene', performer_id=2)[0]) == ['9004']
+    assert post_ids(search_data.search_posts('scene', quality='hd')[0]) == ['9002']
+    assert post_ids(search_data.search_posts('scene', date_from=datetime(2024, 1, 2),
+                                             date_to=datetime(2024, 1, 4))[0]) == ['9002']
+    # Without query: newest first
+    assert post_ids(search_data.search_posts(performer_id=1)[0]) == ['9003', '9002', '9001']
+
+def test_search_input_is_not_query_syntax(search_data):
+    for query in ('scene AND', '"', 'NEAR(scene', 'content:scene', '*'):
+        search_data.search_posts(query)
+
+def test_search_pages(search_data):
+    first, has_more = search_data.search_posts('scene', limit=2)
+    assert len(first) == 2 and has_more
+    second, has_more = search_data.search_posts('scene', limit=2, offset=2)
+    assert len(second) == 1 and not has_more
+    assert set(post_ids(first + second)) == {'9001', '9002', '9004'}
+
+def test_rank_window(search_data):
+    # Only the matching posts stored last are ranked: the older ones are never returned,
+    # even when they are more relevant or on a later page
+    search_data.search_rank_window = 2
+    results, has_more = search_data.search_posts('scene', limit=10)
+    assert sorted(post_ids(results)) == ['9002', '9004']
+    assert not has_more
+    assert search_data.search_posts('scene', limit=1, offset=2) == ([], False)
+    # The window applies to the posts matching all the filters
+    assert sorted(post_ids(search_data.search_posts('scene', performer_id=1)[0])) == ['9001', '9002']
+
+    search_data.search_rank_window = 1
+    assert post_ids(search_data.search_posts('1080p')[0]) == ['9004']
+
+    search_data.search_rank_window = 0
+    assert sorted(post_ids(search_data.search_posts('scene', limit=10)[0])) == ['9001', '9002', '9004']
+
+def test_search_api(client, search_data):
+    data = client.get('/api/search?q=1080p&limit=1&page=2').get_json()
+    assert data['success']
+    assert post_ids(data['results']) == ['9004']
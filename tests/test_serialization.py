@@ -0,0 +1,54 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from backend.scrapers.base import Post, VideoQuality
+from backend.serialization import JSONSerializer
+
+def make_post():
+    post = Post('9100001', datetime(2023, 3, 23, 9, 14), "Scène", "Vidéo complète — 1080p ✓ 日本",
+                ["https://k2s.cc/file/abc"], ["https://img.example.com/é.jpg"], post_count=538)
+    quality = VideoQuality("FullHD", "mp4 - 1920x1080 - 1.2 GB")
+    quality.add_link("k2s.cc", "https://k2s.cc/file/abc")
+    post.video_qualities.append(quality)
+    return post
+
+PAYLOADS = [
+    {'checked_at': datetime(2024, 1, 2, 3, 4, 5), 'day': date(2024, 1, 2)},
+    {'precise': datetime(2024, 1, 2, 3, 4, 5, 123456), 'utc': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)},
+    {'name': "Zoé ★ 東京", 'quote': 'a "b" \\ c\n', 'emoji': "🎬"},
+    {'results': [make_post()], 'success': True, 'count': 1, 'empty': None},
+    {1: 'integer key', 'set': {3}},
+]
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+@pytest.mark.parametrize('indent', [False, True])
+def test_orjson_and_json_give_the_same_output(payload, indent):
+    pytest.importorskip('orjson')
+    assert JSONSerializer('orjson').dumps(payload, indent) == JSONSerializer('json').dumps(payload, indent)
+
+@pytest.mark.parametrize('backend', ['json', 'orjson'])
+def test_output(backend):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    serializer = JSONSerializer(backend)
+    data = serializer.dumps({'checked_at': datetime(2024, 1, 2, 3, 4, 5), 'name': "Zoé"})
+    # Compact UTF-8, non-ASCII characters are not escaped
+    assert data == '{"checked_at":"2024-01-02T03:04:05","name":"Zoé"}'.encode('utf-8')
+    assert serializer.loads(data) == {'checked_at': '2024-01-02T03:04:05', 'name': "Zoé"}
+    assert serializer.loads(data.decode('utf-8')) == serializer.loads(data)
+    assert serializer.dumps([make_post()]) == JSONSerializer('json').dumps([make_post().to_dict()])
+
+@pytest.mark.parametrize('backend', ['json', 'orjson'])
+def test_invalid_input(backend):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    serializer = JSONSerializer(backend)
+    with pytest.raises(TypeError):
+        serializer.dumps({'value': object()})
+    with pytest.raises(ValueError):
+        serializer.loads('{"unterminated": ')
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        JSONSerializer('simplejson')
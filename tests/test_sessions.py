@@ -0,0 +1,53 @@
+import threading
+
+from backend.models import get_engine
+from backend.pipeline import CheckJob, Stage
+
+def in_thread(function):
+    """Run a function in a new thread and return its result"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()))
+    thread.start()
+    thread.join(5)
+    return result[0]
+
+def test_each_thread_has_its_own_session(db_service):
+    session = db_service.session()
+    assert db_service.session() is session
+    other = in_thread(lambda: db_service.session())
+    assert other is not session
+
+def test_removed_session_releases_its_connection(db_service, db_path):
+    pool = get_engine(db_path).pool
+    db_service.get_all_performers()
+    assert pool.checkedout() == 1
+
+    db_service.remove_session()
+    assert pool.checkedout() == 0
+    assert not db_service.session.registry.has()
+
+def test_worker_session_is_released_after_each_job(db_service, db_path):
+    pool = get_engine(db_path).pool
+    sessions = []
+    def handler(job):
+        sessions.append(db_service.session())
+        db_service.get_thread(job.thread_id)
+        return False
+    stage = Stage('extract', handler, workers=1, teardown=db_service.remove_session)
+    stage.start()
+    try:
+        jobs = [CheckJob(number, "http://forum.example/t.html", 'planetsuzy', None, 'performer') for number in (1, 2)]
+        for job in jobs:
+            stage.put(job)
+            assert job.wait(5)
+            assert pool.checkedout() == 0
+    finally:
+        stage.stop()
+    # The same worker thread got a new session for its next job
+    assert sessions[0] is not sessions[1]
+
+def test_request_session_is_released(client, db_service, db_path):
+    pool = get_engine(db_path).pool
+    assert client.get('/api/threads').status_code == 200
+    assert pool.checkedout() == 0
+    assert not db_service.session.registry.has()
@@ -0,0 +1,54 @@
+import os
+
+from sqlalchemy import text
+
+from backend.config import get_config
+from backend.models import get_engine, init_db
+
+SYNCHRONOUS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+def pragmas(connection):
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')}
+
+def test_pragmas_applied_on_connect(db_path):
+    init_db(db_path).close()
+    config = get_config()
+    expected = {
+        'journal_mode': config.SQLITE_JOURNAL_MODE.lower(),
+        'synchronous': SYNCHRONOUS[config.SQLITE_SYNCHRONOUS.upper()],
+        'busy_timeout': config.SQLITE_BUSY_TIMEOUT_MS,
+        'cache_size': config.SQLITE_CACHE_SIZE,
+        'mmap_size': config.SQLITE_MMAP_SIZE,
+    }
+    assert expected['journal_mode'] == 'wal'
+
+    # Every pooled connection is configured, not only the first one
+    engine = get_engine(db_path)
+    connections = [engine.connect() for _ in range(3)]
+    try:
+        for connection in connections:
+            assert pragmas(connection) == expected
+    finally:
+        for connection in connections:
+            connection.close()
+    assert os.path.exists(db_path + '-wal')
+
+def test_one_engine_per_database(db_path, tmp_path, monkeypatch):
+    engine = get_engine(db_path)
+    monkeypatch.chdir(tmp_path)
+    assert get_engine(os.path.basename(db_path)) is engine
+    assert get_engine(str(tmp_path / 'other.db')) is not engine
+
+def test_readers_are_not_blocked_by_a_writer(db_service, db_path):
+    db_service.create_performers([{'name': 'before'}])
+    engine = get_engine(db_path)
+
+    with engine.connect() as writer, engine.connect() as reader:
+        writer.exec_driver_sql("BEGIN IMMEDIATE")
+        writer.execute(text("UPDATE performers SET name = 'during'"))
+        # The reader sees the last committed data right away
+        assert reader.execute(text("SELECT name FROM performers")).scalar() == 'before'
+        writer.exec_driver_sql("COMMIT")
+        reader.commit()
+        assert reader.execute(text("SELECT name FROM performers")).scalar() == 'during'